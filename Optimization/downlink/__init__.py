@@ -0,0 +1,47 @@
+from .scheduler import schedule_raw
+from .segments import compress, optimize_segments
+from .rolling import rolling_horizon
+from .sweep import run_sweep
+from .data import load_data, save_dataset, open_dataset
+from .modules import Gateway, Passes, PassCost, feasible_starts
+from .model import MinuteModel, get_model
+from .heuristic import heuristic
+from .simulator import simulate
+from .robustness import fit_outages, sample_outages, robustness
+from .frontier import pareto, trace_frontier
+from .plots import decimate, draw_spans, plot_accumulated, render
+from .optimizer import DownlinkOptimizer
+from .results import save_results, load_results, update_catalog, load_catalog
+
+__all__ = [
+    "schedule_raw",
+    "compress",
+    "optimize_segments",
+    "rolling_horizon",
+    "run_sweep",
+    "MinuteModel",
+    "get_model",
+    "heuristic",
+    "simulate",
+    "fit_outages",
+    "sample_outages",
+    "robustness",
+    "pareto",
+    "trace_frontier",
+    "decimate",
+    "draw_spans",
+    "plot_accumulated",
+    "render",
+    "load_data",
+    "save_dataset",
+    "open_dataset",
+    "Gateway",
+    "Passes",
+    "PassCost",
+    "feasible_starts",
+    "DownlinkOptimizer",
+    "save_results",
+    "load_results",
+    "update_catalog",
+    "load_catalog"
+]
@@ -0,0 +1,149 @@
+import os
+import json
+import pickle
+import numpy as np
+
+# The pickles of a data folder and the name they are loaded under
+FILES = {
+    'som': 'som',
+    'los': 'los',
+    'gw_los': 'gwlos',
+    'Rsc': 'rs',
+    'Rdl': 'rd',
+    'Rgw': 'gwr',
+    'outage_los': 'outage_los',
+    'Rdl_raw': 'rd_raw'
+}
+
+DATASET_FILE = "dataset.bin"
+MAGIC = b"DLDATA01"
+# Columns start on cache line boundaries
+ALIGN = 64
+
+_datasets = {}
+
+def _aligned(offset:int) -> int:
+    return -(-offset // ALIGN) * ALIGN
+
+def save_dataset(folder_path:str, data:dict) -> str:
+    """
+    Save the optimizer inputs of a data folder as one memory-mappable file.
+
+    The file starts with the magic bytes, the length of the header and a
+    JSON header with the scalar inputs and the dtype and offset of every
+    column. The columns follow the header, each starting at a multiple of
+    64 bytes, with booleans stored as one byte per minute.
+
+    Parameters
+    ----------
+    folder_path : str
+        The data folder, created if missing.
+    data : dict
+        The inputs by name, see `FILES`. Arrays of the same length are
+        stored as columns, numbers in the header and None is skipped.
+
+    Returns
+    -------
+    str
+        The path of the dataset.
+    """
+    os.makedirs(folder_path, exist_ok=True)
+    columns = {name: np.ascontiguousarray(value) for name, value in data.items()
+               if value is not None and np.ndim(value) == 1}
+    lengths = {len(value) for value in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError("The columns of a dataset must have the same length")
+    header = {'length': lengths.pop() if lengths else 0, 'columns': {},
+              'scalars': {name: float(value) for name, value in data.items()
+                          if value is not None and np.ndim(value) == 0}}
+
+    # The offsets are counted from the end of the header, rounded up to ALIGN
+    offset = 0
+    for name, value in columns.items():
+        header['columns'][name] = {'dtype': value.dtype.str, 'offset': offset}
+        offset = _aligned(offset + value.nbytes)
+    encoded = json.dumps(header).encode()
+    start = _aligned(len(MAGIC) + 8 + len(encoded))
+
+    path = os.path.join(folder_path, DATASET_FILE)
+    with open(path, 'wb') as f:
+        f.write(MAGIC + np.array(len(encoded), dtype='<u8').tobytes() + encoded)
+        for name, value in columns.items():
+            f.seek(start + header['columns'][name]['offset'])
+            f.write(value.tobytes())
+        f.truncate(start + offset)
+    return path
+
+def open_dataset(path:str, indexes:list = None) -> dict:
+    """
+    Open a dataset written by `save_dataset` without reading its columns.
+
+    Parameters
+    ----------
+    path : str
+        The dataset, or the data folder holding it.
+    indexes : list, optional
+        [start, stop] of the minutes to return, all by default.
+
+    Returns
+    -------
+    dict
+        The inputs by name like `load_data`. The columns are read-only
+        views of the memory-mapped file, so slicing them never copies.
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, DATASET_FILE)
+    raw = np.memmap(path, dtype=np.uint8, mode='r')
+    if bytes(raw[:len(MAGIC)]) != MAGIC:
+        raise ValueError(f"{path} is not a dataset")
+    size = int(raw[len(MAGIC):len(MAGIC) + 8].view('<u8')[0])
+    header = json.loads(bytes(raw[len(MAGIC) + 8:len(MAGIC) + 8 + size]))
+    first = _aligned(len(MAGIC) + 8 + size)
+    start, stop = indexes if indexes is not None else (0, header['length'])
+    data = dict.fromkeys(FILES)
+    data.update(header['scalars'])
+    for name, column in header['columns'].items():
+        dtype = np.dtype(column['dtype'])
+        offset = first + column['offset']
+        data[name] = np.asarray(raw[offset:offset + header['length']*dtype.itemsize].view(dtype))[start:stop]
+    return data
+
+def load_data(folder_path:str, cache:bool = True) -> dict:
+    """
+    Load the optimizer inputs of a data folder.
+
+    A folder with a dataset, see `save_dataset`, is memory-mapped and
+    only its header is read; the pickles of older folders are read in
+    full. The folder is loaded once per process, later calls return the
+    same dict, so it must not be modified.
+
+    Parameters
+    ----------
+    folder_path : str
+        A folder made by the data creation notebook.
+    cache : bool
+        Whether to use and fill the process wide cache.
+
+    Returns
+    -------
+    dict
+        The arrays som, los, gw_los and outage_los and the rates Rsc,
+        Rdl, Rgw and Rdl_raw. Inputs missing from the folder, like gw_los
+        for ground station only data, are None.
+    """
+    key = os.path.abspath(folder_path)
+    if cache and key in _datasets:
+        return _datasets[key]
+    if os.path.exists(os.path.join(folder_path, DATASET_FILE)):
+        data = open_dataset(folder_path)
+    else:
+        data = {}
+        for name, file in FILES.items():
+            path = os.path.join(folder_path, file + '.pickle')
+            data[name] = None
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    data[name] = pickle.load(f)
+    if cache:
+        _datasets[key] = data
+    return data
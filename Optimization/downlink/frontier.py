@@ -0,0 +1,156 @@
+import copy
+import itertools
+import numpy as np
+
+from .simulator import simulate
+
+# One row per solved point
+FRONTIER_DTYPE = np.dtype([
+    ('buffersize', 'f8'),
+    ('Rsc', 'f8'),
+    ('c1', 'f8'),
+    ('c2', 'f8'),
+    ('rho', 'f8'),
+    ('delivered', 'f8'),
+    ('gs_minutes', 'i8'),
+    ('gw_minutes', 'i8'),
+    ('cost', 'f8'),
+    ('objective', 'f8'),
+    ('pareto', '?')
+])
+
+def pareto(delivered, gs_minutes, buffersize) -> np.ndarray:
+    """
+    Marks the points no other point beats, more delivered data with no
+    more booked ground station time and no larger buffer.
+
+    Returns
+    -------
+    np.ndarray
+        True for the non dominated points.
+    """
+    costs = np.column_stack((-np.asarray(delivered, dtype=np.float64), gs_minutes, buffersize))
+    # A point is dominated if another is no worse in every objective and better in one
+    no_worse = np.all(costs[:, None, :] <= costs[None, :, :], axis=2)
+    better = np.any(costs[:, None, :] < costs[None, :, :], axis=2)
+    return ~np.any(no_worse & better, axis=0)
+
+def _bend(a:dict, b:dict, m:dict, scale:tuple) -> float:
+    # The distance of the middle point from the line between its neighbours,
+    # with the objectives scaled to the curve
+    p = [np.array([point['delivered']/scale[0], point['gs_minutes']/scale[1]]) for point in (a, m, b)]
+    line = p[2] - p[0]
+    offset = p[1] - p[0]
+    length = np.linalg.norm(line)
+    if length == 0:
+        return np.linalg.norm(offset)
+    return abs(line[0]*offset[1] - line[1]*offset[0])/length
+
+def _same(a:dict, b:dict) -> bool:
+    return (a['delivered'], a['gs_minutes']) == (b['delivered'], b['gs_minutes'])
+
+def _dominated(point:dict, points:list) -> bool:
+    return any(other['delivered'] >= point['delivered'] and other['gs_minutes'] <= point['gs_minutes']
+               and other['buffersize'] <= point['buffersize']
+               and (other['delivered'], other['gs_minutes'], other['buffersize'])
+               != (point['delivered'], point['gs_minutes'], point['buffersize'])
+               for other in points)
+
+def trace_frontier(optimizer, data:dict, indexes:list, buffersizes:list, science_rates:list = None,
+                   weights:list = None, rhos:tuple = (0.0, 1.0), mode:str = "relaxed", buffer:float = 0,
+                   tol:float = 0.02, depth:int = 4) -> np.ndarray:
+    """
+    Traces the trade-off between delivered data, booked ground station
+    time and buffer size over one period.
+
+    Every combination of buffer size, science rate and cost weights is a
+    curve over rho. A curve is solved at the ends of `rhos` and an
+    interval is halved only where the middle point bends away from the
+    line between its ends by more than `tol`, or where it equals one end
+    and the curve steps in the other half, up to `depth` times. Every
+    point is warm started from the better of its neighbours on the curve,
+    which stay feasible since rho only changes the objective. Intervals
+    whose ends are both dominated by points already found are not refined.
+
+    Parameters
+    ----------
+    optimizer : DownlinkOptimizer
+        The problem variant, copied for every curve.
+    data : dict
+        The inputs, see `downlink.data.load_data`.
+    indexes : list
+        [start, stop] of the period.
+    buffersizes : list
+        The buffer capacities.
+    science_rates : list, optional
+        The science data per minute, Rsc of the data by default.
+    weights : list, optional
+        (c1, c2) pairs, those of the last `setup` of the optimizer by default.
+    rhos : tuple
+        The range of rho.
+    mode : str
+        The mode of `DownlinkOptimizer.optimize`.
+    buffer : float
+        The data in the buffer before the period.
+    tol : float
+        The bend, relative to the largest delivered data and booked time
+        of the curve, that is refined.
+    depth : int
+        The most times an interval is halved.
+
+    Returns
+    -------
+    np.ndarray
+        The solved points with the columns of `FRONTIER_DTYPE`, 'pareto'
+        marks the Pareto set.
+    """
+    som, los, gw_los = optimizer.get_data(data, indexes)
+    science_rates = science_rates if science_rates is not None else [data['Rsc']]
+    weights = weights if weights is not None else [(getattr(optimizer, 'c1', 1), getattr(optimizer, 'c2', None))]
+    Rgw = data['Rgw'] if optimizer.gateway else None
+    points = []
+
+    # Larger buffers and lower science rates first, their points dominate early
+    curves = itertools.product(sorted(buffersizes, reverse=True), sorted(science_rates), weights)
+    for buffersize, Rsc, (c1, c2) in curves:
+        curve = copy.copy(optimizer)
+        curve.buffersize = buffersize
+
+        def solve(rho, neighbours):
+            curve.setup(Rsc, data['Rdl'], Rgw, rho, c1, c2)
+            warm_start = max(neighbours, key=lambda point: curve.objective(*point['solution']),
+                             default={'solution': None})['solution']
+            solution = curve.optimize(som, los, gw_los, buffer, mode, warm_start)
+            arrays = dict(zip(curve.names, solution))
+            sim = simulate(arrays['T_sc'], arrays['T_dl'], arrays.get('T_gw'), arrays.get('T_gs'), None,
+                           Rsc, curve.Rdl, curve.Rgw, c1=c1, c2=c2 or 0, trajectory=False)
+            point = {'buffersize': buffersize, 'Rsc': Rsc, 'c1': c1, 'c2': c2 or 0, 'rho': rho,
+                     'delivered': sim['delivered'] + sim['delivered_gw'], 'gs_minutes': sim['gs_minutes'],
+                     'gw_minutes': sim['gw_minutes'], 'cost': sim['cost'],
+                     'objective': curve.objective(*solution), 'solution': solution}
+            points.append(point)
+            return point
+
+        low = solve(rhos[0], [])
+        high = solve(rhos[1], [low])
+        scale = (max(low['delivered'], high['delivered'], 1e-9), max(low['gs_minutes'], high['gs_minutes'], 1))
+        intervals = [(low, high, 0)]
+        while intervals:
+            a, b, level = intervals.pop()
+            if level >= depth or (_dominated(a, points) and _dominated(b, points)):
+                continue
+            m = solve((a['rho'] + b['rho'])/2, [a, b])
+            if _bend(a, b, m, scale) > tol:
+                intervals += [(a, m, level + 1), (m, b, level + 1)]
+            # A middle point equal to one end is a step in the other half
+            elif _same(m, b) and not _same(a, m):
+                intervals.append((a, m, level + 1))
+            elif _same(m, a) and not _same(m, b):
+                intervals.append((m, b, level + 1))
+
+    frontier = np.zeros(len(points), dtype=FRONTIER_DTYPE)
+    for i, point in enumerate(points):
+        for name in FRONTIER_DTYPE.names[:-1]:
+            frontier[i][name] = point[name]
+    frontier['pareto'] = pareto(frontier['delivered'], frontier['gs_minutes'], frontier['buffersize'])
+    return frontier
@@ -0,0 +1,102 @@
+import numpy as np
+from numba import njit
+
+from .scheduler import IDLE, SCIENCE, DOWNLINK, GATEWAY
+
+@njit
+def _heuristic(som, los, gw_los, buffer, buffer_size, Rsc, Rdl, Rgw, M, w_dl, w_gs, w_gw, booked, open_end):
+    N = som.shape[0]
+    actions = np.zeros(N, dtype=np.int8)
+    T_gs = np.zeros(N, dtype=np.bool_)
+
+    level = buffer
+    # The pass carried over is used like one booked here
+    pass_end = min(booked, N)
+    T_gs[:pass_end] = True
+    for t in range(N):
+        if t >= pass_end and los[t] and (open_end or t + M <= N):
+            stop = min(t + M, N)
+            visible = 0
+            for u in range(t, stop):
+                if los[u]:
+                    visible += 1
+            ready = min(visible, int(level // Rdl))
+            # Books a pass once the buffer can fill it or is filling up, if
+            # it pays at least half of what a pass in full view would
+            worth = (visible * w_dl - M * w_gs) >= 0.5 * M * (w_dl - w_gs)
+            if worth and ready * w_dl > M * w_gs and (ready >= visible or level + M * Rsc > buffer_size):
+                T_gs[t:stop] = True
+                pass_end = stop
+
+        if t < pass_end and los[t] and level >= Rdl:
+            actions[t] = DOWNLINK
+            level -= Rdl
+        elif som[t] and level + Rsc <= buffer_size:
+            actions[t] = SCIENCE
+            level += Rsc
+        elif gw_los[t] and w_gw > 0 and level >= Rgw and level + Rsc > buffer_size:
+            actions[t] = GATEWAY
+            level -= Rgw
+    return actions, T_gs
+
+def heuristic(som, los, gw_los, buffer:float, buffer_size:float, Rsc:float, Rdl:float, Rgw:float,
+              M:int, rho:float, c1:float, c2:float = None, booked:int = 0, open_end:bool = False):
+    """
+    Builds a feasible ground station (and gateway) schedule in one sweep.
+
+    Science is done whenever it fits in the buffer. Ground station passes
+    are booked as whole M minute blocks once the buffer holds enough data
+    to fill them, skipping blocks with too little LOS to pay off, and are
+    used while there is data. The gateway is used when the buffer is too
+    full for science. The schedule is meant as a start solution for the
+    MILPs.
+
+    Parameters
+    ----------
+    som, los : np.ndarray
+        The science and ground station masks per minute.
+    gw_los : np.ndarray or None
+        The gateway mask per minute, None for the ground station only problem.
+    buffer : float
+        The data in the buffer before the first minute.
+    buffer_size : float
+        The capacity of the buffer.
+    Rsc, Rdl, Rgw : float
+        The science, ground station and gateway data per minute.
+    M : int
+        The length of a ground station pass in minutes.
+    rho : float
+        The price of booked ground station time relative to its downlink.
+    c1, c2 : float
+        The cost weights of ground station and gateway downlink.
+    booked : int
+        The minutes of a pass carried over from before the first minute.
+    open_end : bool
+        Whether a pass may be cut by the end of the horizon.
+
+    Returns
+    -------
+    tuple[np.ndarray, ...]
+        T_sc, T_dl, T_gw, T_idle and T_gs per minute as 0/1 arrays.
+    """
+    som = np.asarray(som, dtype=np.bool_)
+    gateway = gw_los is not None
+    gw_los = np.zeros_like(som) if gw_los is None else np.asarray(gw_los, dtype=np.bool_)
+    actions, T_gs = _heuristic(som, np.asarray(los, dtype=np.bool_), gw_los,
+                               float(buffer), float(buffer_size), float(Rsc), float(Rdl),
+                               float(Rgw) if gateway else 1.0, int(M), Rdl/c1, rho*Rdl/c1,
+                               Rgw/c2 if gateway else 0.0, int(booked), bool(open_end))
+    T_sc = (actions == SCIENCE).astype(np.float64)
+    T_dl = (actions == DOWNLINK).astype(np.float64)
+    T_gw = (actions == GATEWAY).astype(np.float64)
+    T_idle = (actions == IDLE).astype(np.float64)
+    return T_sc, T_dl, T_gw, T_idle, T_gs.astype(np.float64)
+
+def gap(start:float, final:float) -> float:
+    """
+    The improvement of the final objective over a start objective,
+    relative to the final objective.
+    """
+    if final == 0:
+        return 0.0
+    return (final - start) / abs(final)
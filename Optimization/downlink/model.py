@@ -0,0 +1,161 @@
+from collections import OrderedDict
+import cvxpy as cp
+import numpy as np
+
+# The most models kept by `get_model`
+MAX_MODELS = 4
+
+_models = OrderedDict()
+
+def solution_names(modules:list = ()) -> list:
+    """
+    The names of the solution arrays of a model with these modules, in order.
+    """
+    return (['T_sc', 'T_dl'] + [name for module in modules for name in module.actions]
+            + ['T_idle'] + [name for module in modules for name in module.outputs])
+
+class MinuteModel:
+    """
+    The per-minute downlink MILP, built once per shape from modules.
+
+    The core model has science, ground station downlink and idle time per
+    minute, a buffer that can neither run empty nor overflow, and values
+    ground station downlink at Rdl/c1 per minute. Modules from
+    `downlink.modules` add the gateway, ground station passes and their
+    cost on top.
+
+    Everything that changes between solves of the same shape, the masks,
+    rates, buffer and cost weights, is a `cp.Parameter`, so solving again
+    with new values reuses the canonicalized problem. Products of inputs
+    enter as single parameters to keep the problem DPP.
+    """
+
+    def __init__(self, N:int, modules:list = ()):
+        """
+        Parameters
+        ----------
+        N : int
+            The number of minutes.
+        modules : list
+            The modules to add, in order.
+        """
+        self.N = N
+        self.modules = list(modules)
+
+        self.som = cp.Parameter(N, nonneg=True)
+        self.los = cp.Parameter(N, nonneg=True)
+        self.buffer = cp.Parameter(nonneg=True)
+        self.buffer_size = cp.Parameter(nonneg=True)
+        self.Rsc = cp.Parameter(nonneg=True)
+        self.Rdl = cp.Parameter(nonneg=True)
+        self.w_dl = cp.Parameter(nonneg=True)
+
+        # Decision variables
+        self.T_sc = cp.Variable(N, boolean=True)
+        self.T_dl = cp.Variable(N, boolean=True)
+        self.T_idle = cp.Variable(N, boolean=True)
+
+        # Constraint 1: Must only perform action when in state
+        self.constraints = [self.T_sc <= self.som, self.T_dl <= self.los]
+        self.actions = self.T_sc + self.T_dl + self.T_idle
+        self.sent = cp.cumsum(self.T_dl)*self.Rdl
+        self.objective = self.w_dl*cp.sum(self.T_dl)
+        for module in self.modules:
+            module.build(self)
+
+        # Constraint 2: Only one variable avaiable at each time step
+        self.constraints += [self.actions == 1]
+
+        # Constraint 3 and 4: The buffer can neither run empty nor overflow
+        level = cp.cumsum(self.T_sc)*self.Rsc + self.buffer - self.sent
+        self.constraints += [level <= self.buffer_size, level >= 0]
+
+        self.names = solution_names(self.modules)
+        self.problem = cp.Problem(cp.Maximize(self.objective), self.constraints)
+
+    def set(self, som, los, gw_los, buffer:float, buffer_size:float, Rsc:float, Rdl:float,
+            Rgw:float, rho:float, c1:float, c2:float, booked:int = 0, open_end:bool = False):
+        """
+        Set the inputs of the next solve, inputs without a module using
+        them are ignored. booked and open_end are the pass carried over
+        from before the horizon and whether a pass may be cut by its end,
+        see `downlink.modules.Passes`.
+        """
+        inputs = {'som': som, 'los': los, 'gw_los': gw_los, 'buffer': buffer, 'buffer_size': buffer_size,
+                  'Rsc': Rsc, 'Rdl': Rdl, 'Rgw': Rgw, 'rho': rho, 'c1': c1, 'c2': c2,
+                  'booked': booked, 'open_end': open_end}
+        self.som.value = np.asarray(som, dtype=np.float64)
+        self.los.value = np.asarray(los, dtype=np.float64)
+        self.buffer.value = buffer
+        self.buffer_size.value = buffer_size
+        self.Rsc.value = Rsc
+        self.Rdl.value = Rdl
+        self.w_dl.value = Rdl/c1
+        for module in self.modules:
+            module.set(self, inputs)
+
+    def solution(self) -> tuple:
+        """
+        Returns
+        -------
+        tuple[np.ndarray, ...]
+            The arrays named in `names` of the last solve: T_sc, T_dl,
+            the module actions like T_gw, T_idle and the module outputs
+            like T_gs.
+        """
+        return tuple(getattr(self, name).value for name in self.names)
+
+    def assign(self, solution:tuple):
+        """
+        Set the variables to a solution ordered like `solution`.
+        """
+        for name, value in zip(self.names, solution):
+            getattr(self, name).value = np.asarray(value, dtype=np.float64)
+        for module in self.modules:
+            module.start(self)
+
+    def evaluate(self, solution:tuple) -> float:
+        """
+        Get the objective of a solution ordered like `solution` for the current inputs.
+        """
+        self.assign(solution)
+        return self.problem.objective.value
+
+    def solve(self, solver=cp.GUROBI, warm_start=None, **solver_opts):
+        """
+        Solve with the current inputs.
+
+        Parameters
+        ----------
+        solver : str
+            The cvxpy solver.
+        warm_start : tuple, optional
+            A start solution ordered like `solution`.
+        solver_opts
+            Passed on to the solver.
+
+        Returns
+        -------
+        tuple[np.ndarray, ...]
+            The solution, see `solution`.
+        """
+        if warm_start is not None:
+            self.assign(warm_start)
+        self.problem.solve(solver=solver, verbose=False, warm_start=warm_start is not None, **solver_opts)
+        return self.solution()
+
+def get_model(N:int, modules:list = ()) -> MinuteModel:
+    """
+    Get the model of a shape and set of modules, built on first use and
+    cached per process. The key only holds the length and the module
+    structure, the LOS and the pass starts it allows are parameters, so
+    the periods of a year share their models. Only the MAX_MODELS most
+    recently used models are kept.
+    """
+    key = (N,) + tuple(module.key() for module in modules)
+    if key not in _models:
+        _models[key] = MinuteModel(N, modules)
+        if len(_models) > MAX_MODELS:
+            _models.popitem(last=False)
+    _models.move_to_end(key)
+    return _models[key]
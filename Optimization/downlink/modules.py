@@ -0,0 +1,194 @@
+import cvxpy as cp
+import numpy as np
+
+class Gateway:
+    """
+    Downlink through the gateway, valued at Rgw/c2 per minute.
+    """
+    actions = ['T_gw']
+    outputs = []
+
+    def key(self):
+        return ('Gateway',)
+
+    def build(self, model):
+        N = model.N
+        model.gw_los = cp.Parameter(N, nonneg=True)
+        model.Rgw = cp.Parameter(nonneg=True)
+        model.w_gw = cp.Parameter(nonneg=True)
+        model.T_gw = cp.Variable(N, boolean=True)
+        model.constraints += [model.T_gw <= model.gw_los]
+        model.actions += model.T_gw
+        model.sent += cp.cumsum(model.T_gw)*model.Rgw
+        model.objective += model.w_gw*cp.sum(model.T_gw)
+
+    def set(self, model, inputs:dict):
+        model.gw_los.value = np.asarray(inputs['gw_los'], dtype=np.float64)
+        model.Rgw.value = inputs['Rgw']
+        model.w_gw.value = inputs['Rgw']/inputs['c2']
+
+    def start(self, model):
+        pass
+
+def feasible_starts(los, M:int, open_end:bool = False) -> np.ndarray:
+    """
+    The minutes a pass may start at without losing optimality: those with
+    ground station LOS, and at a closed end the last start N-M.
+
+    A booked interval that starts without LOS can be trimmed by its first
+    minute if it is longer than M, or moved one minute later if it is
+    exactly M. Neither books more minutes nor drops a downlink, since
+    there is none in the first minute. Repeating this moves every start
+    onto a LOS minute, except where the end of the horizon stops the move:
+    unless `open_end` is set, a pass must end inside the horizon, so the
+    last M minutes can only be reached from N-M, with or without LOS
+    there. It is a start if any of the last M-1 minutes has LOS.
+
+    Parameters
+    ----------
+    los : np.ndarray
+        The ground station mask.
+    M : int
+        The minimum length of a pass in minutes.
+    open_end : bool
+        Whether a pass may be cut by the end of the horizon.
+
+    Returns
+    -------
+    np.ndarray
+        The sorted minutes.
+    """
+    los = np.asarray(los) > 0.5
+    N = len(los)
+    if open_end:
+        return np.flatnonzero(los)
+    if N < M:
+        return np.zeros(0, dtype=np.int64)
+    starts = np.flatnonzero(los[:N - M + 1])
+    if np.any(los[N - M + 1:]) and not los[N - M]:
+        starts = np.append(starts, N - M)
+    return starts
+
+def valid_passes(T_gs, M:int, los = None, booked:int = 0, open_end:bool = False) -> bool:
+    """
+    Whether booked time is made of passes the `Passes` module allows.
+
+    Every run of booked minutes must last at least M minutes and start at
+    one of the `feasible_starts`, except for the run holding the first `booked` minutes, a
+    pass carried over from before the horizon, and, with `open_end`, a run
+    cut by the end of the horizon.
+
+    Parameters
+    ----------
+    T_gs : np.ndarray
+        The booked minutes.
+    M : int
+        The minimum length of a pass in minutes.
+    los : np.ndarray, optional
+        The ground station mask, passes may start anywhere without it.
+    booked : int
+        The minutes of a pass carried over, which must be booked.
+    open_end : bool
+        Whether a pass may be cut by the end of the horizon.
+
+    Returns
+    -------
+    bool
+        True if the passes are valid.
+    """
+    T_gs = np.asarray(T_gs) > 0.5
+    N = len(T_gs)
+    if not np.all(T_gs[:booked]):
+        return False
+    edges = np.diff(np.concatenate(([False], T_gs, [False])).astype(np.int8))
+    rises, falls = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    carried = (rises == 0) & (booked > 0)
+    long_enough = (falls - rises >= M) | carried | ((falls == N) & open_end)
+    allowed = carried | np.isin(rises, feasible_starts(los, M, open_end)) if los is not None else np.ones(len(rises), dtype=bool)
+    return bool(np.all(long_enough) and np.all(allowed))
+
+class Passes:
+    """
+    Ground station downlink only inside booked passes of at least M minutes.
+
+    T_gs is the booked time and pass_starts marks the first minute of
+    every pass. A pass that starts at t keeps T_gs on until t+M-1, or the
+    end of the horizon.
+
+    The minutes a pass may start at are an input, the `start_mask`
+    parameter bounding pass_starts, so one model serves every LOS mask of
+    its length. By default a pass may start at any minute. With
+    `restrict`, passes only start at the `feasible_starts` of the LOS of
+    every solve, which keeps an optimal solution; the solver presolve
+    removes the start variables the mask fixes to zero.
+
+    A pass booked before the horizon is continued by the `booked` input,
+    the minutes at the start of the horizon it still needs to reach M.
+    Unless `open_end` is set, no pass starts in the last M-1 minutes, so no
+    pass is cut by the end of the horizon. A rolling horizon sets it where
+    the next period continues the cut pass.
+    """
+    actions = []
+    outputs = ['T_gs']
+
+    def __init__(self, M:int, restrict:bool = False):
+        self.M = M
+        self.restrict = restrict
+
+    def key(self):
+        return ('Passes', self.M, self.restrict)
+
+    def build(self, model):
+        N, M = model.N, self.M
+        model.T_gs = cp.Variable(N, boolean=True)
+        model.pass_starts = cp.Variable(N, boolean=True)
+        model.start_mask = cp.Parameter(N, nonneg=True)
+        model.booked = cp.Parameter(N, nonneg=True)
+        # A pass carried over from before the horizon needs no start
+        rising = cp.hstack([model.T_gs[:1] - model.booked[:1], model.T_gs[1:] - model.T_gs[:-1]])
+        model.constraints += [model.pass_starts >= rising, model.pass_starts <= model.start_mask,
+                              model.T_gs >= model.booked]
+        # Minimum pass length: at most one start in the last M minutes,
+        # and the pass is booked if there was one
+        started = cp.cumsum(model.pass_starts)
+        model.constraints += [model.T_gs[:M] >= started[:M]]
+        if N > M:
+            model.constraints += [model.T_gs[M:] >= started[M:] - started[:N-M]]
+        model.constraints += [model.T_dl <= model.T_gs]
+
+    def set(self, model, inputs:dict):
+        N = model.N
+        mask = np.ones(N)
+        if self.restrict:
+            mask[:] = 0.0
+            mask[feasible_starts(inputs['los'], self.M, inputs['open_end'])] = 1.0
+        # Passes only start in the last M-1 minutes if they may be cut
+        if not inputs['open_end']:
+            mask[max(N - self.M + 1, 0):] = 0.0
+        model.start_mask.value = mask
+        model.booked.value = (np.arange(N) < inputs['booked']).astype(np.float64)
+
+    def start(self, model):
+        T_gs = np.asarray(model.T_gs.value) > 0.5
+        rising = T_gs & ~np.concatenate(([model.booked.value[0] > 0.5], T_gs[:-1]))
+        model.pass_starts.value = rising.astype(np.float64)
+
+class PassCost:
+    """
+    Booked ground station time, priced at rho*Rdl/c1 per minute. Needs `Passes`.
+    """
+    actions = []
+    outputs = []
+
+    def key(self):
+        return ('PassCost',)
+
+    def build(self, model):
+        model.w_gs = cp.Parameter(nonneg=True)
+        model.objective -= model.w_gs*cp.sum(model.T_gs)
+
+    def set(self, model, inputs:dict):
+        model.w_gs.value = inputs['rho']*inputs['Rdl']/inputs['c1']
+
+    def start(self, model):
+        pass
@@ -0,0 +1,379 @@
+import os
+import cvxpy as cp
+import numpy as np
+
+from .data import load_data
+from .model import get_model, solution_names
+from .modules import Gateway, Passes, PassCost, valid_passes
+from .scheduler import schedule_raw
+from .segments import optimize_segments, relax_segments
+from .heuristic import heuristic, gap
+from .rolling import rolling_horizon
+from .results import save_results
+from .simulator import simulate
+from .plots import plot_accumulated
+from .robustness import fit_outages, robustness
+
+class DownlinkOptimizer:
+    """
+    The downlink optimizer for one problem variant.
+
+    The variant is chosen by the modules of the minute model: the raw
+    problem has none, the ground station problem books passes of at least
+    M minutes and pays for them, and the gateway problem adds gateway
+    downlink on top. Solutions are tuples ordered like `names`, e.g.
+    (T_sc, T_dl, T_idle, T_gs) for the ground station problem.
+    """
+
+    def __init__(self, M:int, buffersize:float, gateway:bool = False, passes:bool = True):
+        """
+        Parameters
+        ----------
+        M : int
+            The minimum length of a ground station pass in minutes.
+        buffersize : float
+            The capacity of the buffer.
+        gateway : bool
+            Whether downlink through the gateway is possible.
+        passes : bool
+            Whether ground station downlink needs booked passes. Without
+            passes and gateway this is the raw problem.
+        """
+        self.M = M
+        self.buffersize = buffersize
+        self.gateway = gateway
+        self.passes = passes
+        self.threads = None
+        self.solver = cp.GUROBI
+        self.lp_solver = cp.HIGHS
+        self.bound = None
+        self.gap = None
+        self.modules = []
+        if gateway:
+            self.modules.append(Gateway())
+        if passes:
+            # Passes only start at the feasible starts, which keeps an optimal solution
+            self.modules += [Passes(M, restrict=True), PassCost()]
+        self.names = solution_names(self.modules)
+
+    def setup(self, Rsc:float, Rdl:float, Rgw:float = None, rho:float = 0, c1:float = 1, c2:float = None):
+        self.Rsc = Rsc
+        self.Rdl = Rdl
+        self.Rgw = Rgw if self.gateway else 0.0
+        self.rho = rho
+        self.c1 = c1
+        self.c2 = c2
+
+    def load_data(self, folder_path:str) -> dict:
+        """
+        The inputs of a data folder, see `downlink.data.load_data`.
+        """
+        return load_data(folder_path)
+
+    def split_data(self, full_los) -> list:
+        total_len=len(full_los)
+        length=total_len/12
+        indexes = [int(length*i) for i in range(13)]
+        return indexes
+
+    def get_data(self, data:dict, indexes:list):
+        """
+        indexes: length 2 list of start index and end index
+
+        Returns som, los and gw_los of the period, gw_los is None without gateway.
+        """
+        T_som=data['som'][indexes[0]:indexes[1]]
+        T_los=data['los'][indexes[0]:indexes[1]]
+        T_GW_los=data['gw_los'][indexes[0]:indexes[1]] if self.gateway else None
+        return T_som, T_los, T_GW_los
+
+    def _select(self, solution:tuple) -> tuple:
+        # Picks the arrays of this variant from a (T_sc, T_dl, T_gw, T_idle, T_gs) solution
+        arrays = dict(zip(['T_sc', 'T_dl', 'T_gw', 'T_idle', 'T_gs'], solution))
+        return tuple(arrays[name] for name in self.names)
+
+    def schedule(self, som, los, buffer:float):
+        """
+        Solves the raw problem exactly, without a MILP solver.
+        """
+        if self.modules:
+            raise ValueError("Only the raw problem can be scheduled exactly")
+        T_sc, T_dl, T_idle = schedule_raw(som, los, self.Rsc, self.Rdl, self.buffersize, buffer)
+        print(f"Total downlinked: {np.sum(T_dl)*self.Rdl / 1e9:.5f} Mbit")
+        print(f"Total scienced: {np.sum(T_sc)*self.Rsc / 1e9:.5f} Mbit")
+        return T_sc, T_dl, T_idle
+
+    def start(self, som, los, gw_los, buffer:float, booked:int = 0, open_end:bool = False) -> tuple:
+        """
+        A feasible start solution: the heuristic with passes, the exact
+        schedule for the raw problem.
+        """
+        if not self.passes:
+            if self.gateway:
+                return None
+            return schedule_raw(som, los, self.Rsc, self.Rdl, self.buffersize, buffer)
+        return self._select(heuristic(som, los, gw_los, buffer, self.buffersize, self.Rsc, self.Rdl,
+                                      self.Rgw, self.M, self.rho, self.c1, self.c2, booked, open_end))
+
+    def optimize(self, som, los, gw_los, buffer:float, mode:str = "minute", warm_start:tuple = None,
+                 booked:int = 0, open_end:bool = False):
+        """
+        mode: "minute" for one boolean per minute, "segments" for the
+        compressed approximation of `downlink.segments`, "exact" for the
+        raw problem without a MILP solver, "relaxed" for the rounded LP
+        relaxation, see `relaxed`
+        warm_start: optional solution ordered like `names` used as a start solution
+        booked: the minutes of a pass carried over from before the first minute
+        open_end: whether a pass may be cut by the end, see `downlink.modules.Passes`
+        """
+        if mode == "exact":
+            return self.schedule(som, los, buffer)
+        if mode == "relaxed":
+            return self.relaxed(som, los, gw_los, buffer, warm_start, booked, open_end)
+        if mode == "segments":
+            if not self.passes:
+                raise ValueError("The segment formulation needs ground station passes")
+            return self._select(optimize_segments(som, los, gw_los, buffer, self.buffersize, self.Rsc, self.Rdl,
+                                                  self.Rgw, self.M, self.rho, self.c1, self.c2,
+                                                  self.solver, self.threads, booked, open_end))
+        model = get_model(len(som), self.modules)
+        model.set(som, los, gw_los, buffer, self.buffersize, self.Rsc, self.Rdl, self.Rgw, self.rho, self.c1, self.c2,
+                  booked, open_end)
+        start = self.best_start([self.start(som, los, gw_los, buffer, booked, open_end), warm_start],
+                                som, los, gw_los, buffer, booked, open_end)
+        solver_opts = {}
+        if self.solver == cp.GUROBI:
+            solver_opts["TimeLimit"] = 7200
+            if self.threads is not None:
+                solver_opts["Threads"] = self.threads
+        solution = model.solve(self.solver, start, **solver_opts)
+
+        # Output
+        arrays = dict(zip(self.names, solution))
+        print("Status:", model.problem.status)
+        print("Total cost (timeslots slots used):", model.problem.value)
+        if start is not None:
+            print(f"Start solution: {model.evaluate(start)}, gap: {gap(model.evaluate(start), model.problem.value):.2%}")
+        print(f"Total downlined: {np.sum(arrays['T_dl'])*self.Rdl / 1e9:.5f} Mbit")
+        print(f"Total scienced: {np.sum(arrays['T_sc'])*self.Rsc / 1e9:.5f} Mbit")
+        if self.gateway:
+            print(f"Total gateway: {np.sum(arrays['T_gw'])*self.Rgw / 1e9:.5f} Mbit")
+        return solution
+
+    def relaxed(self, som, los, gw_los, buffer:float, warm_start:tuple = None, booked:int = 0, open_end:bool = False):
+        """
+        A fast feasible solution from the LP relaxation of the segment model.
+
+        The relaxation is solved with `lp_solver`, an open source solver by
+        default, and rounded, see `downlink.segments.relax_segments`. The
+        best feasible one of the rounded solution, the start solution and
+        the warm start is returned, see `best_start`. The LP objective bounds the MILP objective;
+        it is kept in `bound` and the gap of the returned solution to it
+        in `gap`.
+        """
+        if not self.passes:
+            raise ValueError("The relaxation needs ground station passes")
+        rounded, self.bound = relax_segments(som, los, gw_los, buffer, self.buffersize, self.Rsc, self.Rdl,
+                                             self.Rgw, self.M, self.rho, self.c1, self.c2, self.lp_solver,
+                                             booked, open_end)
+        candidates = [self._select(rounded), self.start(som, los, gw_los, buffer, booked, open_end), warm_start]
+        solution = self.best_start(candidates, som, los, gw_los, buffer, booked, open_end)
+        if solution is None:
+            raise ValueError("Neither the rounded relaxation, the heuristic nor the warm start is feasible")
+
+        self.gap = gap(self.objective(*solution), self.bound)
+        print(f"LP bound: {self.bound}, rounded: {self.objective(*solution)}, gap: {self.gap:.2%}")
+        return solution
+
+    def feasible(self, solution:tuple, som, los, gw_los, buffer:float, booked:int = 0,
+                 open_end:bool = False) -> bool:
+        """
+        Whether a solution ordered like `names` keeps to the constraints of
+        the minute model: one action per minute, each only when possible,
+        the buffer played out minute by minute within its bounds, and
+        passes of at least M minutes starting at a feasible start, see
+        `downlink.modules.valid_passes`.
+        """
+        if any(len(value) != len(som) for value in solution):
+            return False
+        arrays = {name: np.asarray(value, dtype=np.float64) for name, value in zip(self.names, solution)}
+        if any(np.any(np.abs(value - np.round(value)) > 1e-6) for value in arrays.values()):
+            return False
+        arrays = {name: np.round(value) for name, value in arrays.items()}
+        actions = arrays['T_sc'] + arrays['T_dl'] + arrays['T_idle']
+        ok = np.all(arrays['T_sc'] <= som) and np.all(arrays['T_dl'] <= los)
+        level = buffer + np.cumsum(arrays['T_sc']*self.Rsc - arrays['T_dl']*self.Rdl)
+        if self.gateway:
+            actions = actions + arrays['T_gw']
+            ok = ok and np.all(arrays['T_gw'] <= gw_los)
+            level = level - np.cumsum(arrays['T_gw'])*self.Rgw
+        tolerance = 1e-9*self.buffersize
+        ok = ok and np.all(actions == 1) and np.all(level >= -tolerance) and np.all(level <= self.buffersize + tolerance)
+        if self.passes:
+            ok = ok and np.all(arrays['T_dl'] <= arrays['T_gs']) and valid_passes(arrays['T_gs'], self.M, los,
+                                                                                    booked, open_end)
+        return bool(ok)
+
+    def best_start(self, candidates:list, som, los, gw_los, buffer:float, booked:int = 0,
+                   open_end:bool = False) -> tuple:
+        """
+        The feasible candidate with the best objective, None if there is
+        none. Candidates that are None are skipped, the others are checked
+        with `feasible` before their objectives are compared, so a warm
+        start that breaks a constraint never wins on its objective.
+        """
+        candidates = [solution for solution in candidates if solution is not None]
+        feasible = [solution for solution in candidates
+                    if self.feasible(solution, som, los, gw_los, buffer, booked, open_end)]
+        if len(feasible) < len(candidates):
+            print(f"Infeasible start solutions dropped: {len(candidates) - len(feasible)}")
+        if not feasible:
+            return None
+        return max(feasible, key=lambda solution: self.objective(*solution))
+
+    def carry(self, *solution) -> int:
+        """
+        The minutes the last pass of a solution still needs to reach M,
+        booked at the start of the next period.
+        """
+        if not self.passes:
+            return 0
+        T_gs = np.asarray(dict(zip(self.names, solution))['T_gs']) > 0.5
+        if len(T_gs) == 0 or not T_gs[-1]:
+            return 0
+        idle = np.flatnonzero(~T_gs)
+        rise = idle[-1] + 1 if len(idle) else 0
+        return max(0, rise + self.M - len(T_gs))
+
+    def _extend_passes(self, solution:tuple, booked:int) -> tuple:
+        # Books passes shorter than M on to M minutes, like the passes the
+        # end of the last solve cut in a warm start
+        arrays = dict(zip(self.names, solution))
+        T_gs = np.asarray(arrays['T_gs']) > 0.5
+        edges = np.diff(np.concatenate(([False], T_gs, [False])).astype(np.int8))
+        for rise, fall in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)):
+            if fall - rise < self.M and not (rise == 0 and booked > 0):
+                T_gs[rise:rise + self.M] = True
+        arrays['T_gs'] = T_gs.astype(np.float64)
+        return tuple(arrays[name] for name in self.names)
+
+    def buffer_change(self, *solution) -> float:
+        """
+        The data added to the buffer by a solution.
+        """
+        arrays = dict(zip(self.names, solution))
+        change = np.sum(arrays['T_sc'])*self.Rsc - np.sum(arrays['T_dl'])*self.Rdl
+        if self.gateway:
+            change -= np.sum(arrays['T_gw'])*self.Rgw
+        return change
+
+    def objective(self, *solution) -> float:
+        """
+        The objective of a solution, the same as the one of the minute model.
+        """
+        arrays = dict(zip(self.names, solution))
+        value = (1/self.c1)*np.sum(arrays['T_dl'])*self.Rdl
+        if self.passes:
+            value -= (1/self.c1)*self.rho*np.sum(arrays['T_gs'])*self.Rdl
+        if self.gateway:
+            value += (1/self.c2)*np.sum(arrays['T_gw'])*self.Rgw
+        return value
+
+    def optimize_year(self, data:dict, mode:str = "minute", buffer:float = 0, lookahead:int = 0):
+        """
+        Solves the full dataset month by month, see `downlink.rolling.rolling_horizon`.
+        A pass booked across the end of a month is continued in the next
+        one, only the last month may not cut a pass at its end. Warm starts
+        have their cut passes booked on to M minutes, see `best_start`.
+
+        Returns
+        -------
+        tuple
+            The solution ordered like `names` and the statistics per month.
+        """
+        def solve(start, stop, buffer, warm_start, booked):
+            som, los, gw_los = self.get_data(data, [start, stop])
+            booked = booked or 0
+            open_end = stop < len(data['los'])
+            if warm_start is not None and self.passes:
+                warm_start = self._extend_passes(warm_start, booked)
+            return self.optimize(som, los, gw_los, buffer, mode, warm_start, booked, open_end)
+        return rolling_horizon(solve, self.split_data(data['los']), self.buffer_change, self.objective,
+                               buffer, lookahead, idle=self.names.index('T_idle'), carry=self.carry)
+
+    def analyze(self, data:dict, solution:tuple):
+        """
+        Returns the outage minutes of the downlink, the data lost in outages,
+        the total cost and the total data downlinked.
+        """
+        arrays = dict(zip(self.names, solution))
+        T_dl = np.asarray(arrays['T_dl']) > 0.5
+        ok = np.asarray(data['outage_los'][:len(T_dl)], dtype=bool)
+        outages = T_dl & ~ok
+        sim = simulate(arrays['T_sc'], T_dl, arrays.get('T_gw'), arrays.get('T_gs'), ok,
+                       self.Rsc, self.Rdl, self.Rgw, c1=self.c1, c2=self.c2 or 0, trajectory=False)
+        # The downlink that got through is sent at the full rate
+        tot_dl = sim['dl_minutes']*self.Rdl
+        end_buffer = tot_dl - (sim['dl_minutes'] - sim['outage_minutes'])*data['Rdl_raw']
+        total_DL = tot_dl + sim['gw_minutes']*self.Rgw
+        return outages, end_buffer, sim['cost'], total_DL
+
+    def robustness(self, data:dict, solution:tuple, buffer:float = 0, realizations:int = 1000, seed:int = 0) -> dict:
+        """
+        Replays a solution against outage realizations drawn from a Markov
+        chain fitted to the outages of the data, see `downlink.robustness`.
+        Downlinks that get through send at the full rate Rdl_raw.
+
+        Returns
+        -------
+        dict
+            The totals per realization and their 'summary'.
+        """
+        arrays = dict(zip(self.names, solution))
+        p_fail, p_recover = fit_outages(data['los'], data['outage_los'])
+        Rdl = data['Rdl_raw'] if data['Rdl_raw'] is not None else self.Rdl
+        return robustness(arrays['T_sc'], arrays['T_dl'], arrays.get('T_gw'), p_fail, p_recover, self.Rsc, Rdl,
+                          self.Rgw, buffer, self.buffersize, realizations, seed)
+
+    def save(self, folder:str, solution:tuple, data:dict, periods:list = None, **meta) -> dict:
+        """
+        Save a solution with the outages of the data as one results bundle,
+        see `downlink.results.save_results`.
+
+        Parameters
+        ----------
+        folder : str
+            The folder of the run.
+        solution : tuple
+            The solution ordered like `names`.
+        data : dict
+            The data the solution was made for.
+        periods : list, optional
+            The statistics per period.
+        meta
+            Further metadata, e.g. station, rho, mode and totals.
+
+        Returns
+        -------
+        dict
+            The metadata of the bundle, with its path.
+        """
+        arrays = dict(zip(self.names, solution))
+        arrays['outage_los'] = data['outage_los'][:len(solution[0])]
+        meta = dict(meta, problem="gw" if self.gateway else "gs" if self.passes else "raw",
+                    M=self.M, buffersize=self.buffersize, Rsc=self.Rsc, Rdl=self.Rdl, Rgw=self.Rgw,
+                    rho=self.rho, c1=self.c1, c2=self.c2, objective=self.objective(*solution),
+                    **{name: int(np.sum(value)) for name, value in zip(self.names, solution)})
+        return save_results(folder, arrays, meta, periods)
+
+    def plotting(self, rho, station, solution:tuple, outages, save_folder, name, buffer=0):
+        """
+        Plots the accumulated data of a solution to
+        {save_folder}/{name}_result_{station}_{rho:.2f}.pdf and figs/,
+        see `downlink.plots.plot_accumulated`. The buffer is in Gb.
+        """
+        arrays = dict(zip(self.names, solution))
+        file = f"{name}_result_{station}_{rho:.2f}.pdf"
+        plot_accumulated([os.path.join(save_folder, file), os.path.join("figs", file)], arrays['T_sc'],
+                         arrays['T_dl'], arrays.get('T_gw'), self.Rsc, self.Rdl, self.Rgw, buffer*1e9,
+                         self.buffersize)
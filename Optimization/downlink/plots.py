@@ -0,0 +1,156 @@
+import os
+import shutil
+import numpy as np
+import matplotlib
+from matplotlib.figure import Figure
+
+from .results import load_results
+from .simulator import simulate
+from .sweep import run_sweep
+
+# The buckets of `decimate`, each keeps at most four points
+BINS = 2000
+
+def decimate(y, bins:int = BINS) -> np.ndarray:
+    """
+    The indexes of a long series to draw, keeping the first, last, lowest
+    and highest point of each of `bins` buckets, so peaks and dips survive.
+    Short series are kept whole.
+    """
+    N = len(y)
+    if N <= 4*bins:
+        return np.arange(N)
+    size = -(-N // bins)
+    padded = np.concatenate((y, np.full(bins*size - N, y[-1])))
+    buckets = padded.reshape(bins, size)
+    starts = np.arange(bins)*size
+    keep = np.concatenate((starts, starts + np.argmin(buckets, axis=1), starts + np.argmax(buckets, axis=1),
+                           np.minimum(starts + size - 1, N - 1), [N - 1]))
+    return np.unique(np.minimum(keep, N - 1))
+
+def step(ax, y, bins:int = BINS, **kwargs):
+    """
+    ax.step of a series over its indexes, decimated, see `decimate`.
+    """
+    y = np.asarray(y)
+    idx = decimate(y, bins)
+    return ax.step(idx, y[idx], **kwargs)
+
+def spans(mask) -> list:
+    """
+    The (start, width) of every run of True in a mask.
+    """
+    edges = np.diff(np.concatenate(([0], np.asarray(mask, dtype=np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    return list(zip(starts, np.flatnonzero(edges == -1) - starts))
+
+def draw_spans(ax, mask, color:str = 'tab:blue', alpha:float = 0.3, label:str = None):
+    """
+    Shades the runs of True in a mask over the full height of the axes, as
+    one collection instead of a span per run.
+    """
+    return ax.broken_barh(spans(mask), (0, 1), transform=ax.get_xaxis_transform(), color=color,
+                          alpha=alpha, label=label)
+
+def save_figure(fig:Figure, paths:list):
+    """
+    Renders a figure once to the first path and copies it to the others.
+    """
+    for path in paths:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fig.savefig(paths[0], format="pdf", bbox_inches="tight")
+    for path in paths[1:]:
+        shutil.copyfile(paths[0], path)
+
+def plot_accumulated(paths:list, T_sc, T_dl, T_gw, Rsc:float, Rdl:float, Rgw:float, buffer:float,
+                     buffersize:float, title:str = None, tick_days:int = 2, font_size:int = 15, bins:int = BINS):
+    """
+    Plots the accumulated science, downlink and buffer of a schedule in Gb.
+
+    The figure is built without pyplot, so it renders with no display and
+    in worker processes.
+
+    Parameters
+    ----------
+    paths : list
+        The pdf files to save, rendered once and copied.
+    T_sc, T_dl, T_gw : np.ndarray
+        The schedule, T_gw is None without gateway.
+    Rsc, Rdl, Rgw : float
+        The data per minute.
+    buffer : float
+        The data in the buffer before the first minute.
+    buffersize : float
+        The capacity of the buffer.
+    title : str, optional
+        The title.
+    tick_days : int
+        The days between ticks.
+    font_size : int
+        The font size.
+    bins : int
+        The buckets the series are decimated to.
+    """
+    N = len(T_dl)
+    with matplotlib.rc_context({'font.size': font_size}):
+        fig = Figure()
+        ax = fig.subplots()
+        step(ax, np.cumsum(T_sc)*Rsc/1e9, bins, label='Accumulated science', color="tab:orange")
+        step(ax, np.cumsum(T_dl)*Rdl/1e9, bins, label='Accumulated GS downlink', color="tab:blue")
+        if T_gw is not None:
+            step(ax, np.cumsum(T_gw)*Rgw/1e9, bins, label='Accumulated GW downlink', color="tab:green")
+        level = simulate(T_sc, T_dl, T_gw, None, None, Rsc, Rdl, Rgw or 0, buffer)['level']
+        step(ax, level/1e9, bins, label='buffer', color="tab:red")
+        ax.axhline(buffersize/1e9, linestyle='--', label='Max buffer size', color="tab:red")
+        ax.legend(loc="upper left")
+        ticks = np.arange(0, N, tick_days*24*60)
+        ax.set_xticks(ticks, labels=[str(int(i/(24*60))) for i in ticks])
+        ax.set_xlabel("Time [days]")
+        ax.set_xlim(0, N)
+        ax.set_ylabel("Acculmulated Data [Gb]")
+        if title is not None:
+            ax.set_title(title)
+        save_figure(fig, paths)
+
+def plot_results(path:str, paths:list, buffer:float = 0, **kwargs):
+    """
+    Plots a results bundle with `plot_accumulated`.
+
+    Parameters
+    ----------
+    path : str
+        The bundle, see `downlink.results.save_results`.
+    paths : list
+        The pdf files to save.
+    buffer : float
+        The data in the buffer before the first minute.
+    kwargs
+        Passed on to `plot_accumulated`.
+    """
+    results = load_results(path)
+    T_gw = results.get('T_gw')
+    plot_accumulated(paths, results['T_sc'], results['T_dl'], T_gw, results['Rsc'], results['Rdl'],
+                     results['Rgw'] if T_gw is not None else 0, buffer, results['buffersize'], **kwargs)
+
+def _render(job, threads):
+    path, paths, kwargs = job
+    plot_results(path, paths, **kwargs)
+    return paths
+
+def render(jobs:list, cores:int = None) -> list:
+    """
+    Plots results bundles in parallel worker processes.
+
+    Parameters
+    ----------
+    jobs : list
+        (bundle, paths, kwargs) for every figure, see `plot_results`.
+    cores : int, optional
+        The processes to use, all cores by default.
+
+    Returns
+    -------
+    list[tuple]
+        (job, paths, error) for every figure, see `downlink.sweep.run_sweep`.
+    """
+    return run_sweep(_render, jobs, 1, cores)
@@ -0,0 +1,151 @@
+import os
+import json
+import fcntl
+import datetime
+import numpy as np
+
+RESULTS_FILE = "results.npz"
+CATALOG_FILE = "catalog.npy"
+
+# The columns of the catalog, one row per saved run
+CATALOG_DTYPE = np.dtype([
+    ('path', 'U256'),
+    ('problem', 'U16'),
+    ('station', 'U32'),
+    ('mode', 'U16'),
+    ('rho', 'f8'),
+    ('M', 'i8'),
+    ('c1', 'f8'),
+    ('c2', 'f8'),
+    ('buffersize', 'f8'),
+    ('Rsc', 'f8'),
+    ('Rdl', 'f8'),
+    ('Rgw', 'f8'),
+    ('minutes', 'i8'),
+    ('T_sc', 'i8'),
+    ('T_dl', 'i8'),
+    ('T_gw', 'i8'),
+    ('T_gs', 'i8'),
+    ('objective', 'f8'),
+    ('total_cost', 'f8'),
+    ('total_DL', 'f8'),
+    ('end_buffer', 'f8'),
+    ('created', 'U32')
+])
+
+def save_results(folder:str, arrays:dict, meta:dict, periods:list = None) -> str:
+    """
+    Save one run as a single compressed bundle.
+
+    The 0/1 schedule arrays are stored as packed bits, eight minutes per
+    byte, next to the metadata as JSON and the statistics per period.
+    Nothing is pickled, so the bundle loads with `allow_pickle=False`.
+
+    Parameters
+    ----------
+    folder : str
+        The folder of the run, created if missing.
+    arrays : dict
+        The boolean arrays by name, e.g. T_sc, T_dl, T_idle, T_gs and
+        outage_los, all of the same length.
+    meta : dict
+        JSON serializable metadata, e.g. the problem, station, rates and
+        totals of the run.
+    periods : list, optional
+        The statistics per period from `downlink.rolling.rolling_horizon`.
+
+    Returns
+    -------
+    dict
+        The stored metadata with the path of the bundle.
+    """
+    os.makedirs(folder, exist_ok=True)
+    lengths = {len(value) for value in arrays.values()}
+    if len(lengths) != 1:
+        raise ValueError("The arrays of a run must have the same length")
+    meta = dict(meta, names=list(arrays), minutes=lengths.pop())
+    meta.setdefault('created', datetime.datetime.now().isoformat(timespec='seconds'))
+    content = {name: np.packbits(np.asarray(value) > 0.5) for name, value in arrays.items()}
+    # Numpy scalars are written as the Python numbers they hold
+    content['meta'] = np.array(json.dumps(meta, default=lambda value: value.item()))
+    for key in ['period', 'start', 'stop', 'seconds', 'objective', 'end_buffer']:
+        content['period_' + key] = np.array([period[key] for period in periods or []])
+    path = os.path.join(folder, RESULTS_FILE)
+    np.savez_compressed(path, **content)
+    return dict(meta, path=path)
+
+def load_results(path:str) -> dict:
+    """
+    Load a bundle written by `save_results`.
+
+    Parameters
+    ----------
+    path : str
+        The bundle, or the folder of the run.
+
+    Returns
+    -------
+    dict
+        The metadata, the arrays by name as booleans and 'periods', the
+        statistics per period as a dict of arrays.
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, RESULTS_FILE)
+    with np.load(path, allow_pickle=False) as bundle:
+        results = json.loads(str(bundle['meta']))
+        for name in results['names']:
+            results[name] = np.unpackbits(bundle[name], count=results['minutes']).astype(bool)
+        results['periods'] = {key[len('period_'):]: bundle[key] for key in bundle.files if key.startswith('period_')}
+    return results
+
+def update_catalog(root:str, path:str, meta:dict) -> np.ndarray:
+    """
+    Add or replace the row of a run in the catalog of a results folder.
+
+    The read, update and write hold an exclusive lock on a file next to
+    the catalog, so scripts saving runs to the same folder at the same
+    time, e.g. the gs and gw optimizations, do not drop each other's rows.
+
+    Parameters
+    ----------
+    root : str
+        The results folder holding the catalog.
+    path : str
+        The bundle of the run, stored relative to `root`.
+    meta : dict
+        The values of the run, columns of `CATALOG_DTYPE` that are missing
+        are left at 0 or empty.
+
+    Returns
+    -------
+    np.ndarray
+        The updated catalog.
+    """
+    row = np.zeros(1, dtype=CATALOG_DTYPE)
+    for name in CATALOG_DTYPE.names:
+        if meta.get(name) is not None:
+            row[name] = meta[name]
+    row['path'] = os.path.relpath(path, root)
+    with open(os.path.join(root, CATALOG_FILE + ".lock"), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        catalog = load_catalog(root)
+        catalog = np.concatenate((catalog[catalog['path'] != row['path'][0]], row))
+        # Written next to the catalog and moved, so a reader never sees half a file
+        tmp = os.path.join(root, CATALOG_FILE + ".tmp")
+        with open(tmp, 'wb') as f:
+            np.save(f, catalog, allow_pickle=False)
+        os.replace(tmp, os.path.join(root, CATALOG_FILE))
+    return catalog
+
+def load_catalog(root:str) -> np.ndarray:
+    """
+    The catalog of a results folder as a structured array with the columns
+    of `CATALOG_DTYPE`, empty if there is none yet.
+
+    Runs are selected and compared column wise, e.g.
+    `catalog[(catalog['problem'] == 'gs') & (catalog['station'] == 'AAU')]`.
+    """
+    path = os.path.join(root, CATALOG_FILE)
+    if not os.path.exists(path):
+        return np.zeros(0, dtype=CATALOG_DTYPE)
+    return np.load(path, allow_pickle=False)
@@ -0,0 +1,172 @@
+import numpy as np
+from numba import njit, prange
+
+from .simulator import simulate
+
+# The normal quantile of the 95% confidence intervals
+Z = 1.96
+
+@njit
+def _next(state):
+    # splitmix64, returns the new state and a uniform number in [0, 1)
+    state = state + np.uint64(0x9E3779B97F4A7C15)
+    z = state
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    z = z ^ (z >> np.uint64(31))
+    return state, (z >> np.uint64(11)) * (1.0 / 9007199254740992.0)
+
+@njit(parallel=True)
+def _sample(p_fail, p_recover, seed, first, ok):
+    B, N = ok.shape
+    total = p_fail + p_recover
+    stationary = p_fail / total if total > 0 else 0.0
+    for b in prange(B):
+        # Every realization has its own stream, so the result does not
+        # depend on the chunking or the number of threads
+        state = np.uint64(seed) * np.uint64(0x100000001B3) ^ np.uint64(first + b)
+        state, u = _next(state)
+        state, u = _next(state)
+        outage = u < stationary
+        for t in range(N):
+            state, u = _next(state)
+            if outage:
+                outage = u >= p_recover
+            else:
+                outage = u < p_fail
+            ok[b, t] = not outage
+
+def fit_outages(los, ok) -> tuple:
+    """
+    Fits a two state Markov chain to the outages of a realization.
+
+    Only transitions between consecutive minutes that both have LOS are
+    counted, since outages are only observed with LOS.
+
+    The chain is fitted to the data rather than drawn from the rain model
+    of the station. That model lives in `mani_rain`, stepped sample by
+    sample inside its link budget (see `mani.LinkBudget.budget_rates`),
+    and an outage is the rain fade together with the geometry and the
+    fixed MODCOD of the run. outage_los is that model as seen through the
+    link, the realization the dataset was generated with, so the fit needs
+    neither `mani_rain` nor the budget. It keeps only whether a downlink
+    gets through and its persistence from minute to minute, not the rain
+    states.
+
+    Parameters
+    ----------
+    los : np.ndarray
+        The ground station mask per minute.
+    ok : np.ndarray
+        Whether a downlink gets through per minute, outage_los of the data.
+
+    Returns
+    -------
+    tuple[float, float]
+        The probability per minute of an outage starting and of it ending.
+    """
+    los = np.asarray(los, dtype=bool)
+    outage = los & ~np.asarray(ok, dtype=bool)
+    pairs = los[:-1] & los[1:]
+    before, after = outage[:-1][pairs], outage[1:][pairs]
+    clear = np.sum(~before)
+    failed = np.sum(before)
+    p_fail = np.sum(~before & after) / clear if clear else 0.0
+    p_recover = np.sum(before & ~after) / failed if failed else 1.0
+    return float(p_fail), float(p_recover)
+
+def sample_outages(N:int, p_fail:float, p_recover:float, realizations:int, seed:int = 0, first:int = 0) -> np.ndarray:
+    """
+    Draws outage realizations from the Markov chain of `fit_outages`.
+
+    Parameters
+    ----------
+    N : int
+        The number of minutes.
+    p_fail, p_recover : float
+        The probability per minute of an outage starting and of it ending.
+    realizations : int
+        The number of realizations.
+    seed : int
+        The seed, the same seed gives the same realizations.
+    first : int
+        The index of the first realization, to draw a long run in chunks.
+
+    Returns
+    -------
+    np.ndarray
+        Whether a downlink gets through, (realizations, N) booleans. The
+        first minute is drawn from the stationary distribution.
+    """
+    ok = np.empty((realizations, N), dtype=np.bool_)
+    _sample(float(p_fail), float(p_recover), int(seed), int(first), ok)
+    return ok
+
+def summarize(values) -> dict:
+    """
+    The mean with its 95% confidence interval and the 5, 50 and 95
+    percentiles of a sample.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    mean = np.mean(values)
+    half = Z*np.std(values, ddof=1)/np.sqrt(len(values)) if len(values) > 1 else 0.0
+    p5, p50, p95 = np.percentile(values, [5, 50, 95])
+    return {'mean': mean, 'low': mean - half, 'high': mean + half, 'p5': p5, 'p50': p50, 'p95': p95}
+
+def probability(events) -> dict:
+    """
+    The frequency of the events in a sample with its 95% Wilson interval.
+    """
+    n = len(events)
+    p = np.mean(events)
+    center = (p + Z**2/(2*n))/(1 + Z**2/n)
+    half = Z*np.sqrt(p*(1 - p)/n + Z**2/(4*n**2))/(1 + Z**2/n)
+    return {'mean': p, 'low': max(center - half, 0.0), 'high': min(center + half, 1.0)}
+
+def robustness(T_sc, T_dl, T_gw, p_fail:float, p_recover:float, Rsc:float, Rdl:float, Rgw:float,
+               buffer:float, buffer_size:float, realizations:int = 1000, seed:int = 0, chunk:int = 64) -> dict:
+    """
+    Replays a schedule against many outage realizations.
+
+    The realizations are drawn and simulated in chunks, so memory stays
+    at `chunk` realizations whatever their number.
+
+    Parameters
+    ----------
+    T_sc, T_dl, T_gw : np.ndarray
+        The schedule as 0/1 arrays, T_gw may be None.
+    p_fail, p_recover : float
+        The outage model, see `fit_outages`.
+    Rsc, Rdl, Rgw : float
+        The science, ground station and gateway data per minute.
+    buffer : float
+        The data in the buffer before the first minute.
+    buffer_size : float
+        The capacity of the buffer.
+    realizations : int
+        The number of realizations.
+    seed : int
+        The seed of the realizations.
+    chunk : int
+        The realizations simulated at once.
+
+    Returns
+    -------
+    dict
+        'delivered', 'end_buffer', 'overflow' and 'lost' per realization
+        and 'summary', their distributions as `summarize` and the
+        probability of any overflow as `probability`.
+    """
+    N = len(T_sc)
+    totals = {'delivered': [], 'end_buffer': [], 'overflow': [], 'lost': []}
+    for first in range(0, realizations, chunk):
+        ok = sample_outages(N, p_fail, p_recover, min(chunk, realizations - first), seed, first)
+        sim = simulate(T_sc, T_dl, T_gw, None, ok, Rsc, Rdl, Rgw, buffer, buffer_size, trajectory=False)
+        totals['delivered'].append(sim['delivered'] + sim['delivered_gw'])
+        totals['end_buffer'].append(sim['end_level'])
+        totals['overflow'].append(sim['overflow'])
+        totals['lost'].append(sim['lost'])
+    results = {name: np.concatenate(values) for name, values in totals.items()}
+    results['summary'] = {name: summarize(values) for name, values in results.items()}
+    results['summary']['overflow_probability'] = probability(results['overflow'] > 0)
+    return results
@@ -0,0 +1,91 @@
+import time
+import datetime
+import numpy as np
+
+def log(msg):
+    print(f"[{datetime.datetime.now()}] {msg}")
+
+def rolling_horizon(solve, indexes:list, buffer_change, objective, buffer:float = 0,
+                    lookahead:int = 0, idle:int = None, carry = None):
+    """
+    Solves a long horizon period by period, carrying the buffer over.
+
+    Every period [indexes[i], indexes[i+1]) is solved together with up to
+    `lookahead` samples of the next period, but only the period itself is
+    kept. The buffer at the end of the kept part is the start buffer of the
+    next solve, and the lookahead part of the solution, padded with idle
+    time, is passed on as warm start. The warm start is only a guess, the
+    solve has to check that it is feasible.
+
+    A decision the kept part commits the next period to, like a pass
+    booked across the boundary, is carried over with `carry`.
+
+    Parameters
+    ----------
+    solve : callable
+        solve(start, stop, buffer, warm_start) returning a tuple of per
+        sample arrays for [start, stop). warm_start is None or a tuple of
+        arrays like the ones returned. With `carry`, the carried value is
+        passed on as a fifth argument.
+    indexes : list
+        The period boundaries, as returned by `split_data`.
+    buffer_change : callable
+        buffer_change(*arrays) returning the change of the buffer over the
+        given part of a solution.
+    objective : callable
+        objective(*arrays) returning the objective of the given part of a
+        solution, used for logging.
+    buffer : float
+        The data in the buffer before the first period.
+    lookahead : int
+        The number of samples solved beyond the end of every period.
+    idle : int, optional
+        The position of the idle array in the solution, padded with ones
+        instead of zeros in the warm start.
+    carry : callable, optional
+        carry(*arrays) returning what the solution kept so far, from the
+        first sample on, commits the next period to.
+
+    Returns
+    -------
+    tuple[tuple[np.ndarray, ...], list[dict]]
+        The concatenated solution and, per period, its start, stop, solve
+        time, objective and end buffer.
+    """
+    parts = []
+    stats = []
+    warm_start = None
+    carried = None
+    for period in range(len(indexes) - 1):
+        start, stop = indexes[period], indexes[period + 1]
+        end = min(stop + lookahead, indexes[-1])
+        t0 = time.perf_counter()
+        if carry is None:
+            solution = solve(start, end, buffer, warm_start)
+        else:
+            if parts:
+                carried = carry(*(np.concatenate(arrays) for arrays in zip(*parts)))
+            solution = solve(start, end, buffer, warm_start, carried)
+        seconds = time.perf_counter() - t0
+
+        kept = tuple(np.asarray(x)[:stop - start] for x in solution)
+        buffer = buffer + buffer_change(*kept)
+        value = objective(*kept)
+        parts.append(kept)
+        stats.append({'period': period, 'start': start, 'stop': stop, 'seconds': seconds,
+                      'objective': value, 'end_buffer': buffer})
+        log(f"period {period}: solved in {seconds:.1f} s, objective {value:.5e}, end buffer {buffer:.5e}")
+
+        warm_start = None
+        if period + 2 < len(indexes) and end > stop:
+            length = min(indexes[period + 2] + lookahead, indexes[-1]) - stop
+            warm_start = []
+            for i, x in enumerate(solution):
+                padded = np.full(length, 1.0 if i == idle else 0.0)
+                tail = np.asarray(x, dtype=np.float64)[stop - start:]
+                padded[:len(tail)] = tail
+                warm_start.append(padded)
+            warm_start = tuple(warm_start)
+
+    solution = tuple(np.concatenate(arrays) for arrays in zip(*parts))
+    return solution, stats
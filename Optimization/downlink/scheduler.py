@@ -0,0 +1,190 @@
+import numpy as np
+from numba import njit
+
+IDLE = 0
+SCIENCE = 1
+DOWNLINK = 2
+GATEWAY = 3
+
+@njit
+def _grow(arr, size):
+    out = np.empty(max(size, 2 * arr.shape[0]), dtype=arr.dtype)
+    out[:arr.shape[0]] = arr
+    return out
+
+@njit
+def _step(front_d, front_s, som_t, los_t, Rsc, Rdl, buffer_size, buffer, N):
+    """
+    One time step of the Pareto frontier of (downlinks, science) counts.
+
+    Returns the new frontier, sorted from the most downlinks down, with the
+    position of the parent of each state in the old frontier and the action
+    leading to it.
+    """
+    size = front_d.shape[0]
+    cand_d = np.empty(3 * size, dtype=np.int64)
+    cand_s = np.empty(3 * size, dtype=np.int64)
+    cand_parent = np.empty(3 * size, dtype=np.int64)
+    cand_action = np.empty(3 * size, dtype=np.int8)
+    n_cand = 0
+    for p in range(size):
+        d = front_d[p]
+        s = front_s[p]
+        level = buffer + s * Rsc - d * Rdl
+        cand_d[n_cand] = d
+        cand_s[n_cand] = s
+        cand_parent[n_cand] = p
+        cand_action[n_cand] = IDLE
+        n_cand += 1
+        if som_t and level + Rsc <= buffer_size:
+            cand_d[n_cand] = d
+            cand_s[n_cand] = s + 1
+            cand_parent[n_cand] = p
+            cand_action[n_cand] = SCIENCE
+            n_cand += 1
+        if los_t and level - Rdl >= 0:
+            cand_d[n_cand] = d + 1
+            cand_s[n_cand] = s
+            cand_parent[n_cand] = p
+            cand_action[n_cand] = DOWNLINK
+            n_cand += 1
+
+    # Keep the Pareto frontier, scanning from the most downlinks down
+    order = np.argsort(-(cand_d[:n_cand] * (N + 2) + cand_s[:n_cand]))
+    keep = np.empty(n_cand, dtype=np.int64)
+    n_keep = 0
+    best_s = -1
+    for o in order:
+        if cand_s[o] > best_s:
+            keep[n_keep] = o
+            n_keep += 1
+            best_s = cand_s[o]
+    keep = keep[:n_keep]
+    return cand_d[keep], cand_s[keep], cand_parent[keep], cand_action[keep]
+
+@njit
+def _schedule_raw(som, los, Rsc, Rdl, buffer_size, buffer, checkpoint):
+    """
+    Dynamic program over the Pareto frontier of (downlinks, science) counts.
+
+    At a given time step, a state with more downlinks or more science is
+    never worse: the extra science can be skipped later and the extra
+    downlink replaces the next one. Only the states that are not dominated
+    in both counts are kept, and since the buffer level of every kept state
+    lies in [0, buffer_size] the frontier holds at most
+    buffer_size / Rdl + 1 states.
+
+    Keeping the back-pointers of every state of every step would take the
+    horizon times the frontier size, gigabytes for a year with a small Rdl.
+    The forward pass only stores the frontier every `checkpoint` steps, and
+    the backtrack recomputes one segment between checkpoints at a time from
+    the last segment to the first, keeping the back-pointers of that segment
+    only.
+
+    Returns the actions and the peak number of states held in memory.
+    """
+    N = som.shape[0]
+    actions = np.zeros(N, dtype=np.int8)
+    if N == 0:
+        return actions, 0
+    n_check = (N + checkpoint - 1) // checkpoint
+    check_start = np.empty(n_check + 1, dtype=np.int64)
+    check_d = np.empty(16, dtype=np.int64)
+    check_s = np.empty(16, dtype=np.int64)
+    n_stored = 0
+
+    front_d = np.zeros(1, dtype=np.int64)
+    front_s = np.zeros(1, dtype=np.int64)
+    for t in range(N):
+        if t % checkpoint == 0:
+            size = front_d.shape[0]
+            if n_stored + size > check_d.shape[0]:
+                check_d = _grow(check_d, n_stored + size)
+                check_s = _grow(check_s, n_stored + size)
+            check_start[t // checkpoint] = n_stored
+            check_d[n_stored:n_stored + size] = front_d
+            check_s[n_stored:n_stored + size] = front_s
+            n_stored += size
+        front_d, front_s, parent, action = _step(front_d, front_s, som[t], los[t],
+                                                 Rsc, Rdl, buffer_size, buffer, N)
+    check_start[n_check] = n_stored
+
+    # The first state of the last frontier has the most downlinks
+    target_d = front_d[0]
+    target_s = front_s[0]
+    peak = n_stored
+    hist_parent = np.empty(16, dtype=np.int64)
+    hist_action = np.empty(16, dtype=np.int8)
+    for c in range(n_check - 1, -1, -1):
+        t0 = c * checkpoint
+        t1 = min(N, t0 + checkpoint)
+        front_d = check_d[check_start[c]:check_start[c + 1]].copy()
+        front_s = check_s[check_start[c]:check_start[c + 1]].copy()
+        offsets = np.empty(t1 - t0, dtype=np.int64)
+        n_hist = 0
+        for t in range(t0, t1):
+            front_d, front_s, parent, action = _step(front_d, front_s, som[t], los[t],
+                                                     Rsc, Rdl, buffer_size, buffer, N)
+            size = front_d.shape[0]
+            if n_hist + size > hist_parent.shape[0]:
+                hist_parent = _grow(hist_parent, n_hist + size)
+                hist_action = _grow(hist_action, n_hist + size)
+            offsets[t - t0] = n_hist
+            hist_parent[n_hist:n_hist + size] = parent
+            hist_action[n_hist:n_hist + size] = action
+            n_hist += size
+        peak = max(peak, n_stored + n_hist)
+
+        # The recomputed frontier holds the state the later segment starts from
+        k = 0
+        while front_d[k] != target_d or front_s[k] != target_s:
+            k += 1
+        for t in range(t1 - 1, t0 - 1, -1):
+            actions[t] = hist_action[offsets[t - t0] + k]
+            k = hist_parent[offsets[t - t0] + k]
+        target_d = check_d[check_start[c] + k]
+        target_s = check_s[check_start[c] + k]
+    return actions, peak
+
+def schedule_raw(som, los, Rsc:float, Rdl:float, buffer_size:float, buffer:float = 0, checkpoint:int = None):
+    """
+    Solves the raw science/downlink/idle problem exactly without a MILP solver.
+
+    This is the formulation of `optimization_raw.py`: at every time step the
+    spacecraft does science (only in sunlight), downlinks (only with LOS) or
+    idles, the buffer must stay within [0, buffer_size], and the total
+    downlink is maximised.
+
+    Parameters
+    ----------
+    som : np.ndarray
+        True where science is possible.
+    los : np.ndarray
+        True where downlink is possible.
+    Rsc : float
+        The data gathered per science time step.
+    Rdl : float
+        The data sent per downlink time step.
+    buffer_size : float
+        The capacity of the buffer.
+    buffer : float
+        The data in the buffer before the first time step.
+    checkpoint : int, optional
+        The steps between stored frontiers, the square root of the horizon
+        by default, which bounds the memory by about twice the square root
+        of the horizon times the frontier size.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, np.ndarray]
+        T_sc, T_dl and T_idle as 0/1 float arrays, like the MILP solution.
+    """
+    som = np.asarray(som, dtype=np.bool_)
+    if checkpoint is None:
+        checkpoint = int(np.sqrt(som.shape[0])) + 1
+    actions, peak = _schedule_raw(som, np.asarray(los, dtype=np.bool_),
+                                  float(Rsc), float(Rdl), float(buffer_size), float(buffer), int(checkpoint))
+    T_sc = (actions == SCIENCE).astype(np.float64)
+    T_dl = (actions == DOWNLINK).astype(np.float64)
+    T_idle = (actions == IDLE).astype(np.float64)
+    return T_sc, T_dl, T_idle
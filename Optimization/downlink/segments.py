@@ -0,0 +1,284 @@
+import cvxpy as cp
+import numpy as np
+from numba import njit
+
+from .scheduler import IDLE, SCIENCE, DOWNLINK, GATEWAY
+from .heuristic import heuristic, gap
+
+def compress(som, los, gw_los=None):
+    """
+    Splits the horizon into segments where the inputs do not change.
+
+    Parameters
+    ----------
+    som : np.ndarray
+        True where science is possible.
+    los : np.ndarray
+        True where ground station downlink is possible.
+    gw_los : np.ndarray, optional
+        True where gateway downlink is possible.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+        The start and length of every segment and the value of som, los
+        and gw_los in it.
+    """
+    som = np.asarray(som, dtype=bool)
+    los = np.asarray(los, dtype=bool)
+    gw_los = np.zeros_like(som) if gw_los is None else np.asarray(gw_los, dtype=bool)
+    changed = (som[1:] != som[:-1]) | (los[1:] != los[:-1]) | (gw_los[1:] != gw_los[:-1])
+    starts = np.concatenate(([0], np.flatnonzero(changed) + 1))
+    lengths = np.diff(np.append(starts, len(som)))
+    return starts, lengths, som[starts], los[starts], gw_los[starts]
+
+@njit
+def _expand(starts, lengths, n_sc, n_dl, n_gw, buffer, buffer_size, Rsc, Rdl, Rgw, M, N, booked, open_end):
+    actions = np.zeros(N, dtype=np.int8)
+    level = buffer
+    for k in range(starts.shape[0]):
+        sc = n_sc[k]
+        dl = n_dl[k]
+        gw = n_gw[k]
+        # Does science first while it fits and keeps a started downlink
+        # going, so the downlink minutes of a segment stay together
+        sending = False
+        for t in range(starts[k], starts[k] + lengths[k]):
+            if sending and dl > 0 and level >= Rdl:
+                actions[t] = DOWNLINK
+                level -= Rdl
+                dl -= 1
+            elif sc > 0 and level + Rsc <= buffer_size:
+                actions[t] = SCIENCE
+                level += Rsc
+                sc -= 1
+                sending = False
+            elif dl > 0 and level >= Rdl:
+                actions[t] = DOWNLINK
+                level -= Rdl
+                dl -= 1
+                sending = True
+            elif gw > 0 and level >= Rgw:
+                actions[t] = GATEWAY
+                level -= Rgw
+                gw -= 1
+
+    # Books M minute passes covering all ground station downlinks after
+    # the pass carried over
+    T_gs = np.zeros(N, dtype=np.bool_)
+    T_gs[:booked] = True
+    t = booked
+    while t < N:
+        if actions[t] == DOWNLINK:
+            if t + M > N and not open_end:
+                # The pass may not be cut by the end, it starts at the last
+                # minute leaving room for it, or the downlinks are dropped
+                if N >= M:
+                    T_gs[N - M:] = True
+                else:
+                    for u in range(t, N):
+                        if actions[u] == DOWNLINK:
+                            actions[u] = IDLE
+                break
+            T_gs[t:t + M] = True
+            t += M
+        else:
+            t += 1
+    return actions, T_gs
+
+@njit
+def _unprofitable(actions, T_gs, booked, share):
+    # Marks the downlinks of the passes booked by `_expand` that send in
+    # less than a share of their minutes, the carried pass is paid for
+    N = actions.shape[0]
+    marked = np.zeros(N, dtype=np.bool_)
+    t = 0
+    while t < N:
+        if T_gs[t]:
+            stop = t
+            while stop < N and T_gs[stop]:
+                stop += 1
+            sent = 0
+            for u in range(t, stop):
+                if actions[u] == DOWNLINK:
+                    sent += 1
+            if sent < share * (stop - t) and not (t == 0 and booked > 0):
+                for u in range(t, stop):
+                    if actions[u] == DOWNLINK:
+                        marked[u] = True
+            t = stop
+        else:
+            t += 1
+    return marked
+
+def optimize_segments(som, los, gw_los, buffer:float, buffer_size:float,
+                      Rsc:float, Rdl:float, Rgw:float, M:int, rho:float,
+                      c1:float, c2:float = None, solver=cp.GUROBI, threads:int = None,
+                      booked:int = 0, open_end:bool = False):
+    """
+    Approximates the ground station (and gateway) problem on the compressed
+    horizon.
+
+    Instead of one boolean per minute and decision, every segment from
+    `compress` gets an integer number of science, ground station and
+    gateway minutes and an integer number of M minute ground station
+    passes. The buffer is only checked at segment ends; inside a segment
+    the minutes can always be ordered to keep the buffer in bounds as long
+    as `buffer_size >= Rsc + max(Rdl, Rgw)`.
+
+    This is not the minute model. Passes are counted per segment, so a
+    pass never serves two segments in the model, while the expansion books
+    M minute passes over the actual downlink minutes, which may cross
+    segments or need more passes than the model counted. The expanded
+    schedule is feasible, but its objective can differ from the model
+    objective and from the minute optimum, so both are printed.
+
+    The downlinks of the first `booked` minutes need no pass, they are
+    covered by a pass carried over. Unless `open_end` is set, a pass the
+    expansion would cut at the end is moved back to start at N-M, see
+    `downlink.modules.feasible_starts`.
+
+    Parameters
+    ----------
+    som, los : np.ndarray
+        The science and ground station masks per minute.
+    gw_los : np.ndarray or None
+        The gateway mask per minute, None for the ground station only problem.
+    buffer : float
+        The data in the buffer before the first minute.
+    buffer_size : float
+        The capacity of the buffer.
+    Rsc, Rdl, Rgw : float
+        The science, ground station and gateway data per minute.
+    M : int
+        The length of a ground station pass in minutes.
+    rho : float
+        The price of booked ground station time relative to its downlink.
+    c1, c2 : float
+        The cost weights of ground station and gateway downlink.
+    solver : str
+        The cvxpy solver, Gurobi gets the same time limit as the minute model.
+    threads : int, optional
+        The threads Gurobi may use, all cores by default.
+    booked : int
+        The minutes of a pass carried over from before the first minute.
+    open_end : bool
+        Whether a pass may be cut by the end of the horizon.
+
+    Returns
+    -------
+    tuple[np.ndarray, ...]
+        T_sc, T_dl, T_gw, T_idle and T_gs per minute as 0/1 arrays.
+    """
+    solution, value = _segments(som, los, gw_los, buffer, buffer_size, Rsc, Rdl, Rgw, M, rho, c1, c2,
+                                solver, threads, False, booked, open_end)
+    return solution
+
+def relax_segments(som, los, gw_los, buffer:float, buffer_size:float,
+                   Rsc:float, Rdl:float, Rgw:float, M:int, rho:float,
+                   c1:float, c2:float = None, solver=cp.HIGHS, booked:int = 0, open_end:bool = False):
+    """
+    Solves the LP relaxation of `optimize_segments` and rounds it.
+
+    The counts of the relaxation are rounded to whole minutes and expanded
+    like the MILP solution, which keeps the buffer in bounds and books
+    whole M minute passes over the downlinks. The relaxation prices
+    passes per downlink minute, so the expansion can book passes that
+    cost more than they send; the downlinks of such segments are dropped
+    and the counts expanded again until every pass pays off. The LP needs
+    no integer solver and takes a fraction of a second for a month.
+
+    The relaxation is also a relaxation of the minute model: its buffer is
+    only checked at segment ends and its passes are priced per downlink
+    minute. Its objective is therefore an upper bound for both.
+
+    Parameters
+    ----------
+    som, los, gw_los, buffer, buffer_size, Rsc, Rdl, Rgw, M, rho, c1, c2
+        See `optimize_segments`.
+    solver : str
+        The cvxpy LP solver.
+    booked, open_end
+        See `optimize_segments`.
+
+    Returns
+    -------
+    tuple
+        T_sc, T_dl, T_gw, T_idle and T_gs per minute as 0/1 arrays, and
+        the LP bound.
+    """
+    return _segments(som, los, gw_los, buffer, buffer_size, Rsc, Rdl, Rgw, M, rho, c1, c2,
+                     solver, None, True, booked, open_end)
+
+def _segments(som, los, gw_los, buffer, buffer_size, Rsc, Rdl, Rgw, M, rho, c1, c2, solver, threads, relaxed,
+              booked, open_end):
+    if buffer_size < Rsc + max(Rdl, Rgw):
+        raise ValueError("The buffer must hold at least one minute of science and downlink")
+    starts, lengths, som_k, los_k, gw_k = compress(som, los, gw_los)
+    K = len(starts)
+    booked = min(int(booked), len(som))
+    # The minutes of every segment inside the pass carried over
+    free = np.clip(booked - starts, 0, lengths)
+    # Data is counted in units of the largest rate to keep the model well scaled
+    unit = max(Rsc, Rdl, Rgw)
+
+    n_sc = cp.Variable(K, integer=not relaxed)
+    n_dl = cp.Variable(K, integer=not relaxed)
+    n_gw = cp.Variable(K, integer=not relaxed)
+    passes = cp.Variable(K, integer=not relaxed)
+    level = buffer/unit + cp.cumsum(n_sc*(Rsc/unit) - n_dl*(Rdl/unit) - n_gw*(Rgw/unit))
+
+    constraints = [n_sc >= 0, n_dl >= 0, n_gw >= 0, passes >= 0]
+    constraints += [n_sc <= lengths*som_k]
+    constraints += [n_dl <= lengths*los_k]
+    constraints += [n_gw <= lengths*gw_k]
+    constraints += [n_sc + n_dl + n_gw <= lengths]
+    constraints += [n_dl <= M*passes + free]
+    constraints += [level <= buffer_size/unit, level >= 0]
+
+    dl_total = cp.sum(n_dl)*(Rdl/unit)
+    gw_total = cp.sum(n_gw)*(Rgw/unit)
+    gs_total = (cp.sum(passes)*M + booked)*(Rdl/unit)
+    objective = (1/c1)*(dl_total - rho*gs_total)
+    if c2 is not None:
+        objective += (1/c2)*gw_total
+
+    problem = cp.Problem(cp.Maximize(objective), constraints)
+
+    # The heuristic schedule is feasible for the segments too, as a start solution
+    start = heuristic(som, los, gw_los, buffer, buffer_size, Rsc, Rdl, Rgw, M, rho, c1, c2, booked, open_end)
+    n_sc.value = np.add.reduceat(start[0], starts)
+    n_dl.value = np.add.reduceat(start[1], starts)
+    n_gw.value = np.add.reduceat(start[2], starts)
+    passes.value = np.ceil(np.maximum(n_dl.value - free, 0) / M)
+    start_value = objective.value*unit
+    if solver == cp.GUROBI:
+        solver_opts = {} if threads is None else {"Threads": threads}
+        problem.solve(solver=cp.GUROBI, verbose=False, TimeLimit=7200, warm_start=True, **solver_opts)
+    else:
+        problem.solve(solver=solver, verbose=False, warm_start=True)
+    print("Status:", problem.status)
+    print(f"Segments: {K} for {len(som)} minutes")
+    print("Total cost (timeslots slots used):", problem.value*unit)
+    print(f"Start solution: {start_value}, gap: {gap(start_value, problem.value*unit):.2%}")
+
+    counts = [np.rint(n.value).astype(np.int64) for n in (n_sc, n_dl, n_gw)]
+    while True:
+        actions, T_gs = _expand(starts, lengths, *counts, float(buffer), float(buffer_size),
+                                float(Rsc), float(Rdl), float(Rgw), int(M), len(som), booked, bool(open_end))
+        if not relaxed:
+            break
+        dropped = np.flatnonzero(_unprofitable(actions, T_gs, booked, float(rho)))
+        if len(dropped) == 0:
+            break
+        counts[1][np.searchsorted(starts, dropped, side="right") - 1] = 0
+    T_sc = (actions == SCIENCE).astype(np.float64)
+    T_dl = (actions == DOWNLINK).astype(np.float64)
+    T_gw = (actions == GATEWAY).astype(np.float64)
+    T_idle = (actions == IDLE).astype(np.float64)
+    # The objective of the minute model for the expanded schedule
+    expanded = (np.sum(T_dl)*Rdl - rho*np.sum(T_gs)*Rdl)/c1
+    if c2 is not None:
+        expanded += np.sum(T_gw)*Rgw/c2
+    print(f"Expanded objective: {expanded}, model objective: {problem.value*unit}")
+    return (T_sc, T_dl, T_gw, T_idle, T_gs.astype(np.float64)), problem.value*unit
@@ -0,0 +1,131 @@
+import numpy as np
+from numba import njit, prange
+
+# The totals of a simulation, in the order the kernel returns them
+TOTALS = ['delivered', 'delivered_gw', 'lost', 'overflow', 'overflow_events',
+          'dl_minutes', 'outage_minutes', 'gw_minutes', 'gs_minutes', 'cost', 'end_level']
+COUNTS = {'overflow_events', 'dl_minutes', 'outage_minutes', 'gw_minutes', 'gs_minutes'}
+
+@njit(parallel=True)
+def _simulate(T_sc, T_dl, T_gw, T_gs, ok, Rsc, Rdl, Rgw, buffer, buffer_size, c1, c2, level, totals):
+    B, N = T_sc.shape
+    keep = level.shape[1] > 0
+    for b in prange(B):
+        current = buffer
+        delivered = 0.0
+        delivered_gw = 0.0
+        lost = 0.0
+        overflow = 0.0
+        events = 0
+        dl = 0
+        outage = 0
+        gw = 0
+        gs = 0
+        for t in range(N):
+            if T_sc[b, t]:
+                current += Rsc[t]
+                # Science that does not fit in the buffer is dropped
+                if current > buffer_size:
+                    overflow += current - buffer_size
+                    events += 1
+                    current = buffer_size
+            if T_dl[b, t]:
+                dl += 1
+                if ok[b, t]:
+                    sent = min(Rdl[t], current)
+                    delivered += sent
+                    current -= sent
+                else:
+                    outage += 1
+                    lost += Rdl[t]
+            if T_gw[b, t]:
+                gw += 1
+                sent = min(Rgw[t], current)
+                delivered_gw += sent
+                current -= sent
+            if T_gs[b, t]:
+                gs += 1
+            if keep:
+                level[b, t] = current
+        totals[b, 0] = delivered
+        totals[b, 1] = delivered_gw
+        totals[b, 2] = lost
+        totals[b, 3] = overflow
+        totals[b, 4] = events
+        totals[b, 5] = dl
+        totals[b, 6] = outage
+        totals[b, 7] = gw
+        totals[b, 8] = gs
+        totals[b, 9] = c1*gs + c2*gw
+        totals[b, 10] = current
+
+def _mask(value, shape):
+    # A 0/1 array as booleans broadcast to the batch, without copying booleans
+    value = np.asarray(value)
+    if value.dtype != np.bool_:
+        value = value > 0.5
+    return np.broadcast_to(value, shape)
+
+def simulate(T_sc, T_dl, T_gw = None, T_gs = None, ok = None, Rsc = 0.0, Rdl = 0.0, Rgw = 0.0,
+             buffer:float = 0, buffer_size:float = np.inf, c1:float = 0, c2:float = 0,
+             trajectory:bool = True) -> dict:
+    """
+    Plays out schedules minute by minute with outages and a finite buffer.
+
+    Science that does not fit in the buffer is dropped as overflow,
+    downlink minutes in an outage send nothing and every minute sends at
+    most what is in the buffer. One call can score a batch: every array
+    argument may be a single minute array or a (batch, minutes) array,
+    e.g. one schedule against many outage realizations.
+
+    Parameters
+    ----------
+    T_sc, T_dl : np.ndarray
+        The science and ground station downlink minutes as 0/1 arrays.
+    T_gw, T_gs : np.ndarray, optional
+        The gateway and booked ground station minutes, none by default.
+    ok : np.ndarray, optional
+        Whether a ground station downlink gets through per minute, e.g.
+        outage_los of the data, always by default.
+    Rsc, Rdl, Rgw : float or np.ndarray
+        The science, ground station and gateway data per minute, constant
+        or per minute.
+    buffer : float
+        The data in the buffer before the first minute.
+    buffer_size : float
+        The capacity of the buffer.
+    c1, c2 : float
+        The cost per booked ground station and gateway minute.
+    trajectory : bool
+        Whether to return the buffer level per minute.
+
+    Returns
+    -------
+    dict
+        The totals 'delivered' and 'delivered_gw' (data sent), 'lost'
+        (data planned in outages), 'overflow' and 'overflow_events'
+        (dropped science and the minutes it happened in), the minute
+        counts 'dl_minutes', 'outage_minutes', 'gw_minutes' and
+        'gs_minutes', 'cost' and 'end_level', plus 'level' per minute
+        with `trajectory`. The totals are numbers for a single schedule
+        and arrays over the batch otherwise.
+    """
+    arrays = [T_sc, T_dl, T_gw, T_gs, ok]
+    shape = np.broadcast_shapes(*[np.shape(value) for value in arrays if value is not None])
+    batch = len(shape) == 2
+    shape = shape if batch else (1,) + shape
+    N = shape[1]
+    masks = [_mask(value if value is not None else default, shape)
+             for value, default in zip(arrays, [False, False, False, False, True])]
+    rates = [np.broadcast_to(np.asarray(rate, dtype=np.float64), (N,)) for rate in [Rsc, Rdl, Rgw]]
+    level = np.empty((shape[0], N if trajectory else 0))
+    totals = np.empty((shape[0], len(TOTALS)))
+    _simulate(*masks, *rates, float(buffer), float(buffer_size), float(c1), float(c2), level, totals)
+
+    results = {}
+    for i, name in enumerate(TOTALS):
+        column = totals[:, i].astype(np.int64) if name in COUNTS else totals[:, i]
+        results[name] = column if batch else column[0].item()
+    if trajectory:
+        results['level'] = level if batch else level[0]
+    return results
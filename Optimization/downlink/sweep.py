@@ -0,0 +1,66 @@
+import os
+import traceback
+import multiprocessing
+
+THREAD_VARIABLES = ["OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMBA_NUM_THREADS"]
+
+def _run(args):
+    worker, job, threads = args
+    try:
+        return job, worker(job, threads), None
+    except Exception:
+        return job, None, traceback.format_exc()
+
+def run_sweep(worker, jobs:list, threads:int = 1, cores:int = None, on_result = None) -> list:
+    """
+    Runs independent solves in a process pool.
+
+    Every job is run as worker(job, threads) in its own process, with at
+    most `cores // threads` processes at once. The workers are started
+    with the common thread count variables set to `threads`, and the
+    worker should pass `threads` on to its solver. A job that raises does
+    not stop the others; its error is returned instead of a result.
+
+    Parameters
+    ----------
+    worker : callable
+        A module level function worker(job, threads) returning the result.
+    jobs : list
+        The picklable job descriptions.
+    threads : int
+        The threads each solve may use.
+    cores : int, optional
+        The total number of cores to use, all cores by default.
+    on_result : callable, optional
+        on_result(job, result, error) called in this process as soon as a
+        job finishes, e.g. to write its result.
+
+    Returns
+    -------
+    list[tuple]
+        (job, result, error) for every job in the order they finished,
+        error is None or the traceback of the failed job.
+    """
+    if cores is None:
+        cores = os.cpu_count()
+    processes = max(1, min(len(jobs), cores // threads))
+
+    # The workers are spawned, so they pick up the limits before importing
+    # any numerical library
+    environ = {var: os.environ.get(var) for var in THREAD_VARIABLES}
+    for var in THREAD_VARIABLES:
+        os.environ[var] = str(threads)
+    results = []
+    try:
+        with multiprocessing.get_context("spawn").Pool(processes) as pool:
+            for job, result, error in pool.imap_unordered(_run, [(worker, job, threads) for job in jobs]):
+                if on_result is not None:
+                    on_result(job, result, error)
+                results.append((job, result, error))
+    finally:
+        for var, value in environ.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+    return results
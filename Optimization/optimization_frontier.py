@@ -0,0 +1,70 @@
+import os
+import datetime
+import numpy as np
+import matplotlib
+from matplotlib.figure import Figure
+from downlink.optimizer import DownlinkOptimizer
+from downlink.frontier import trace_frontier
+from downlink.sweep import run_sweep
+from downlink.plots import save_figure
+
+results_folder="./Optimization/final_results/frontier"
+
+def log(msg):
+    print(f"[{datetime.datetime.now()}] {msg}")
+
+def run(job, threads):
+    """
+    Traces the frontier of one station over one month and saves it.
+    """
+    data_folder, month = job
+    station = os.path.basename(data_folder).split("_")[1]
+    M=60
+    c1 = 1
+    if station=="AAU":
+        M=30
+        c1=0.1
+    buffersizes=[b*1e9*8 for b in [125, 250, 500]]
+    science_scales=[0.5, 1, 1.5] # of the science rate of the data
+    mode="relaxed" # "minute" for the full MILP, at many times the cost
+
+    optimizer=DownlinkOptimizer(M, buffersizes[0])
+    optimizer.threads = threads
+    data=optimizer.load_data("Optimization/"+data_folder)
+    optimizer.setup(data['Rsc'], data['Rdl'], rho=0, c1=c1)
+    indexes=optimizer.split_data(data['los'])[month:month + 2]
+    log(f"Tracing {station}, month {month}: {indexes}")
+
+    frontier=trace_frontier(optimizer, data, indexes, buffersizes, [s*data['Rsc'] for s in science_scales],
+                            rhos=(0, 1), mode=mode)
+    log(f"{len(frontier)} points, {np.sum(frontier['pareto'])} on the frontier")
+
+    os.makedirs(results_folder, exist_ok=True)
+    name=f"frontier_{station}_{month}"
+    np.save(os.path.join(results_folder, name + ".npy"), frontier, allow_pickle=False)
+
+    front=frontier[frontier['pareto']]
+    with matplotlib.rc_context({'font.size': 15}):
+        fig=Figure()
+        ax=fig.subplots()
+        for buffersize in np.unique(front['buffersize']):
+            points=np.sort(front[front['buffersize'] == buffersize], order='gs_minutes')
+            ax.plot(points['gs_minutes']/60, points['delivered']/1e9, marker='o',
+                    label=f"Buffer {buffersize/8e9:.0f} GB")
+        ax.set_xlabel("Booked ground station time [h]")
+        ax.set_ylabel("Delivered data [Gb]")
+        ax.legend(loc="lower right")
+        save_figure(fig, [os.path.join(results_folder, name + ".pdf")])
+    return name
+
+if __name__=="__main__":
+    log("starting...")
+    data_folders = ['station_NN11_rate_404820636', 'station_AAU_rate_59677090']
+    months=[0]
+    threads=4 # per solve
+    cores=None # all cores
+    jobs=[(data_folder, month) for data_folder in data_folders for month in months]
+    for job, name, error in run_sweep(run, jobs, threads, cores):
+        if error is not None:
+            log(f"Failed {job}:\n{error}")
+    log("Done for frontier")
@@ -0,0 +1,53 @@
+import io
+import contextlib
+import unittest
+import numpy as np
+from downlink.frontier import pareto, trace_frontier
+from downlink.optimizer import DownlinkOptimizer
+
+try:
+    import cvxpy as cp
+    HAS_HIGHS = "HIGHS" in cp.installed_solvers()
+except ImportError:
+    HAS_HIGHS = False
+
+class TestFrontier(unittest.TestCase):
+    def __init__(self, methodName = "runTest"):
+        super().__init__(methodName)
+        t = np.arange(1000)
+        self.data = {'som': np.sin(2*np.pi*t/300) > -0.3, 'los': np.sin(2*np.pi*t/250) > 0.3, 'gw_los': None,
+                     'Rsc': 1.0, 'Rdl': 6.0, 'Rgw': None}
+
+    # Test cases for "pareto" function
+    def test_pareto(self):
+        delivered = [10, 8, 10, 12, 10]
+        gs_minutes = [5, 5, 4, 9, 4]
+        buffersize = [1, 1, 1, 1, 2]
+        np.testing.assert_array_equal(pareto(delivered, gs_minutes, buffersize), [False, False, True, True, False])
+        # Equal points do not dominate each other
+        np.testing.assert_array_equal(pareto([1, 1], [2, 2], [3, 3]), [True, True])
+
+    # Test cases for "trace_frontier" function
+    @unittest.skipIf(not HAS_HIGHS, "requires cvxpy with HiGHS")
+    def test_trace(self):
+        optimizer = DownlinkOptimizer(10, 50.0)
+        optimizer.setup(1.0, 6.0, rho=0, c1=1.0)
+        depth = 3
+        with contextlib.redirect_stdout(io.StringIO()):
+            frontier = trace_frontier(optimizer, self.data, [0, 1000], [50.0, 100.0], [1.0, 1.5], depth=depth)
+        # Fewer solves than the full grid of every curve
+        self.assertLess(len(frontier), 4*(2**depth + 1))
+        self.assertEqual(optimizer.buffersize, 50.0)
+        for buffersize in [50.0, 100.0]:
+            for Rsc in [1.0, 1.5]:
+                curve = np.sort(frontier[(frontier['buffersize'] == buffersize) & (frontier['Rsc'] == Rsc)], order='rho')
+                self.assertEqual(curve['rho'][0], 0.0)
+                self.assertEqual(curve['rho'][-1], 1.0)
+                # A higher price for booked time never raises the objective
+                self.assertTrue(np.all(np.diff(curve['objective']) <= 1e-6))
+        front = frontier[frontier['pareto']]
+        self.assertGreater(len(front), 0)
+        np.testing.assert_array_equal(pareto(front['delivered'], front['gs_minutes'], front['buffersize']), True)
+
+if __name__ == "__main__":
+    unittest.main()
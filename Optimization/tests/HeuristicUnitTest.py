@@ -0,0 +1,46 @@
+import unittest
+import numpy as np
+from downlink.heuristic import heuristic, gap
+from downlink.model import MinuteModel
+from downlink.modules import Gateway, Passes, PassCost
+
+class TestHeuristic(unittest.TestCase):
+    def __init__(self, methodName = "runTest"):
+        super().__init__(methodName)
+        t = np.arange(600)
+        self.som = np.sin(2*np.pi*t/150) > -0.3
+        self.los = np.sin(2*np.pi*t/100) > 0.3
+        self.gw_los = np.sin(2*np.pi*t/80) > 0
+
+    # Test cases for "heuristic" function
+    def test_feasible(self):
+        T_sc, T_dl, T_gw, T_idle, T_gs = heuristic(self.som, self.los, self.gw_los, 2.0, 60.0, 1.0, 6.0,
+                                                   2.0, 5, 0.2, 1.0, 2.0)
+        np.testing.assert_array_equal(T_sc + T_dl + T_gw + T_idle, 1)
+        self.assertTrue(np.all(T_sc <= self.som))
+        self.assertTrue(np.all(T_dl <= self.los))
+        self.assertTrue(np.all(T_gw <= self.gw_los))
+        self.assertTrue(np.all(T_dl <= T_gs))
+        level = 2.0 + np.cumsum(T_sc - 6.0*T_dl - 2.0*T_gw)
+        self.assertTrue(np.all((level >= 0) & (level <= 60.0)))
+        self.assertGreater(np.sum(T_dl), 0)
+        # Passes are booked as whole blocks of M minutes
+        edges = np.diff(np.concatenate(([0], T_gs, [0])))
+        lengths = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+        self.assertTrue(np.all(lengths % 5 == 0))
+
+    def test_start_solution(self):
+        model = MinuteModel(600, [Gateway(), Passes(5), PassCost()])
+        model.set(self.som, self.los, self.gw_los, 2.0, 60.0, 1.0, 6.0, 2.0, 0.2, 1.0, 2.0)
+        start = heuristic(self.som, self.los, self.gw_los, 2.0, 60.0, 1.0, 6.0, 2.0, 5, 0.2, 1.0, 2.0)
+        model.assign(start)
+        for constraint in model.problem.constraints:
+            self.assertLessEqual(np.max(constraint.violation()), 1e-9)
+        self.assertGreater(model.evaluate(start), 0)
+
+    def test_gap(self):
+        self.assertAlmostEqual(gap(80.0, 100.0), 0.2)
+        self.assertEqual(gap(0.0, 0.0), 0.0)
+
+if __name__ == "__main__":
+    unittest.main()
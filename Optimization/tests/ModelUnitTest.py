@@ -0,0 +1,144 @@
+import unittest
+import numpy as np
+from downlink.model import MinuteModel, get_model, MAX_MODELS, _models
+from downlink.modules import Gateway, Passes, PassCost, feasible_starts, valid_passes
+
+try:
+    import cvxpy as cp
+    HAS_HIGHS = "HIGHS" in cp.installed_solvers()
+except ImportError:
+    HAS_HIGHS = False
+
+class TestModel(unittest.TestCase):
+    def __init__(self, methodName = "runTest"):
+        super().__init__(methodName)
+        t = np.arange(40)
+        self.som = np.sin(2*np.pi*t/15) > -0.3
+        self.los = np.sin(2*np.pi*t/10) > 0.3
+        self.gw_los = np.sin(2*np.pi*t/8) > 0
+        self.gw = [Gateway(), Passes(5), PassCost()]
+        self.gs = [Passes(5), PassCost()]
+
+    # Test cases for "get_model" function
+    def test_cached(self):
+        self.assertIs(get_model(40, self.gw), get_model(40, [Gateway(), Passes(5), PassCost()]))
+        self.assertIsNot(get_model(40, self.gw), get_model(40, self.gs))
+        self.assertIsNot(get_model(40, self.gs), get_model(40, [Passes(6), PassCost()]))
+        self.assertIsNot(get_model(40, self.gs), get_model(40, [Passes(5, restrict=True), PassCost()]))
+
+    def test_bounded(self):
+        for N in range(50, 50 + 2*MAX_MODELS):
+            get_model(N, self.gs)
+        self.assertEqual(len(_models), MAX_MODELS)
+
+    def test_names(self):
+        self.assertEqual(get_model(40, self.gw).names, ['T_sc', 'T_dl', 'T_gw', 'T_idle', 'T_gs'])
+        self.assertEqual(get_model(40, self.gs).names, ['T_sc', 'T_dl', 'T_idle', 'T_gs'])
+        self.assertEqual(get_model(40).names, ['T_sc', 'T_dl', 'T_idle'])
+
+    def test_dpp(self):
+        self.assertTrue(get_model(40, self.gw).problem.is_dpp())
+        self.assertTrue(get_model(40, self.gs).problem.is_dpp())
+        self.assertTrue(get_model(40).problem.is_dpp())
+
+    # Test cases for "solve" method
+    @unittest.skipIf(not HAS_HIGHS, "requires cvxpy with HiGHS")
+    def test_reuse(self):
+        model = get_model(40, self.gw)
+        for buffer, rho in [(0.0, 0.5), (3.0, 0.2), (10.0, 0.8)]:
+            model.set(self.som, self.los, self.gw_los, buffer, 30.0, 1.0, 6.0, 2.0, rho, 1.0, 2.0)
+            model.solve(cp.HIGHS)
+            fresh = MinuteModel(40, self.gw)
+            fresh.set(self.som, self.los, self.gw_los, buffer, 30.0, 1.0, 6.0, 2.0, rho, 1.0, 2.0)
+            fresh.solve(cp.HIGHS)
+            self.assertAlmostEqual(model.problem.value, fresh.problem.value)
+
+    @unittest.skipIf(not HAS_HIGHS, "requires cvxpy with HiGHS")
+    def test_feasible(self):
+        model = get_model(40, self.gw)
+        model.set(self.som, self.los, self.gw_los, 2.0, 30.0, 1.0, 6.0, 2.0, 0.5, 1.0, 2.0)
+        T_sc, T_dl, T_gw, T_idle, T_gs = np.round(model.solve(cp.HIGHS))
+        np.testing.assert_array_equal(T_sc + T_dl + T_gw + T_idle, 1)
+        self.assertTrue(np.all(T_sc <= self.som))
+        self.assertTrue(np.all(T_dl <= self.los))
+        self.assertTrue(np.all(T_gw <= self.gw_los))
+        level = 2.0 + np.cumsum(T_sc - 6.0*T_dl - 2.0*T_gw)
+        self.assertTrue(np.all((level >= -1e-6) & (level <= 30.0 + 1e-6)))
+
+    @unittest.skipIf(not HAS_HIGHS, "requires cvxpy with HiGHS")
+    def test_pass_length(self):
+        # Booked time costs, so only the minimum length keeps passes from
+        # covering just the downlink minutes
+        model = get_model(40, self.gs)
+        model.set(self.som, self.los, None, 2.0, 30.0, 1.0, 6.0, None, 0.5, 1.0, None)
+        T_sc, T_dl, T_idle, T_gs = np.round(model.solve(cp.HIGHS))
+        self.assertGreater(np.sum(T_dl), 0)
+        self.assertTrue(np.all(T_dl <= T_gs))
+        edges = np.diff(np.concatenate(([0], T_gs, [0])))
+        starts, stops = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+        self.assertTrue(np.all((stops - starts >= 5) | (stops == 40)))
+
+    @unittest.skipIf(not HAS_HIGHS, "requires cvxpy with HiGHS")
+    def test_feasible_starts(self):
+        # Starting passes only with LOS loses nothing
+        restricted = MinuteModel(40, [Gateway(), Passes(5, restrict=True), PassCost()])
+        for buffer, rho in [(0.0, 0.5), (3.0, 0.2), (10.0, 0.8)]:
+            for model in [get_model(40, self.gw), restricted]:
+                model.set(self.som, self.los, self.gw_los, buffer, 30.0, 1.0, 6.0, 2.0, rho, 1.0, 2.0)
+                model.solve(cp.HIGHS)
+            self.assertAlmostEqual(restricted.problem.value, get_model(40, self.gw).problem.value)
+            T_gs = np.round(restricted.T_gs.value)
+            rising = np.flatnonzero(np.diff(np.concatenate(([0], T_gs))) == 1)
+            self.assertTrue(np.all(self.los[rising]))
+            mask = np.zeros(40)
+            mask[feasible_starts(self.los, 5)] = 1
+            np.testing.assert_array_equal(restricted.start_mask.value, mask)
+
+    @unittest.skipIf(not HAS_HIGHS, "requires cvxpy with HiGHS")
+    def test_closed_end(self):
+        # LOS only in the last M-1 minutes is reached by a pass from N-M
+        som = np.zeros(12)
+        som[:6] = 1
+        los = np.zeros(12)
+        los[9:] = 1
+        np.testing.assert_array_equal(feasible_starts(los, 4), [8])
+        np.testing.assert_array_equal(feasible_starts(los, 4, open_end=True), [9, 10, 11])
+        for restrict in [False, True]:
+            model = MinuteModel(12, [Passes(4, restrict=restrict), PassCost()])
+            model.set(som, los, None, 0.0, 100.0, 1.0, 1.0, None, 0.1, 1.0, None)
+            T_sc, T_dl, T_idle, T_gs = np.round(model.solve(cp.HIGHS))
+            self.assertAlmostEqual(model.problem.value, 2.6)
+            np.testing.assert_array_equal(T_gs, np.arange(12) >= 8)
+            self.assertTrue(valid_passes(T_gs, 4, los))
+
+    @unittest.skipIf(not HAS_HIGHS, "requires cvxpy with HiGHS")
+    def test_reuse_starts(self):
+        # One restricted model serves every LOS mask of its length
+        modules = [Passes(5, restrict=True), PassCost()]
+        model = get_model(40, modules)
+        for shift in [0, 3, 7]:
+            los = np.roll(self.los, shift)
+            self.assertIs(get_model(40, [Passes(5, restrict=True), PassCost()]), model)
+            model.set(self.som, los, None, 2.0, 30.0, 1.0, 6.0, None, 0.2, 1.0, None)
+            model.solve(cp.HIGHS)
+            fresh = MinuteModel(40, modules)
+            fresh.set(self.som, los, None, 2.0, 30.0, 1.0, 6.0, None, 0.2, 1.0, None)
+            fresh.solve(cp.HIGHS)
+            self.assertAlmostEqual(model.problem.value, fresh.problem.value)
+            self.assertTrue(valid_passes(np.round(model.T_gs.value), 5, los))
+
+    @unittest.skipIf(not HAS_HIGHS, "requires cvxpy with HiGHS")
+    def test_carried_pass(self):
+        # A pass carried over is booked without a start, and without an
+        # open end no pass is cut by the end of the horizon
+        model = MinuteModel(40, [Passes(5, restrict=True), PassCost()])
+        for booked, open_end in [(3, False), (0, True), (4, True)]:
+            model.set(self.som, self.los, None, 20.0, 30.0, 1.0, 6.0, None, 0.1, 1.0, None, booked, open_end)
+            T_sc, T_dl, T_idle, T_gs = np.round(model.solve(cp.HIGHS))
+            self.assertTrue(np.all(T_gs[:booked] == 1))
+            self.assertTrue(valid_passes(T_gs, 5, self.los, booked, open_end))
+            if not open_end:
+                self.assertTrue(valid_passes(T_gs, 5, self.los, booked))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import os
+import pickle
+import tempfile
+import unittest
+import numpy as np
+from downlink.data import load_data, save_dataset, open_dataset
+from downlink.optimizer import DownlinkOptimizer
+from downlink.modules import valid_passes
+
+try:
+    import cvxpy as cp
+    HAS_HIGHS = "HIGHS" in cp.installed_solvers()
+except ImportError:
+    HAS_HIGHS = False
+
+class TestOptimizer(unittest.TestCase):
+    def __init__(self, methodName = "runTest"):
+        super().__init__(methodName)
+        t = np.arange(120)
+        self.som = np.sin(2*np.pi*t/30) > -0.3
+        self.los = np.sin(2*np.pi*t/20) > 0.3
+        self.gw_los = np.sin(2*np.pi*t/16) > 0
+
+    # Test cases for "load_data" function
+    def test_load_data(self):
+        with tempfile.TemporaryDirectory() as folder:
+            for file, value in [('som', self.som), ('los', self.los), ('rs', 1.0), ('rd', 6.0)]:
+                with open(os.path.join(folder, file + '.pickle'), 'wb') as f:
+                    pickle.dump(value, f)
+            data = load_data(folder)
+            self.assertIs(load_data(folder), data)
+            self.assertIsNot(load_data(folder, cache=False), data)
+            np.testing.assert_array_equal(data['som'], self.som)
+            self.assertEqual(data['Rdl'], 6.0)
+            self.assertIsNone(data['gw_los'])
+
+    # Test cases for "save_dataset" and "open_dataset" functions
+    def test_dataset(self):
+        rates = np.linspace(0, 5, len(self.som))
+        with tempfile.TemporaryDirectory() as folder:
+            save_dataset(folder, {'som': self.som, 'los': self.los, 'rate': rates, 'Rsc': 1.0,
+                                  'Rdl': np.float64(6.0), 'gw_los': None})
+            data = load_data(folder, cache=False)
+            np.testing.assert_array_equal(data['som'], self.som)
+            np.testing.assert_array_equal(data['rate'], rates)
+            self.assertEqual(data['Rdl'], 6.0)
+            self.assertIsNone(data['gw_los'])
+            for name in ['som', 'los', 'rate']:
+                self.assertFalse(data[name].flags.writeable)
+            # A period is a view of the mapped file
+            period = open_dataset(folder, [30, 60])
+            np.testing.assert_array_equal(period['los'], self.los[30:60])
+            self.assertFalse(period['los'].flags.owndata)
+            with self.assertRaises(ValueError):
+                save_dataset(folder, {'som': self.som, 'los': self.los[:10]})
+
+    # Test cases for "DownlinkOptimizer" class
+    def test_names(self):
+        self.assertEqual(DownlinkOptimizer(5, 30.0, passes=False).names, ['T_sc', 'T_dl', 'T_idle'])
+        self.assertEqual(DownlinkOptimizer(5, 30.0).names, ['T_sc', 'T_dl', 'T_idle', 'T_gs'])
+        self.assertEqual(DownlinkOptimizer(5, 30.0, gateway=True).names, ['T_sc', 'T_dl', 'T_gw', 'T_idle', 'T_gs'])
+
+    @unittest.skipIf(not HAS_HIGHS, "requires cvxpy with HiGHS")
+    def test_raw_exact(self):
+        optimizer = DownlinkOptimizer(5, 30.0, passes=False)
+        optimizer.solver = cp.HIGHS
+        optimizer.setup(1.0, 6.0)
+        exact = optimizer.optimize(self.som, self.los, None, 2.0, mode="exact")
+        minute = optimizer.optimize(self.som, self.los, None, 2.0)
+        self.assertAlmostEqual(optimizer.objective(*minute), optimizer.objective(*exact))
+
+    @unittest.skipIf(not HAS_HIGHS, "requires cvxpy with HiGHS")
+    def test_modes(self):
+        optimizer = DownlinkOptimizer(5, 30.0, gateway=True)
+        optimizer.solver = cp.HIGHS
+        optimizer.setup(1.0, 6.0, 2.0, rho=0.2, c1=1.0, c2=2.0)
+        minute = optimizer.optimize(self.som, self.los, self.gw_los, 2.0)
+        segments = optimizer.optimize(self.som, self.los, self.gw_los, 2.0, mode="segments")
+        start = optimizer.start(self.som, self.los, self.gw_los, 2.0)
+        for solution in [minute, segments]:
+            self.assertEqual(len(solution), 5)
+            self.assertGreaterEqual(optimizer.objective(*solution) + 1e-6, optimizer.objective(*start))
+        T_sc, T_dl, T_gw, T_idle, T_gs = minute
+        self.assertAlmostEqual(optimizer.buffer_change(*minute), np.sum(T_sc) - 6.0*np.sum(T_dl) - 2.0*np.sum(T_gw))
+
+    @unittest.skipIf(not HAS_HIGHS, "requires cvxpy with HiGHS")
+    def test_relaxed(self):
+        optimizer = DownlinkOptimizer(5, 30.0)
+        optimizer.setup(1.0, 6.0, rho=0.2, c1=1.0)
+        solution = optimizer.optimize(self.som, self.los, None, 2.0, mode="relaxed")
+        start = optimizer.start(self.som, self.los, None, 2.0)
+        self.assertEqual(len(solution), 4)
+        self.assertGreaterEqual(optimizer.objective(*solution), optimizer.objective(*start))
+        self.assertGreaterEqual(optimizer.bound + 1e-6, optimizer.objective(*solution))
+        self.assertAlmostEqual(optimizer.gap, (optimizer.bound - optimizer.objective(*solution))/optimizer.bound)
+        self.assertTrue(optimizer.feasible(solution, self.som, self.los, None, 2.0))
+        # A warm start that empties the buffer never wins on its objective
+        T_dl = self.los.astype(np.float64)
+        greedy = (np.zeros(120), T_dl, 1 - T_dl, np.ones(120))
+        solution = optimizer.optimize(self.som, self.los, None, 2.0, mode="relaxed", warm_start=greedy)
+        self.assertIsNot(solution, greedy)
+        self.assertTrue(optimizer.feasible(solution, self.som, self.los, None, 2.0))
+
+    @unittest.skipIf(not HAS_HIGHS, "requires cvxpy with HiGHS")
+    def test_year_passes(self):
+        # Periods of 10 minutes with 5 minute passes, so passes cross the
+        # period ends and are continued in the next period
+        data = {'som': self.som, 'los': self.los, 'gw_los': None}
+        for mode, lookahead in [("minute", 0), ("minute", 15), ("relaxed", 0), ("segments", 5)]:
+            optimizer = DownlinkOptimizer(5, 30.0)
+            optimizer.solver = cp.HIGHS
+            optimizer.setup(1.0, 6.0, rho=0.2, c1=1.0)
+            solution, periods = optimizer.optimize_year(data, mode, 2.0, lookahead)
+            T_sc, T_dl, T_idle, T_gs = solution
+            self.assertGreater(np.sum(T_dl), 0)
+            self.assertTrue(valid_passes(T_gs, 5, self.los))
+            self.assertTrue(optimizer.feasible(solution, self.som, self.los, None, 2.0))
+
+    def test_feasible(self):
+        optimizer = DownlinkOptimizer(5, 30.0)
+        optimizer.setup(1.0, 6.0, rho=0.2, c1=1.0)
+        start = optimizer.start(self.som, self.los, None, 2.0)
+        self.assertTrue(optimizer.feasible(start, self.som, self.los, None, 2.0))
+        T_sc, T_dl, T_idle, T_gs = [np.array(x) for x in start]
+        # A pass cut short
+        rise = np.flatnonzero(np.diff(np.concatenate(([0], T_gs))) == 1)[0]
+        short = T_gs.copy()
+        short[rise + 3:rise + 5] = 0
+        moved = T_idle + T_dl*(short == 0)
+        self.assertFalse(optimizer.feasible((T_sc, T_dl*short, moved, short), self.som, self.los, None, 2.0))
+        # Downlink that is not in the buffer
+        self.assertFalse(optimizer.feasible(start, self.som, self.los, None, 0.0 - 6.0))
+        # A pass carried over must stay booked
+        self.assertFalse(optimizer.feasible(start, self.som, self.los, None, 2.0, booked=3))
+
+    def test_best_start(self):
+        optimizer = DownlinkOptimizer(5, 30.0)
+        optimizer.setup(1.0, 6.0, rho=0.2, c1=1.0)
+        start = optimizer.start(self.som, self.los, None, 2.0)
+        # Downlinking in every LOS minute is worth more but empties the buffer
+        T_dl = self.los.astype(np.float64)
+        greedy = (np.zeros(120), T_dl, 1 - T_dl, np.ones(120))
+        self.assertGreater(optimizer.objective(*greedy), optimizer.objective(*start))
+        self.assertIs(optimizer.best_start([greedy, start, None], self.som, self.los, None, 2.0), start)
+        self.assertIsNone(optimizer.best_start([greedy, None], self.som, self.los, None, 2.0))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from downlink.plots import decimate, spans, plot_accumulated
+
+class TestPlots(unittest.TestCase):
+    def __init__(self, methodName = "runTest"):
+        super().__init__(methodName)
+        rng = np.random.default_rng(0)
+        self.y = np.cumsum(rng.normal(size=100000))
+
+    # Test cases for "decimate" function
+    def test_decimate(self):
+        idx = decimate(self.y, 100)
+        self.assertLessEqual(len(idx), 4*100 + 1)
+        self.assertEqual(idx[0], 0)
+        self.assertEqual(idx[-1], len(self.y) - 1)
+        self.assertTrue(np.all(np.diff(idx) > 0))
+        # The extremes survive
+        self.assertEqual(self.y[idx].min(), self.y.min())
+        self.assertEqual(self.y[idx].max(), self.y.max())
+        # Short series are kept whole
+        np.testing.assert_array_equal(decimate(self.y[:300], 100), np.arange(300))
+
+    # Test cases for "spans" function
+    def test_spans(self):
+        mask = np.array([1, 1, 0, 0, 1, 0, 1, 1, 1], dtype=bool)
+        self.assertEqual([(int(s), int(w)) for s, w in spans(mask)], [(0, 2), (4, 1), (6, 3)])
+        self.assertEqual(spans(np.zeros(5, dtype=bool)), [])
+
+    # Test cases for "plot_accumulated" function
+    def test_plot_accumulated(self):
+        T_sc = np.arange(20000) % 3 == 0
+        T_dl = np.arange(20000) % 7 == 0
+        with tempfile.TemporaryDirectory() as folder:
+            paths = [os.path.join(folder, "a.pdf"), os.path.join(folder, "figs", "b.pdf")]
+            plot_accumulated(paths, T_sc, T_dl, None, 1e9, 2e9, 0, 0, 1e12, title="test")
+            for path in paths:
+                self.assertGreater(os.path.getsize(path), 0)
+            with open(paths[0], "rb") as f, open(paths[1], "rb") as g:
+                self.assertEqual(f.read(), g.read())
+
+if __name__ == "__main__":
+    unittest.main()
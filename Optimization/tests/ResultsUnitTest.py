@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from downlink.results import save_results, load_results, update_catalog, load_catalog
+
+class TestResults(unittest.TestCase):
+    def __init__(self, methodName = "runTest"):
+        super().__init__(methodName)
+        rng = np.random.default_rng(0)
+        self.arrays = {name: rng.random(1001) < 0.3 for name in ['T_sc', 'T_dl', 'T_idle', 'T_gs']}
+        self.periods = [{'period': i, 'start': 100*i, 'stop': 100*(i + 1), 'seconds': 0.5,
+                         'objective': 10.0*i, 'end_buffer': 2.0} for i in range(3)]
+
+    # Test cases for "save_results" and "load_results" functions
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as folder:
+            meta = save_results(os.path.join(folder, "run"), self.arrays,
+                                {'station': 'AAU', 'rho': np.float64(0.2), 'T_dl': np.int64(3)}, self.periods)
+            results = load_results(os.path.join(folder, "run"))
+            self.assertEqual(results['station'], 'AAU')
+            self.assertEqual(results['rho'], 0.2)
+            self.assertEqual(results['minutes'], 1001)
+            self.assertEqual(meta['path'], os.path.join(folder, "run", "results.npz"))
+            for name, value in self.arrays.items():
+                np.testing.assert_array_equal(results[name], value)
+            np.testing.assert_array_equal(results['periods']['objective'], [0.0, 10.0, 20.0])
+
+    def test_length_mismatch(self):
+        with tempfile.TemporaryDirectory() as folder:
+            with self.assertRaises(ValueError):
+                save_results(folder, {'T_sc': np.zeros(3), 'T_dl': np.zeros(4)}, {})
+
+    # Test cases for "update_catalog" function
+    def test_catalog(self):
+        with tempfile.TemporaryDirectory() as folder:
+            self.assertEqual(len(load_catalog(folder)), 0)
+            for station in ['AAU', 'NN11']:
+                for rho in [0.2, 0.5]:
+                    meta = save_results(os.path.join(folder, station, f"util_{rho:.2f}"), self.arrays,
+                                        {'problem': 'gs', 'station': station, 'rho': rho, 'total_cost': 10*rho})
+                    update_catalog(folder, meta['path'], meta)
+            # Saving a run again replaces its row
+            update_catalog(folder, meta['path'], dict(meta, total_cost=1.0))
+            catalog = load_catalog(folder)
+            self.assertEqual(len(catalog), 4)
+            aau = catalog[catalog['station'] == 'AAU']
+            np.testing.assert_array_equal(aau['rho'], [0.2, 0.5])
+            np.testing.assert_array_equal(aau['total_cost'], [2.0, 5.0])
+            self.assertEqual(catalog[-1]['total_cost'], 1.0)
+            self.assertEqual(catalog[-1]['minutes'], 1001)
+            results = load_results(os.path.join(folder, catalog[0]['path']))
+            np.testing.assert_array_equal(results['T_dl'], self.arrays['T_dl'])
+
+    def test_concurrent_catalog(self):
+        # Writers of the same catalog keep all rows
+        with tempfile.TemporaryDirectory() as folder:
+            def update(i):
+                for rho in range(10):
+                    path = os.path.join(folder, f"run_{i}_{rho}", "results.npz")
+                    update_catalog(folder, path, {'problem': 'gs', 'rho': rho})
+            with ThreadPoolExecutor(8) as pool:
+                list(pool.map(update, range(8)))
+            self.assertEqual(len(load_catalog(folder)), 80)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import numpy as np
+from downlink.robustness import fit_outages, sample_outages, robustness, probability
+
+class TestRobustness(unittest.TestCase):
+    def __init__(self, methodName = "runTest"):
+        super().__init__(methodName)
+        rng = np.random.default_rng(0)
+        actions = np.repeat(rng.integers(0, 3, 60), 10)
+        self.T_sc = actions == 1
+        self.T_dl = actions == 2
+
+    # Test cases for "fit_outages" and "sample_outages" functions
+    def test_fit(self):
+        ok = sample_outages(200000, 0.01, 0.2, 1, seed=3)[0]
+        p_fail, p_recover = fit_outages(np.ones(len(ok), dtype=bool), ok)
+        self.assertAlmostEqual(p_fail, 0.01, delta=0.002)
+        self.assertAlmostEqual(p_recover, 0.2, delta=0.02)
+        # Outages are only seen with LOS
+        los = np.zeros(len(ok), dtype=bool)
+        self.assertEqual(fit_outages(los, ok), (0.0, 1.0))
+
+    def test_sample(self):
+        ok = sample_outages(500, 0.05, 0.3, 10, seed=1)
+        self.assertEqual(ok.shape, (10, 500))
+        np.testing.assert_array_equal(ok, sample_outages(500, 0.05, 0.3, 10, seed=1))
+        np.testing.assert_array_equal(ok[4:], sample_outages(500, 0.05, 0.3, 6, seed=1, first=4))
+        self.assertFalse(np.array_equal(ok, sample_outages(500, 0.05, 0.3, 10, seed=2)))
+        self.assertTrue(np.all(sample_outages(500, 0.0, 1.0, 3)))
+
+    # Test cases for "robustness" function
+    def test_robustness(self):
+        results = robustness(self.T_sc, self.T_dl, None, 0.05, 0.3, 4.0, 6.0, 0.0, 0.0, 300.0,
+                             realizations=150, seed=0, chunk=64)
+        self.assertEqual(len(results['delivered']), 150)
+        summary = results['summary']
+        self.assertLessEqual(summary['delivered']['low'], summary['delivered']['mean'])
+        self.assertLessEqual(summary['delivered']['mean'], summary['delivered']['high'])
+        np.testing.assert_allclose(results['delivered'] + results['end_buffer'] + results['overflow'],
+                                   4.0*np.sum(self.T_sc))
+        # Without outages every realization is the planned one
+        clear = robustness(self.T_sc, self.T_dl, None, 0.0, 1.0, 4.0, 6.0, 0.0, 0.0, 300.0, realizations=10)
+        self.assertEqual(np.ptp(clear['delivered']), 0)
+        self.assertGreaterEqual(clear['delivered'][0], np.max(results['delivered']))
+
+    def test_probability(self):
+        interval = probability(np.arange(100) < 10)
+        self.assertAlmostEqual(interval['mean'], 0.1)
+        self.assertLess(interval['low'], 0.1)
+        self.assertGreater(interval['high'], 0.1)
+        self.assertEqual(probability(np.zeros(50, dtype=bool))['low'], 0.0)
+
+if __name__ == "__main__":
+    unittest.main()
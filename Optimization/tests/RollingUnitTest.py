@@ -0,0 +1,67 @@
+import unittest
+import numpy as np
+from downlink.scheduler import schedule_raw
+from downlink.rolling import rolling_horizon
+
+class TestRolling(unittest.TestCase):
+    def __init__(self, methodName = "runTest"):
+        super().__init__(methodName)
+        rng = np.random.default_rng(0)
+        self.som = np.repeat(rng.random(60) < 0.6, 10)
+        self.los = np.repeat(rng.random(100) < 0.3, 6)
+        self.indexes = [0, 150, 300, 450, 600]
+        self.warm_starts = []
+
+    def solve(self, start, stop, buffer, warm_start):
+        if warm_start is not None:
+            for x in warm_start:
+                self.assertEqual(len(x), stop - start)
+        self.warm_starts.append(warm_start)
+        return schedule_raw(self.som[start:stop], self.los[start:stop], 1.0, 4.0, 30.0, buffer)
+
+    def buffer_change(self, T_sc, T_dl, T_idle):
+        return np.sum(T_sc) - 4.0*np.sum(T_dl)
+
+    def objective(self, T_sc, T_dl, T_idle):
+        return 4.0*np.sum(T_dl)
+
+    # Test cases for "rolling_horizon" function
+    def test_buffer_carry_over(self):
+        (T_sc, T_dl, T_idle), periods = rolling_horizon(self.solve, self.indexes, self.buffer_change,
+                                                        self.objective, 5.0, 0, idle=2)
+        self.assertEqual(len(T_sc), 600)
+        level = 5.0 + np.cumsum(T_sc - 4.0*T_dl)
+        self.assertTrue(np.all(level >= 0))
+        self.assertTrue(np.all(level <= 30.0))
+        self.assertEqual([p['stop'] for p in periods], self.indexes[1:])
+        np.testing.assert_almost_equal([p['end_buffer'] for p in periods], level[np.array(self.indexes[1:]) - 1])
+        self.assertAlmostEqual(sum(p['objective'] for p in periods), 4.0*np.sum(T_dl))
+
+    def test_lookahead(self):
+        # With a lookahead over the whole horizon every period is optimal overall
+        (T_sc, T_dl, T_idle), periods = rolling_horizon(self.solve, self.indexes, self.buffer_change,
+                                                        self.objective, 5.0, 600, idle=2)
+        self.assertEqual(np.sum(T_dl), np.sum(schedule_raw(self.som, self.los, 1.0, 4.0, 30.0, 5.0)[1]))
+        # The warm start is the rest of the previous solution
+        first = schedule_raw(self.som, self.los, 1.0, 4.0, 30.0, 5.0)
+        np.testing.assert_array_equal(self.warm_starts[1][2], first[2][150:])
+
+    def test_carry(self):
+        # The samples of the period after the last downlink are carried over
+        carried = []
+        def solve(start, stop, buffer, warm_start, value):
+            carried.append(value)
+            return self.solve(start, stop, buffer, warm_start)
+        def carry(T_sc, T_dl, T_idle):
+            self.assertEqual(len(T_sc), self.indexes[len(carried)])
+            return len(T_dl) - 1 - np.flatnonzero(T_dl)[-1] if np.any(T_dl) else None
+        (T_sc, T_dl, T_idle), periods = rolling_horizon(solve, self.indexes, self.buffer_change,
+                                                        self.objective, 5.0, 0, idle=2, carry=carry)
+        self.assertIsNone(carried[0])
+        for stop, value in zip(self.indexes[1:-1], carried[1:]):
+            self.assertEqual(value, stop - 1 - np.flatnonzero(T_dl[:stop])[-1])
+        # Without lookahead there is nothing to warm start from
+        self.assertTrue(all(warm_start is None for warm_start in self.warm_starts))
+
+if __name__ == "__main__":
+    unittest.main()
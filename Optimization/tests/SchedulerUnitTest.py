@@ -0,0 +1,110 @@
+import itertools
+import unittest
+import numpy as np
+from downlink.scheduler import schedule_raw, _schedule_raw
+
+try:
+    import cvxpy as cp
+except ImportError:
+    cp = None
+
+def brute_force(som, los, Rsc, Rdl, buffer_size, buffer):
+    best = 0
+    for actions in itertools.product((0, 1, 2), repeat=len(som)):
+        level = buffer
+        downlinks = 0
+        for t, action in enumerate(actions):
+            if action == 1:
+                if not som[t]:
+                    break
+                level += Rsc
+            elif action == 2:
+                if not los[t]:
+                    break
+                level -= Rdl
+                downlinks += 1
+            if level < 0 or level > buffer_size:
+                break
+        else:
+            best = max(best, downlinks)
+    return best * Rdl
+
+def milp(som, los, Rsc, Rdl, buffer_size, buffer):
+    N = len(som)
+    T_sc = cp.Variable(N, boolean=True)
+    T_dl = cp.Variable(N, boolean=True)
+    T_idle = cp.Variable(N, boolean=True)
+    level = cp.cumsum(T_sc) * Rsc + buffer - cp.cumsum(T_dl) * Rdl
+    constraints = [T_sc <= som, T_dl <= los, T_sc + T_dl + T_idle == 1,
+                   level <= buffer_size, level >= 0]
+    problem = cp.Problem(cp.Maximize(cp.sum(T_dl) * Rdl), constraints)
+    problem.solve(solver=cp.HIGHS)
+    return problem.value
+
+class TestScheduler(unittest.TestCase):
+    def __init__(self, methodName = "runTest"):
+        super().__init__(methodName)
+        rng = np.random.default_rng(0)
+        self.instances = []
+        for _ in range(40):
+            N = int(rng.integers(4, 9))
+            self.instances.append((
+                rng.random(N) < 0.6,
+                rng.random(N) < 0.5,
+                float(rng.uniform(0.5, 3)),
+                float(rng.uniform(0.5, 6)),
+                float(rng.uniform(3, 10)),
+                float(rng.uniform(0, 3))
+            ))
+
+    def check_feasible(self, T_sc, T_dl, T_idle, som, los, Rsc, Rdl, buffer_size, buffer):
+        np.testing.assert_array_equal(T_sc + T_dl + T_idle, 1)
+        self.assertTrue(np.all(T_sc <= som))
+        self.assertTrue(np.all(T_dl <= los))
+        level = buffer + np.cumsum(T_sc) * Rsc - np.cumsum(T_dl) * Rdl
+        self.assertTrue(np.all(level >= -1e-9))
+        self.assertTrue(np.all(level <= buffer_size + 1e-9))
+
+    # Test cases for "schedule_raw" function
+    def test_small_schedule(self):
+        som = np.array([1, 1, 0, 0, 1, 0], dtype=bool)
+        los = np.array([0, 0, 1, 1, 1, 1], dtype=bool)
+        T_sc, T_dl, T_idle = schedule_raw(som, los, 1.0, 1.0, 2.0)
+        np.testing.assert_array_equal(T_sc, [1, 1, 0, 0, 1, 0])
+        np.testing.assert_array_equal(T_dl, [0, 0, 1, 1, 0, 1])
+
+    def test_against_brute_force(self):
+        for instance in self.instances:
+            T_sc, T_dl, T_idle = schedule_raw(*instance)
+            self.check_feasible(T_sc, T_dl, T_idle, *instance)
+            self.assertAlmostEqual(np.sum(T_dl) * instance[3], brute_force(*instance))
+
+    @unittest.skipIf(cp is None or "HIGHS" not in (cp.installed_solvers() if cp else []),
+                     "requires cvxpy with HiGHS")
+    def test_against_milp(self):
+        for instance in self.instances:
+            T_sc, T_dl, T_idle = schedule_raw(*instance)
+            self.assertAlmostEqual(np.sum(T_dl) * instance[3], milp(*instance))
+
+    def test_checkpoints(self):
+        for instance in self.instances:
+            expected = schedule_raw(*instance, checkpoint=len(instance[0]))
+            for checkpoint in (1, 2, 3):
+                for a, b in zip(schedule_raw(*instance, checkpoint=checkpoint), expected):
+                    np.testing.assert_array_equal(a, b)
+
+    def test_long_horizon_memory(self):
+        # Two months of minutes with a frontier of up to 201 states
+        N = 90000
+        t = np.arange(N)
+        som = (t % 1440) < 900
+        los = (t % 1440 > 600) & (t % 1440 < 1100)
+        Rsc, Rdl, buffer_size = 1.0, 0.5, 100.0
+        actions, peak = _schedule_raw(som, los, Rsc, Rdl, buffer_size, 0.0, int(np.sqrt(N)) + 1)
+        frontier = buffer_size / Rdl + 1
+        self.assertLessEqual(peak, 2 * (np.sqrt(N) + 2) * frontier)
+        T_sc, T_dl, T_idle = [(actions == a).astype(np.float64) for a in (1, 2, 0)]
+        self.check_feasible(T_sc, T_dl, T_idle, som, los, Rsc, Rdl, buffer_size, 0.0)
+
+if __name__ == "__main__":
+    unittest.main()
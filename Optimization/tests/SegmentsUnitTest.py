@@ -0,0 +1,88 @@
+import unittest
+import numpy as np
+from downlink.scheduler import schedule_raw
+from downlink.segments import compress, optimize_segments, relax_segments
+
+try:
+    import cvxpy as cp
+    HAS_HIGHS = "HIGHS" in cp.installed_solvers()
+except ImportError:
+    HAS_HIGHS = False
+
+class TestSegments(unittest.TestCase):
+    def __init__(self, methodName = "runTest"):
+        super().__init__(methodName)
+        rng = np.random.default_rng(0)
+        self.instances = []
+        for _ in range(10):
+            N = int(rng.integers(50, 300))
+            self.instances.append((
+                np.repeat(rng.random(N // 10 + 1) < 0.6, 10)[:N],
+                np.repeat(rng.random(N // 7 + 1) < 0.4, 7)[:N],
+                np.repeat(rng.random(N // 13 + 1) < 0.5, 13)[:N]
+            ))
+
+    # Test cases for "compress" function
+    def test_compress(self):
+        som = np.array([1, 1, 1, 0, 0, 1], dtype=bool)
+        los = np.array([0, 0, 1, 1, 1, 1], dtype=bool)
+        starts, lengths, som_k, los_k, gw_k = compress(som, los)
+        np.testing.assert_array_equal(starts, [0, 2, 3, 5])
+        np.testing.assert_array_equal(lengths, [2, 1, 2, 1])
+        np.testing.assert_array_equal(som_k, [True, True, False, True])
+        np.testing.assert_array_equal(los_k, [False, True, True, True])
+        np.testing.assert_array_equal(gw_k, [False, False, False, False])
+
+    # Test cases for "optimize_segments" function
+    @unittest.skipIf(not HAS_HIGHS, "requires cvxpy with HiGHS")
+    def test_matches_raw_scheduler(self):
+        # Without a price on ground station time this is the raw problem
+        for som, los, gw_los in self.instances:
+            T_sc, T_dl, T_gw, T_idle, T_gs = optimize_segments(som, los, None, 5.0, 30.0, 1.0, 4.0, 0.0,
+                                                               5, 0.0, 1.0, solver=cp.HIGHS)
+            self.assertEqual(np.sum(T_dl), np.sum(schedule_raw(som, los, 1.0, 4.0, 30.0, 5.0)[1]))
+
+    @unittest.skipIf(not HAS_HIGHS, "requires cvxpy with HiGHS")
+    def test_feasible_schedule(self):
+        for som, los, gw_los in self.instances:
+            T_sc, T_dl, T_gw, T_idle, T_gs = optimize_segments(som, los, gw_los, 5.0, 30.0, 1.0, 4.0, 0.5,
+                                                               5, 0.5, 1.0, 2.0, solver=cp.HIGHS)
+            np.testing.assert_array_equal(T_sc + T_dl + T_gw + T_idle, 1)
+            self.assertTrue(np.all(T_sc <= som))
+            self.assertTrue(np.all(T_dl <= los))
+            self.assertTrue(np.all(T_gw <= gw_los))
+            self.assertTrue(np.all(T_dl <= T_gs))
+            level = 5.0 + np.cumsum(T_sc*1.0 - T_dl*4.0 - T_gw*0.5)
+            self.assertTrue(np.all(level >= 0))
+            self.assertTrue(np.all(level <= 30.0))
+
+    # Test cases for "relax_segments" function
+    @unittest.skipIf(not HAS_HIGHS, "requires cvxpy with HiGHS")
+    def test_relaxation(self):
+        for som, los, gw_los in self.instances:
+            (T_sc, T_dl, T_gw, T_idle, T_gs), bound = relax_segments(som, los, gw_los, 5.0, 30.0, 1.0, 4.0, 0.5,
+                                                                     5, 0.2, 1.0, 2.0)
+            np.testing.assert_array_equal(T_sc + T_dl + T_gw + T_idle, 1)
+            self.assertTrue(np.all(T_sc <= som))
+            self.assertTrue(np.all(T_dl <= los))
+            self.assertTrue(np.all(T_gw <= gw_los))
+            self.assertTrue(np.all(T_dl <= T_gs))
+            level = 5.0 + np.cumsum(T_sc*1.0 - T_dl*4.0 - T_gw*0.5)
+            self.assertTrue(np.all((level >= 0) & (level <= 30.0)))
+            # Passes are whole blocks of M minutes
+            edges = np.diff(np.concatenate(([0], T_gs, [0])))
+            starts, stops = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+            self.assertTrue(np.all(((stops - starts) % 5 == 0) | (stops == len(som))))
+            # The LP bounds the MILP, which bounds the rounded solution
+            optimum = optimize_segments(som, los, gw_los, 5.0, 30.0, 1.0, 4.0, 0.5, 5, 0.2, 1.0, 2.0, solver=cp.HIGHS)
+            value = lambda T_sc, T_dl, T_gw, T_idle, T_gs: 4.0*(np.sum(T_dl) - 0.2*np.sum(T_gs)) + 0.25*np.sum(T_gw)
+            self.assertGreaterEqual(bound + 1e-6, value(*optimum))
+            self.assertGreaterEqual(value(*optimum) + 1e-6, value(T_sc, T_dl, T_gw, T_idle, T_gs))
+
+    def test_small_buffer(self):
+        with self.assertRaises(ValueError):
+            optimize_segments(np.ones(5, dtype=bool), np.ones(5, dtype=bool), None, 0.0, 4.0, 1.0, 4.0, 0.0,
+                              5, 0.0, 1.0)
+
+if __name__ == "__main__":
+    unittest.main()
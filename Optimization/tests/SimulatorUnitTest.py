@@ -0,0 +1,53 @@
+import unittest
+import numpy as np
+from downlink.simulator import simulate
+
+class TestSimulator(unittest.TestCase):
+    def __init__(self, methodName = "runTest"):
+        super().__init__(methodName)
+        rng = np.random.default_rng(0)
+        actions = np.repeat(rng.integers(0, 4, 40), 5)
+        self.T_sc = actions == 1
+        self.T_dl = actions == 2
+        self.T_gw = actions == 3
+        self.ok = rng.random(len(actions)) < 0.8
+
+    # Test cases for "simulate" function
+    def test_planned(self):
+        # Without outages and overflow the level is the planned one
+        sim = simulate(self.T_sc, self.T_dl.astype(float), self.T_gw, None, None, 1.0, 2.0, 3.0, buffer=1000)
+        expected = 1000 + np.cumsum(self.T_sc) - 2*np.cumsum(self.T_dl) - 3*np.cumsum(self.T_gw)
+        np.testing.assert_allclose(sim['level'], expected)
+        self.assertEqual(sim['delivered'], 2*np.sum(self.T_dl))
+        self.assertEqual(sim['overflow'], 0)
+        self.assertEqual(sim['dl_minutes'], np.sum(self.T_dl))
+
+    def test_outages(self):
+        T_gs = np.zeros_like(self.T_dl)
+        T_gs[20:60] = True
+        sim = simulate(self.T_sc, self.T_dl, self.T_gw, T_gs, self.ok, 4.0, 2.0, 3.0,
+                       buffer=5, buffer_size=20, c1=1.5, c2=2.0)
+        self.assertEqual(sim['outage_minutes'], np.sum(self.T_dl & ~self.ok))
+        self.assertEqual(sim['lost'], 2*sim['outage_minutes'])
+        self.assertEqual(sim['cost'], 1.5*40 + 2.0*np.sum(self.T_gw))
+        self.assertGreater(sim['overflow_events'], 0)
+        # Every bit is either in the buffer, sent or dropped
+        self.assertAlmostEqual(5 + 4*np.sum(self.T_sc),
+                               sim['end_level'] + sim['delivered'] + sim['delivered_gw'] + sim['overflow'])
+        self.assertTrue(np.all((sim['level'] >= 0) & (sim['level'] <= 20)))
+
+    def test_batch(self):
+        rng = np.random.default_rng(1)
+        ok = rng.random((6, len(self.T_dl))) < 0.7
+        rates = np.linspace(1, 3, len(self.T_dl))
+        batch = simulate(self.T_sc, self.T_dl, self.T_gw, None, ok, 4.0, rates, 3.0, buffer=5, buffer_size=20)
+        self.assertEqual(batch['level'].shape, ok.shape)
+        for b in range(len(ok)):
+            single = simulate(self.T_sc, self.T_dl, self.T_gw, None, ok[b], 4.0, rates, 3.0, buffer=5,
+                              buffer_size=20, trajectory=False)
+            self.assertNotIn('level', single)
+            for name, value in single.items():
+                self.assertAlmostEqual(batch[name][b], value)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,24 @@
+import os
+import unittest
+from downlink.sweep import run_sweep
+
+def worker(job, threads):
+    if job == 3:
+        raise ValueError("failing job")
+    return job * job, os.environ["OMP_NUM_THREADS"]
+
+class TestSweep(unittest.TestCase):
+    # Test cases for "run_sweep" function
+    def test_run_sweep(self):
+        finished = []
+        results = run_sweep(worker, [1, 2, 3, 4], threads=2, cores=4,
+                            on_result=lambda job, result, error: finished.append(job))
+        self.assertEqual(sorted(finished), [1, 2, 3, 4])
+        results = {job: (result, error) for job, result, error in results}
+        self.assertEqual(results[2][0], (4, "2"))
+        self.assertEqual(results[4][0], (16, "2"))
+        self.assertIsNone(results[3][0])
+        self.assertIn("failing job", results[3][1])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,7 +2,7 @@ import os
 import sys
 import pickle
 
-from mani import GodotHandler
+from mani import GodotHandler, ResultStore, HorizonMask
 
 from godot.core import tempo, util
 util.suppressLogger()
@@ -24,10 +24,16 @@ if __name__ == '__main__':
     print("Creating handler, calculating visibility")
     godotHandler = GodotHandler(ep1, ep2, 60.0, './universe.yml')
     res = godotHandler.calculate_visibility()
+    if os.path.exists('./horizonMasks.json'):
+        res.set_horizon_mask(HorizonMask.load('./horizonMasks.json'))
 
     filename = './output/year_sim/one_year_' + str(yearbegin) + '.pickle'
 
     print("Saving to file")
     with open(filename, 'wb') as f:
         pickle.dump(res, f, pickle.HIGHEST_PROTOCOL)
-    print("Done saving")
\ No newline at end of file
+    print("Done saving")
+
+    print("Saving column store")
+    ResultStore.save(res, './output/year_sim/one_year_' + str(yearbegin))
+    print("Done saving column store")
\ No newline at end of file
@@ -1,20 +1,25 @@
 from multiprocessing import Pool
 import numpy as np
 import pandas as pd
-from numba import njit
+from numba import njit, set_num_threads
 
 from tqdm import tqdm
 from godot import cosmos, core
 from godot.core import tempo
 import godot.core.util as util
 
-from .VisibilityModel import VisibilityModel
-from .StateEvaluator import SEEnum, StateEvaluator
-from .utils import EventGrid, get_len
+from .VisibilityModel import VisibilityModel, evaluate_geometry
+from .StateEvaluator import SEEnum, StateEvaluator, STATIONS
+from .utils import EventGrid, enu_axes
 from .HaloOrbit.HaloOrbit import HaloOrbit
 
 util.suppressLogger()
 
+def _init_worker():
+    # The pool already uses every core, so the parallel kernels of a
+    # worker run on one thread
+    set_num_threads(1)
+
 class GodotHandler:
     def __init__(self, start_time, end_time, resolution, universe_file):
         self.event_grid = EventGrid(start_time, end_time, resolution)
@@ -37,7 +42,7 @@ class GodotHandler:
         print("Evaluating chunks")
         eval = self._evaluate_chuncks_multiprocessed(params)
         print("Moving chunks to StateEvaluator")
-        results_df = self._move_to_state_evaluator(eval, event_grid)
+        results_df = self._move_to_state_evaluator(eval, event_grid, self.event_grid.resolution)
         return results_df
     
     def initialize_halo_orbit(self, event_grid, n_points):
@@ -52,7 +57,7 @@ class GodotHandler:
         self.Halo.translate_to_orbit_plane(moon_data)
 
     def _evaluate_chuncks_multiprocessed(self, params) -> list[dict]:
-        with Pool() as pool:
+        with Pool(initializer=_init_worker) as pool:
             pool_results = pool.map(self._evaluate_timestamps, params)
             pool.close()
             pool.join()
@@ -61,10 +66,12 @@ class GodotHandler:
         st_dists_list = []
         states_list = []
         elevations_list = []
-        for gw_dist, elev, state, st_dist in tqdm(pool_results):
+        azimuths_list = []
+        for gw_dist, elev, azim, state, st_dist in tqdm(pool_results):
             st_dists_list.append(st_dist)
             gw_dists_list.append(gw_dist)
             elevations_list.append(elev)
+            azimuths_list.append(azim)
             states_list.append(state)
 
 
@@ -72,12 +79,17 @@ class GodotHandler:
         st_dists_all = np.concatenate(st_dists_list)
         states_all = np.concatenate(states_list)
         elevs_all = np.concatenate(elevations_list)
+        azims_all = np.concatenate(azimuths_list)
         df = pd.DataFrame({
             'gw_dist': gw_dists_all,
             'NN11_elev': elevs_all[:, 0],
             'CB11_elev': elevs_all[:, 1],
             'MG11_elev': elevs_all[:, 2],
             'AAU_elev' : elevs_all[:, 3],
+            'NN11_azim': azims_all[:, 0],
+            'CB11_azim': azims_all[:, 1],
+            'MG11_azim': azims_all[:, 2],
+            'AAU_azim' : azims_all[:, 3],
             'NN11_dist': st_dists_all[:, 0],
             'CB11_dist': st_dists_all[:, 1],
             'MG11_dist': st_dists_all[:, 2],
@@ -103,51 +115,38 @@ class GodotHandler:
         uni = self.fetch_universe()
 
         list_length = len(t_list)
+        n_stations = len(STATIONS)
+
+        # Fetch the vectors of the chunk, the geometry is evaluated in one compiled pass
+        sun = np.empty((list_length, 3), dtype=np.float64)
+        earth = np.empty((list_length, 3), dtype=np.float64)
+        sc = np.empty((list_length, 3), dtype=np.float64)
+        gw_pos = np.empty((list_length, 3), dtype=np.float64)
+        ground_stations = np.empty((list_length, n_stations, 3), dtype=np.float64)
+        gs_sc = np.empty((list_length, n_stations, 3), dtype=np.float64)
+        for index1, t in enumerate(t_list):
+            sun[index1] = uni.frames.vector3('Moon', 'Sun', 'ICRF', t)
+            earth[index1] = uni.frames.vector3('Moon','Earth', 'ICRF', t)
+            sc[index1] = uni.frames.vector3('Moon','SC', 'ICRF', t)
+            gw_pos[index1] = self._get_mooncentric_GW_pos(earth[index1], t)
+            for index2, station in enumerate(STATIONS):
+                ground_stations[index1, index2] = uni.frames.vector3('Moon',station, 'ICRF', t)
+                gs_sc[index1, index2] = uni.frames.vector3(station,'SC','ITRF',t)
+        # Elevation and compass azimuth from the geodetic East, North, Up axes of each station
+        for index2, station in enumerate(STATIONS):
+            axes = enu_axes(uni.frames.vector3('Earth', station, 'ITRF', t_list[0]))
+            gs_sc[:, index2] = gs_sc[:, index2] @ axes.T
+
+        flags = np.array([SEEnum.LOS_GW, SEEnum.SUN_ON_SPACECRAFT, SEEnum.SUN_ON_MOON]
+                         + list(STATIONS.values()), dtype=np.uint8)
         gw_dists = np.empty(list_length, dtype=np.uint32)
         states = np.empty(list_length, dtype=np.uint8)
-        elevations = np.empty((list_length, 4), dtype=np.float16)
-        st_dists = np.empty((list_length, 4), dtype=np.float32)
-
-        stations = {
-            'NN11' : SEEnum.CLEAR_MOON_NN,
-            'CB11' : SEEnum.CLEAR_MOON_CB,
-            'MG11' : SEEnum.CLEAR_MOON_MG,
-            'AAU' : SEEnum.CLEAR_MOON_AAU
-            }
-        
-        for index1, t in enumerate(t_list):
-            #Setup a 8 bit holder for flags
-            state:np.uint8= 0
-            # Common vectors for all stations
-            sun = uni.frames.vector3('Moon', 'Sun', 'ICRF', t)
-            earth = uni.frames.vector3('Moon','Earth', 'ICRF', t)
-            sc = uni.frames.vector3('Moon','SC', 'ICRF', t)
-
-            gw_pos = self._get_mooncentric_GW_pos(earth, t)
-            gw_dists[index1] = np.linalg.norm(gw_pos - sc)
-            gw_los = vismod.los_from_gs_to_sc(gw_pos, sc)
-            state = self.update_bit(state, SEEnum.LOS_GW, gw_los)
-
-            # Calculate things that are not dependent on station
-            slos = vismod.sun_light_on_spacecraft(sun, earth, sc)
-            state = self.update_bit(state,SEEnum.SUN_ON_SPACECRAFT, slos)
-            slom = vismod.sun_light_on_moon(sun, earth, sc)
-            state = self.update_bit(state, SEEnum.SUN_ON_MOON, slom)
-
-            # Run through each station, and get evaluations
-            for index2, (station, enum) in enumerate(stations.items()):
-                # Get vector that are dependent on station
-                ground_station = uni.frames.vector3('Moon',station, 'ICRF', t)
-                gs_sc = uni.frames.vector3(station,'SC',station,t)
-                st_dists[index1, index2] = get_len(gs_sc)
-                lfgts = vismod.los_from_gs_to_sc(sc, ground_station)
-                state = self.update_bit(state, enum, lfgts)
-                elev = vismod.get_elevation(gs_sc)
-                elev_deg = elev
-                elevations[index1, index2] = elev_deg
-            #Update and append
-            states[index1] = state
-        return (gw_dists, elevations, states, st_dists)
+        elevations = np.empty((list_length, n_stations), dtype=np.float64)
+        azimuths = np.empty((list_length, n_stations), dtype=np.float64)
+        st_dists = np.empty((list_length, n_stations), dtype=np.float32)
+        evaluate_geometry(sun, earth, sc, gw_pos, ground_stations, gs_sc, flags, vismod.moon_radius,
+                          vismod.earth_radius, states, elevations, azimuths, st_dists, gw_dists)
+        return (gw_dists, elevations.astype(np.float16), azimuths.astype(np.float16), states, st_dists)
     
     def _get_mooncentric_GW_pos(self, earth, t):
         moon = - earth
@@ -156,9 +155,9 @@ class GodotHandler:
         return gw_pos
     
     @staticmethod
-    def _move_to_state_evaluator(result_df: pd.DataFrame, event_grid) -> StateEvaluator:
+    def _move_to_state_evaluator(result_df: pd.DataFrame, event_grid, resolution = None) -> StateEvaluator:
         result_df.insert(0,"time",event_grid)
-        result_df = StateEvaluator(result_df)
+        result_df = StateEvaluator(result_df, event_grid[0], resolution)
         return result_df
     
     @staticmethod
@@ -0,0 +1,103 @@
+import json
+import numpy as np
+from numba import njit, prange
+
+@njit(parallel=True)
+def interpolate_horizon(azimuth, table, step):
+    """
+    Evaluates a horizon mask for a chunk of azimuths.
+
+    Parameters
+    ----------
+    azimuth : (np.ndarray)
+        The azimuths in degrees.
+    table : (np.ndarray)
+        The mask elevation on a uniform azimuth grid starting at 0 degrees,
+        with the value at 360 degrees repeated as the last entry.
+    step : float
+        The azimuth spacing of the table in degrees.
+
+    Returns
+    -------
+    (np.ndarray)
+        The linearly interpolated mask elevation of every azimuth.
+    """
+    n_steps = table.shape[0] - 1
+    out = np.empty(azimuth.shape[0], dtype=np.float32)
+    for i in prange(azimuth.shape[0]):
+        position = (azimuth[i] % 360.0) / step
+        index = min(int(position), n_steps - 1)
+        frac = position - index
+        out[i] = table[index] * (1.0 - frac) + table[index + 1] * frac
+    return out
+
+class HorizonMask:
+    """
+    Azimuth dependent minimum elevations of the ground stations.
+
+    The masks are given as (azimuth, elevation) breakpoints in degrees,
+    with the compass azimuth measured from North clockwise, and are
+    interpolated linearly, wrapping around at 360 degrees. Each mask is
+    resampled once onto a uniform table, so evaluating it for a chunk of
+    samples is a single lookup per sample.
+    """
+
+    def __init__(self, masks:dict, step:float = 0.1):
+        """
+        Parameters
+        ----------
+        masks : dict
+            For each station, a dict with the lists `azimuth` and `elevation`.
+        step : float
+            The azimuth resolution of the lookup tables in degrees.
+        """
+        self.masks = masks
+        self.step = step
+        grid = np.linspace(0.0, 360.0, int(round(360.0 / step)) + 1)
+        self.tables = {}
+        for station, mask in masks.items():
+            azimuth = np.asarray(mask['azimuth'], dtype=np.float64)
+            elevation = np.asarray(mask['elevation'], dtype=np.float64)
+            if azimuth.shape != elevation.shape or azimuth.size == 0:
+                raise ValueError(f"The mask of {station} needs matching azimuths and elevations")
+            self.tables[station] = np.interp(grid, azimuth, elevation, period=360.0)
+
+    @staticmethod
+    def load(filename:str):
+        """
+        Load the horizon masks from a JSON file.
+
+        Parameters
+        ----------
+        filename : str
+            A JSON file with an entry per station, see `HorizonMask`.
+
+        Returns
+        -------
+        HorizonMask
+        """
+        with open(filename, 'r') as f:
+            masks = json.load(f)
+        return HorizonMask(masks)
+
+    def stations(self) -> list[str]:
+        return list(self.tables)
+
+    def min_elevation(self, station:str, azimuth:np.ndarray) -> np.ndarray:
+        """
+        Get the minimum elevation of a station in the given directions.
+
+        Parameters
+        ----------
+        station : str
+            The station name used during creation of state space
+        azimuth : np.ndarray
+            The azimuths in degrees, clockwise from North.
+
+        Returns
+        -------
+        np.ndarray
+            The mask elevation for every azimuth.
+        """
+        azimuth = np.asarray(azimuth, dtype=np.float32)
+        return interpolate_horizon(azimuth, self.tables[station], self.step)
@@ -0,0 +1,289 @@
+import numpy as np
+
+# Boltzmann's constant in dBW/K/Hz
+BOLTZMANN_DB = -228.6
+SPEED_OF_LIGHT = 299792458.0
+
+MODCOD_DTYPE = np.dtype([
+    ('name', 'U12'),
+    ('efficiency', 'f8'),
+    ('esno', 'f8')
+])
+
+# DVB-S2 normal frames without pilots, the spectral efficiency in bit per
+# symbol and the ideal Es/N0 in dB (ETSI EN 302 307-1, table 13)
+DVB_S2_MODCODS = np.array([
+    ('QPSK 1/4', 0.490243, -2.35),
+    ('QPSK 1/3', 0.656448, -1.24),
+    ('QPSK 2/5', 0.789412, -0.30),
+    ('QPSK 1/2', 0.988858, 1.00),
+    ('QPSK 3/5', 1.188304, 2.23),
+    ('QPSK 2/3', 1.322253, 3.10),
+    ('QPSK 3/4', 1.487473, 4.03),
+    ('QPSK 4/5', 1.587196, 4.68),
+    ('QPSK 5/6', 1.654663, 5.18),
+    ('QPSK 8/9', 1.766451, 6.20),
+    ('QPSK 9/10', 1.788612, 6.42),
+    ('8PSK 3/5', 1.779991, 5.50),
+    ('8PSK 2/3', 1.980636, 6.62),
+    ('8PSK 3/4', 2.228124, 7.91),
+    ('8PSK 5/6', 2.478562, 9.35),
+    ('8PSK 8/9', 2.646012, 10.69),
+    ('8PSK 9/10', 2.679207, 10.98),
+    ('16APSK 2/3', 2.637201, 8.97),
+    ('16APSK 3/4', 2.966728, 10.21),
+    ('16APSK 4/5', 3.165623, 11.03),
+    ('16APSK 5/6', 3.300184, 11.61),
+    ('16APSK 8/9', 3.523143, 12.89),
+    ('16APSK 9/10', 3.567342, 13.13),
+    ('32APSK 3/4', 3.703295, 12.73),
+    ('32APSK 4/5', 3.951571, 13.64),
+    ('32APSK 5/6', 4.119540, 14.28),
+    ('32APSK 8/9', 4.397854, 15.69),
+    ('32APSK 9/10', 4.453027, 16.05)
+], dtype=MODCOD_DTYPE)
+
+class DVBS2:
+    """
+    Maps Es/N0 to DVB-S2 data rates.
+
+    The MODCODs are sorted by their required Es/N0 once, keeping only those
+    faster than every MODCOD needing less, so the rate of any number of
+    samples is one `np.searchsorted` in the thresholds.
+    """
+
+    def __init__(self, bandwidth:float, rolloff:float = 0.1, modcods:np.ndarray = DVB_S2_MODCODS):
+        """
+        Parameters
+        ----------
+        bandwidth : float
+            The occupied bandwidth in Hz.
+        rolloff : float
+            The roll-off factor, the symbol rate is bandwidth/(1 + rolloff).
+        modcods : np.ndarray
+            The MODCOD table with the columns of `MODCOD_DTYPE`.
+        """
+        self.bandwidth = bandwidth
+        self.rolloff = rolloff
+        self.symbol_rate = bandwidth / (1 + rolloff)
+        self.modcods = np.sort(modcods, order=['esno', 'efficiency'])
+        self.rates = self.modcods['efficiency'] * self.symbol_rate
+        # The thresholds where the best rate goes up
+        useful = self.rates > np.maximum.accumulate(np.concatenate(([0.0], self.rates[:-1])))
+        self.thresholds = self.modcods['esno'][useful]
+        self.steps = self.rates[useful]
+
+    def modcod_at_rate(self, rate:float) -> np.void:
+        """
+        Get the MODCOD with the data rate closest to a target.
+
+        Parameters
+        ----------
+        rate : float
+            The target data rate in bit/s.
+
+        Returns
+        -------
+        np.void
+            The row of the MODCOD table.
+        """
+        return self.modcods[np.argmin(np.abs(self.rates - rate))]
+
+    def rate(self, esno) -> np.ndarray:
+        """
+        Get the data rate of the fastest MODCOD each Es/N0 closes, adaptive
+        coding and modulation.
+
+        Parameters
+        ----------
+        esno : np.ndarray
+            The Es/N0 in dB, NaN for no link.
+
+        Returns
+        -------
+        np.ndarray
+            The data rates in bit/s, 0 below the lowest threshold.
+        """
+        esno = np.asarray(esno, dtype=np.float64)
+        # NaN sorts after every threshold, it gets no rate
+        index = np.where(np.isnan(esno), 0, np.searchsorted(self.thresholds, esno, side='right'))
+        return np.concatenate(([0.0], self.steps))[index]
+
+    def fixed_rate(self, esno, rate:float) -> np.ndarray:
+        """
+        Get the data rate of the one MODCOD closest to a target, 0 where the
+        Es/N0 does not close it.
+
+        Parameters
+        ----------
+        esno : np.ndarray
+            The Es/N0 in dB, NaN for no link.
+        rate : float
+            The target data rate in bit/s, see `modcod_at_rate`.
+
+        Returns
+        -------
+        np.ndarray
+            The data rates in bit/s.
+        """
+        modcod = self.modcod_at_rate(rate)
+        esno = np.asarray(esno, dtype=np.float64)
+        return np.where(esno >= modcod['esno'], modcod['efficiency'] * self.symbol_rate, 0.0)
+
+class LinkBudget:
+    """
+    A downlink budget evaluated for every sample of a simulation at once.
+
+    The Es/N0 follows from the free space loss of the distance and an
+    atmospheric loss scaling with the cosecant of the elevation, on top of
+    which an attenuation per sample, e.g. rain fades, can be given.
+    """
+
+    def __init__(self, eirp:float, gt:float, frequency:float, bandwidth:float, rolloff:float = 0.1,
+                 zenith_loss:float = 0.0, losses:float = 0.0, link_margin:float = 0.0):
+        """
+        Parameters
+        ----------
+        eirp : float
+            The EIRP of the spacecraft in dBW.
+        gt : float
+            The G/T of the ground station in dB/K.
+        frequency : float
+            The carrier frequency in Hz.
+        bandwidth : float
+            The occupied bandwidth in Hz.
+        rolloff : float
+            The roll-off factor of the carrier.
+        zenith_loss : float
+            The clear sky atmospheric loss at zenith in dB.
+        losses : float
+            Other fixed losses in dB, pointing, polarization and so on.
+        link_margin : float
+            The margin kept on the Es/N0 in dB.
+        """
+        self.eirp = eirp
+        self.gt = gt
+        self.frequency = frequency
+        self.zenith_loss = zenith_loss
+        self.losses = losses
+        self.link_margin = link_margin
+        self.dvb = DVBS2(bandwidth, rolloff)
+
+    def snr(self, distance, elevation, attenuation = None) -> np.ndarray:
+        """
+        Compute the Es/N0 of every sample.
+
+        Parameters
+        ----------
+        distance : np.ndarray
+            The slant range in m.
+        elevation : np.ndarray
+            The elevation in degrees.
+        attenuation : np.ndarray, optional
+            An extra attenuation per sample in dB.
+
+        Returns
+        -------
+        np.ndarray
+            The Es/N0 in dB, NaN below the horizon.
+        """
+        distance = np.asarray(distance, dtype=np.float64)
+        elevation = np.asarray(elevation, dtype=np.float64)
+        fspl = 20 * np.log10(4 * np.pi * self.frequency / SPEED_OF_LIGHT * distance)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            atmosphere = np.where(elevation > 0, self.zenith_loss / np.sin(np.radians(elevation)), np.nan)
+        esno = (self.eirp + self.gt - BOLTZMANN_DB - 10 * np.log10(self.dvb.symbol_rate)
+                - self.losses - self.link_margin - fspl - atmosphere)
+        if attenuation is not None:
+            esno = esno - attenuation
+        return esno
+
+def station_rates(res, station:str, condition, snr, dvb:DVBS2, rate:float = None, scale:float = 1e3,
+                  attenuation = None) -> tuple:
+    """
+    Compute the Es/N0 and data rate of a ground station for a whole
+    simulation from its `{station}_dist` and `{station}_elev` columns.
+
+    Parameters
+    ----------
+    res : StateEvaluator or ResultStore
+        The simulation.
+    station : str
+        The prefix of the station columns.
+    condition : np.ndarray
+        The samples where the station can be used, the others get no link.
+    snr : callable
+        The Es/N0 in dB of arrays of distances in m and elevations, e.g.
+        `LinkBudget.snr`. It is called once with the usable samples in
+        time order.
+    dvb : DVBS2
+        The MODCOD table.
+    rate : float, optional
+        The target data rate of a fixed MODCOD, see `DVBS2.fixed_rate`. By
+        default the MODCOD adapts to the Es/N0.
+    scale : float
+        The distance column in m per unit, km by default.
+    attenuation : np.ndarray, optional
+        An extra attenuation per sample in dB, passed on to `snr`.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        The data rates in bit/s and the Es/N0 in dB, NaN without link.
+    """
+    condition = np.asarray(condition, dtype=bool)
+    distance = np.asarray(res[station + '_dist'], dtype=np.float64)[condition] * scale
+    elevation = np.asarray(res[station + '_elev'], dtype=np.float64)[condition]
+    esno = np.full(condition.shape[0], np.nan)
+    if attenuation is None:
+        esno[condition] = snr(distance, elevation)
+    else:
+        esno[condition] = snr(distance, elevation, np.asarray(attenuation)[condition])
+    if rate is None:
+        rates = dvb.rate(esno)
+    else:
+        rates = dvb.fixed_rate(esno, rate)
+    return rates, esno
+
+def budget_rates(res, station:str, condition, link, rate:float, scale:float = 1e3) -> tuple:
+    """
+    Compute the Es/N0 and fixed MODCOD data rate of a ground station with a
+    stateful link budget, e.g. `mani_rain.link_budget_markov`.
+
+    The rain model of such a budget advances one step per `snr_at_t` call,
+    so it is called for the usable samples only and in time order, the same
+    sequence as stepping through the simulation sample by sample. The calls
+    are made through `np.vectorize` on the arrays of `station_rates`.
+
+    Parameters
+    ----------
+    res : StateEvaluator or ResultStore
+        The simulation.
+    station : str
+        The prefix of the station columns.
+    condition : np.ndarray
+        The samples where the station can be used, the others get no link.
+    link : object
+        The link budget, with `snr_at_t(distance, elevation)` giving the
+        Es/N0 in dB and `dvb_s2_fixed_rate(esno, rate)` the data rate.
+    rate : float
+        The target data rate of the fixed MODCOD.
+    scale : float
+        The distance column in m per unit, km by default.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        The data rates in bit/s and the Es/N0 in dB, NaN without link.
+    """
+    condition = np.asarray(condition, dtype=bool)
+    snr = np.vectorize(link.snr_at_t, otypes=[np.float64])
+    distance = np.asarray(res[station + '_dist'], dtype=np.float64)[condition] * scale
+    elevation = np.asarray(res[station + '_elev'], dtype=np.float64)[condition]
+    esno = np.full(condition.shape[0], np.nan)
+    rates = np.zeros(condition.shape[0])
+    if distance.size:
+        esno[condition] = snr(distance, elevation)
+        fixed_rate = np.vectorize(link.dvb_s2_fixed_rate, otypes=[np.float64])
+        rates[condition] = fixed_rate(esno[condition], rate)
+    return rates, esno
@@ -0,0 +1,154 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import inspect
+
+def file_hash(*paths:str) -> str:
+    """
+    Hash the contents of files, to use them as stage parameters.
+
+    Parameters
+    ----------
+    paths : str
+        The files.
+
+    Returns
+    -------
+    str
+        The sha1 of the names and contents of the files.
+    """
+    digest = hashlib.sha1()
+    for path in paths:
+        digest.update(os.path.basename(path).encode())
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+def source_hash(*objects) -> str:
+    """
+    Hash the source code of functions, classes or modules, e.g. the
+    function building a stage, to use them as stage parameters.
+
+    Parameters
+    ----------
+    objects : function, class or module
+        The code.
+
+    Returns
+    -------
+    str
+        The sha1 of the qualified names and sources of the objects.
+    """
+    digest = hashlib.sha1()
+    for obj in objects:
+        digest.update(getattr(obj, '__qualname__', obj.__name__).encode())
+        digest.update(inspect.getsource(obj).encode())
+    return digest.hexdigest()
+
+class Pipeline:
+    """
+    Stages whose outputs are cached on disk under a hash of their
+    parameters and of the stages they read.
+
+    A stage is only built if no folder with its key exists, so changing a
+    parameter reruns that stage and the stages after it, while the stages
+    before it are read from the cache. A stage is built in a temporary
+    folder that is renamed once it is complete, so an interrupted run is
+    never taken for a cached one.
+    """
+
+    def __init__(self, root:str = './output/cache', force:list[str] = None, verbose:bool = True):
+        """
+        Parameters
+        ----------
+        root : str
+            The folder of the cache, a folder per stage name and key.
+        force : list[str], optional
+            The names of the stages to rebuild even if cached.
+        verbose : bool
+            Print the stages as they are read or built.
+        """
+        self.root = root
+        self.force = set(force or [])
+        self.verbose = verbose
+
+    def key(self, name:str, params:dict, parents:list = ()) -> str:
+        """
+        Get the key of a stage.
+
+        Parameters
+        ----------
+        name : str
+            The stage name.
+        params : dict
+            The parameters of the stage, JSON serializable.
+        parents : list[dict]
+            The stages it reads, see `run`.
+
+        Returns
+        -------
+        str
+            The first 16 hex digits of the sha1 of the stage.
+        """
+        blob = json.dumps({'name': name, 'params': params, 'parents': [parent['key'] for parent in parents]},
+                          sort_keys=True, default=str)
+        return hashlib.sha1(blob.encode()).hexdigest()[:16]
+
+    def run(self, name:str, params:dict, build, parents:list = ()) -> dict:
+        """
+        Read a stage from the cache or build it.
+
+        Parameters
+        ----------
+        name : str
+            The stage name.
+        params : dict
+            The parameters of the stage, JSON serializable.
+        build : callable
+            Called with the folder to write the outputs to, may return a
+            JSON serializable dict of results.
+        parents : list[dict]
+            The stages it reads.
+
+        Returns
+        -------
+        dict
+            'name', 'key', 'path' of the stage folder, 'params' and the
+            'results' of `build`.
+        """
+        key = self.key(name, params, parents)
+        path = os.path.join(self.root, name, key)
+        header = os.path.join(path, 'stage.json')
+        if os.path.exists(header) and name not in self.force:
+            with open(header, 'r') as f:
+                stage = json.load(f)
+            self._log(f"{name} {key}: cached")
+            stage['path'] = path
+            return stage
+
+        self._log(f"{name} {key}: building")
+        start = time.time()
+        tmp = path + '.tmp'
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        try:
+            results = build(tmp)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        stage = {'name': name, 'key': key, 'params': params, 'parents': [parent['key'] for parent in parents],
+                 'results': results or {}, 'seconds': time.time() - start}
+        with open(os.path.join(tmp, 'stage.json'), 'w') as f:
+            json.dump(stage, f, indent=4, default=str)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+        self._log(f"{name} {key}: built in {stage['seconds']:.1f} s")
+        stage['path'] = path
+        return stage
+
+    def _log(self, msg:str):
+        if self.verbose:
+            print(msg)
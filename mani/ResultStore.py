@@ -0,0 +1,176 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from godot.core import tempo
+
+from .StateEvaluator import StateEvaluator
+from .HorizonMask import HorizonMask
+
+class ResultStore:
+    """
+    A column-wise, memory-mapped copy of a StateEvaluator on disk.
+
+    Every column is stored as its own `.npy` file next to a `meta.json`
+    header. Columns are memory-mapped the first time they are asked for,
+    so opening a store only reads the header.
+
+    The time column is not stored as Epoch objects. On a uniform grid it
+    is rebuilt from the start time and resolution, otherwise it is stored
+    as offsets in seconds from the start time.
+    """
+
+    def __init__(self, path:str, start:int = 0, stop:int = None):
+        self.path = path
+        with open(os.path.join(path, 'meta.json'), 'r') as f:
+            self.meta = json.load(f)
+        if stop is None:
+            stop = self.meta['length']
+        self.start = start
+        self.stop = stop
+        self._mapped = {}
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def keys(self) -> list[str]:
+        """
+        Get the names of the stored columns.
+
+        Returns
+        -------
+        list[str]
+            The column names, in the order they were saved
+        """
+        return self.meta['columns']
+
+    def __getitem__(self, key:str):
+        """
+        Fetch a column of the store.
+
+        Parameters
+        ----------
+        key : str
+            The name of the column
+
+        Returns
+        -------
+        np.ndarray
+            A read-only memory-mapped view of the column. The time column
+            is returned as an object array of Epochs.
+        """
+        if key not in self.keys():
+            raise KeyError(key)
+        if key == 'time':
+            start_time = tempo.Epoch(self.meta['start_time'])
+            return np.array([start_time + float(dt) for dt in self.time_offsets()], dtype=object)
+        if key not in self._mapped:
+            self._mapped[key] = np.load(os.path.join(self.path, key + '.npy'), mmap_mode='r')
+        return self._mapped[key][self.start:self.stop]
+
+    def time_offsets(self) -> np.ndarray:
+        """
+        Get the time of every sample in seconds since the start time.
+
+        Returns
+        -------
+        np.ndarray
+            The offsets of the samples in this store.
+        """
+        resolution = self.meta['resolution']
+        if resolution is not None:
+            return np.arange(self.start, self.stop) * float(resolution)
+        offsets = np.load(os.path.join(self.path, 'time.npy'), mmap_mode='r')
+        return offsets[self.start:self.stop]
+
+    def slice(self, start:int, stop:int):
+        """
+        Get a store over the rows in [start, stop) of this store.
+
+        Returns
+        -------
+        ResultStore
+            A store sharing the memory-mapped columns of this store.
+        """
+        res = ResultStore.__new__(ResultStore)
+        res.path = self.path
+        res.meta = self.meta
+        res.start = self.start + start
+        res.stop = self.start + stop
+        res._mapped = self._mapped
+        return res
+
+    @staticmethod
+    def save(res:StateEvaluator, path:str):
+        """
+        Save a StateEvaluator as a column-wise store.
+
+        Parameters
+        ----------
+        res : StateEvaluator
+            The results to save, all columns are saved.
+        path : str
+            The folder to save the store in, created if missing.
+        """
+        os.makedirs(path, exist_ok=True)
+        columns = list(res.keys())
+        start_time = None
+        if 'time' in columns:
+            offsets = res.time_offsets()
+            if res.start_time is None:
+                res.start_time = res['time'].iloc[0]
+            start_time = res.start_time.calStr('TDB')
+            if res.resolution is None:
+                np.save(os.path.join(path, 'time.npy'), offsets)
+
+        for key in columns:
+            if key == 'time':
+                continue
+            np.save(os.path.join(path, key + '.npy'), np.asarray(res[key]))
+
+        meta = {
+            'length': res.get_length(),
+            'columns': columns,
+            'start_time': start_time,
+            'resolution': res.resolution,
+            'min_elevation': float(res.min_elevation),
+            'horizon': None if res.horizon is None else res.horizon.masks
+        }
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=4)
+
+    @staticmethod
+    def load(path:str, columns:list[str] = None) -> StateEvaluator:
+        """
+        Open a saved store as a StateEvaluator.
+
+        Only the header is read. Columns are loaded the first time they
+        are fetched from the StateEvaluator, or up front if listed in
+        `columns`.
+
+        Parameters
+        ----------
+        path : str
+            The folder of the store.
+        columns : list[str], optional
+            The columns to load right away.
+
+        Returns
+        -------
+        StateEvaluator
+            A StateEvaluator backed by the store.
+        """
+        store = ResultStore(path)
+        start_time = None
+        if store.meta['start_time'] is not None:
+            start_time = tempo.Epoch(store.meta['start_time'])
+        df = pd.DataFrame(index=pd.RangeIndex(len(store)))
+        res = StateEvaluator(df, start_time, store.meta['resolution'], store)
+        res.min_elevation = store.meta['min_elevation']
+        if store.meta.get('horizon') is not None:
+            res.set_horizon_mask(HorizonMask(store.meta['horizon']))
+        if store.meta['resolution'] is None and 'time' in store.keys():
+            res._offsets = store.time_offsets()
+        for key in columns or []:
+            res[key]
+        return res
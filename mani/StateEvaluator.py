@@ -3,6 +3,7 @@ import pandas as pd
 import numpy as np
 from functools import reduce
 import operator
+from .utils import extract_windows, assign_stations
 
 class SEEnum(enum.IntFlag):
     SUN_ON_SPACECRAFT = enum.auto()
@@ -13,6 +14,20 @@ class SEEnum(enum.IntFlag):
     CLEAR_MOON_AAU = enum.auto()
     LOS_GW = enum.auto()
 
+STATIONS = {
+    'NN11' : SEEnum.CLEAR_MOON_NN,
+    'CB11' : SEEnum.CLEAR_MOON_CB,
+    'MG11' : SEEnum.CLEAR_MOON_MG,
+    'AAU' : SEEnum.CLEAR_MOON_AAU
+    }
+
+LOS_COLUMNS = {
+    'los_nn' : 'NN11',
+    'los_cb' : 'CB11',
+    'los_mg' : 'MG11',
+    'los_aau' : 'AAU'
+    }
+
 class SatState(enum.IntEnum):
     IDLE = enum.auto()
     LP_COMM = enum.auto()
@@ -20,9 +35,20 @@ class SatState(enum.IntEnum):
     SCIENCE = enum.auto()
 
 class StateEvaluator:
-    def __init__(self, df: pd.DataFrame):
+    # Defaults for results pickled before the time index existed
+    start_time = None
+    resolution = None
+    store = None
+    horizon = None
+    _offsets = None
+    _prefix = None
+
+    def __init__(self, df: pd.DataFrame, start_time = None, resolution:float = None, store = None):
         self.min_elevation = 10.0
         self.df = df
+        self.start_time = start_time
+        self.resolution = resolution
+        self.store = store
 
     def set_internal_min_elevation(self, min_elevation:np.float16):
         """ 
@@ -33,7 +59,25 @@ class StateEvaluator:
         min_elevation : np.float16
             The elevation at which LOS is determined
         """
-        self.min_elevaion = min_elevation
+        self.min_elevation = min_elevation
+        # The LOS prefix indexes depend on the elevation
+        self._prefix = None
+
+    def set_horizon_mask(self, horizon):
+        """
+        Set the azimuth dependent elevation masks used to evaluate LOS.
+
+        Stations without a mask keep using the minimum elevation, the
+        others use the higher of both, see `above_horizon`.
+
+        Parameters
+        ----------
+        horizon : HorizonMask
+            The masks of the stations, or None to only use the minimum
+            elevation.
+        """
+        self.horizon = horizon
+        self._prefix = None
 
     def get_length(self):
         """ 
@@ -57,6 +101,240 @@ class StateEvaluator:
         """
         return len(self.df)
 
+    def time_offsets(self) -> np.ndarray:
+        """
+        Get the time of every sample in seconds since `start_time`.
+
+        On a uniform grid the offsets are generated from the resolution,
+        otherwise they are computed once from the time column and cached.
+
+        Returns
+        -------
+        np.ndarray
+            A sorted array of offsets in seconds.
+        """
+        if self.resolution is not None:
+            return np.arange(self.get_length()) * float(self.resolution)
+        if self._offsets is None:
+            times = self['time']
+            if self.start_time is None:
+                self.start_time = times.iloc[0]
+            self._offsets = np.array([t - self.start_time for t in times], dtype=np.float64)
+        return self._offsets
+
+    def index_of(self, epoch, side:str = 'left'):
+        """
+        Find the rows of epochs by binary search over the time grid.
+
+        Parameters
+        ----------
+        epoch : godot.core.tempo.Epoch or list
+            The epoch, or epochs, to look for.
+        side : str
+            'left' gives the first row at or after the epoch,
+            'right' gives the first row after the epoch.
+
+        Returns
+        -------
+        int or np.ndarray
+            The row index of each epoch, between 0 and the length of the
+            dataframe.
+        """
+        if side not in ('left', 'right'):
+            raise ValueError("side must be either 'left' or 'right'")
+        scalar = np.ndim(epoch) == 0
+        epochs = [epoch] if scalar else epoch
+        if self.resolution is None:
+            offsets = self.time_offsets()
+            targets = np.array([t - self.start_time for t in epochs], dtype=np.float64)
+            index = np.searchsorted(offsets, targets, side=side)
+        else:
+            if self.start_time is None:
+                self.start_time = self['time'].iloc[0]
+            # Uniform grid, the tolerance keeps epochs on the grid on their own row
+            steps = np.array([t - self.start_time for t in epochs], dtype=np.float64) / self.resolution
+            if side == 'left':
+                index = np.ceil(steps - 1e-9)
+            else:
+                index = np.floor(steps + 1e-9) + 1
+            index = np.clip(index, 0, self.get_length())
+        index = index.astype(np.int64)
+        return int(index[0]) if scalar else index
+
+    def slice_rows(self, start:int, stop:int):
+        """
+        Get the rows in [start, stop) without copying the columns.
+
+        Parameters
+        ----------
+        start : int
+            The first row of the slice.
+        stop : int
+            The row after the last row of the slice.
+
+        Returns
+        -------
+        StateEvaluator
+            A StateEvaluator backed by a view of this dataframe.
+        """
+        start, stop, _ = slice(start, stop).indices(self.get_length())
+        stop = max(start, stop)
+        store = None if self.store is None else self.store.slice(start, stop)
+        res = StateEvaluator(self.df.iloc[start:stop], self.start_time, self.resolution, store)
+        res.min_elevation = self.min_elevation
+        res.horizon = self.horizon
+        if self.resolution is not None:
+            if self.start_time is not None:
+                res.start_time = self.start_time + start * float(self.resolution)
+        elif self._offsets is not None:
+            res._offsets = self._offsets[start:stop]
+        if self._prefix is not None:
+            # Differences of the parent index stay valid on a view of it
+            res._prefix = {key: prefix[start:stop + 1] for key, prefix in self._prefix.items()}
+        return res
+
+    def slice_time(self, t1, t2):
+        """
+        Get the samples with t1 <= time < t2 without copying the columns.
+
+        Parameters
+        ----------
+        t1 : godot.core.tempo.Epoch
+            The start of the range.
+        t2 : godot.core.tempo.Epoch
+            The end of the range, excluded.
+
+        Returns
+        -------
+        StateEvaluator
+            A StateEvaluator backed by a view of this dataframe.
+        """
+        start, stop = self.index_of([t1, t2])
+        return self.slice_rows(start, stop)
+
+    def prefix_index(self, key) -> np.ndarray:
+        """
+        Get the cumulative count of a flag or boolean column.
+
+        The index is built the first time it is asked for. Entry i is the
+        number of samples before row i where the key is True, so the count
+        over [start, stop) is index[stop] - index[start].
+
+        Parameters
+        ----------
+        key : SEEnum or str
+            A flag, combined flags, or the name of a boolean column.
+            The LOS columns (los_nn, los_cb, los_mg, los_aau) are derived
+            from the state if they have not been added.
+
+        Returns
+        -------
+        np.ndarray
+            An array with one more entry than the dataframe.
+        """
+        if self._prefix is None:
+            self._prefix = {}
+        cache_key = int(key) if isinstance(key, SEEnum) else key
+        if cache_key not in self._prefix:
+            if isinstance(key, SEEnum):
+                mask = self.has([key])
+            elif key in LOS_COLUMNS and key not in self.keys():
+                mask = self.los(LOS_COLUMNS[key])
+            else:
+                mask = self[key]
+            prefix = np.zeros(self.get_length() + 1, dtype=np.int32)
+            np.cumsum(mask.to_numpy(bool), out=prefix[1:])
+            self._prefix[cache_key] = prefix
+        return self._prefix[cache_key]
+
+    def build_prefix_index(self):
+        """
+        Build the prefix indexes of every flag and every LOS column.
+        """
+        for flag in SEEnum:
+            self.prefix_index(flag)
+        for column in LOS_COLUMNS:
+            self.prefix_index(column)
+
+    def count_rows(self, key, start, stop):
+        """
+        Count the samples in the rows [start, stop) where the key is True.
+
+        Parameters
+        ----------
+        key : SEEnum or str
+            The flag or column to count, see `prefix_index`.
+        start : int or np.ndarray
+            The first row of each range.
+        stop : int or np.ndarray
+            The row after the last row of each range.
+
+        Returns
+        -------
+        int or np.ndarray
+            The count of each range.
+        """
+        prefix = self.prefix_index(key)
+        return prefix[stop] - prefix[start]
+
+    def _rows(self, times, default:int):
+        if times is None:
+            return default
+        return self.index_of(times)
+
+    def coverage(self, key, t1 = None, t2 = None):
+        """
+        Get the fraction of samples in [t1, t2) where the key is True.
+
+        Parameters
+        ----------
+        key : SEEnum or str
+            The flag or column to count, see `prefix_index`.
+        t1 : godot.core.tempo.Epoch or list, optional
+            The start of each range, defaults to the first sample.
+        t2 : godot.core.tempo.Epoch or list, optional
+            The end of each range, defaults to after the last sample.
+
+        Returns
+        -------
+        float or np.ndarray
+            The coverage of each range, NaN for empty ranges.
+        """
+        start = self._rows(t1, 0)
+        stop = self._rows(t2, self.get_length())
+        count = self.count_rows(key, start, stop)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return count / np.asarray(stop - start, dtype=np.float64)
+
+    def duration(self, key, t1 = None, t2 = None):
+        """
+        Get the time in [t1, t2) where the key is True.
+
+        Parameters
+        ----------
+        key : SEEnum or str
+            The flag or column to count, see `prefix_index`.
+        t1 : godot.core.tempo.Epoch or list, optional
+            The start of each range, defaults to the first sample.
+        t2 : godot.core.tempo.Epoch or list, optional
+            The end of each range, defaults to after the last sample.
+
+        Returns
+        -------
+        float or np.ndarray
+            The duration of each range in seconds.
+
+        Raises
+        ------
+        ValueError:
+            If the time grid has no resolution
+        """
+        if self.resolution is None:
+            raise ValueError("duration needs the resolution of the time grid")
+        start = self._rows(t1, 0)
+        stop = self._rows(t2, self.get_length())
+        return self.count_rows(key, start, stop) * float(self.resolution)
+
     def elv(self, station: str) -> pd.Series:
         """
         Determine the elevation of the station.
@@ -73,7 +351,7 @@ class StateEvaluator:
             A series of elevation values for all timestamps
         
         """
-        return self.df[station]
+        return self[station]
     
     def above_elev(self, station:str, min_elevation:np.float16) -> pd.Series:
         """
@@ -90,6 +368,48 @@ class StateEvaluator:
             A series of boolean values for all timestamps
         """
         return self.elv(station) > min_elevation
+
+    def above_horizon(self, station:str) -> pd.Series:
+        """
+        Determine whether the station is above its elevation mask.
+
+        With a horizon mask the threshold is the higher of the mask in the
+        direction of the spacecraft and the minimum elevation: the mask
+        adds the terrain on top of the operational minimum, it can never
+        lower the threshold below `min_elevation`. A mask below it, e.g.
+        to use a low horizon over the sea, also needs a lower minimum
+        elevation, see `set_internal_min_elevation`.
+
+        Parameters
+        -----------
+        station : str
+            The station name, e.g. 'AAU'
+
+        Returns
+        -------
+        pd.Series
+            A series of boolean values for all timestamps
+        """
+        if self.horizon is None or station not in self.horizon.tables:
+            return self.above_elev(station + '_elev', self.min_elevation)
+        mask = self.horizon.min_elevation(station, self[station + '_azim'].to_numpy(np.float32))
+        return self.elv(station + '_elev') > np.maximum(mask, self.min_elevation)
+
+    def los(self, station:str) -> pd.Series:
+        """
+        Determine whether there is LOS from the station to the spacecraft.
+
+        Parameters
+        -----------
+        station : str
+            The station name, e.g. 'AAU'
+
+        Returns
+        -------
+        pd.Series
+            True where the moon is clear and the station is above its mask
+        """
+        return self.above_horizon(station) & self.has([STATIONS[station]])
     
     def has(self, flags: list[SEEnum]) -> pd.Series:
         """
@@ -109,26 +429,206 @@ class StateEvaluator:
 
         combined_flag = np.array(reduce(operator.or_, flags))
         # Vectorized check: each row should have all bits set
-        return (self.df['state'] & combined_flag) == combined_flag
+        return (self['state'] & combined_flag) == combined_flag
     
     def add_los_coloumns(self):
         """
         Add coloums containing the LOS states of the groundstations.
         """
-        los_nn = self.above_elev('NN11_elev', self.min_elevaion) & self.has([SEEnum.CLEAR_MOON_NN])
-        if not ('los_nn' in self.df.keys()):
+        los_nn = self.los('NN11')
+        if not ('los_nn' in self.keys()):
             self.df.insert(len(self.df.keys()),'los_nn',los_nn)
-        los_cb = self.above_elev('CB11_elev', self.min_elevaion) & self.has([SEEnum.CLEAR_MOON_CB])
-        if not ('los_cb' in self.df.keys()):
+        los_cb = self.los('CB11')
+        if not ('los_cb' in self.keys()):
             self.df.insert(len(self.df.keys()),'los_cb',los_cb)
-        los_mg = self.above_elev('MG11_elev', self.min_elevaion) & self.has([SEEnum.CLEAR_MOON_MG])
-        if not ('los_mg' in self.df.keys()):
+        los_mg = self.los('MG11')
+        if not ('los_mg' in self.keys()):
             self.df.insert(len(self.df.keys()),'los_mg',los_mg)
-        los_aau = self.above_elev('AAU_elev', self.min_elevaion) & self.has([SEEnum.CLEAR_MOON_AAU])
-        if not ('los_aau' in self.df.keys()):
+        los_aau = self.los('AAU')
+        if not ('los_aau' in self.keys()):
             self.df.insert(len(self.df.keys()),'los_aau',los_aau)
          
     
+    def get_windows(self, stations:list[str] = None, resolution:float = None) -> pd.DataFrame:
+        """
+        Extracts the windows of the station LOS, the gateway LOS and both
+        sunlight flags in a single compiled pass over the state space.
+
+        Parameters
+        ----------
+        stations : list[str], optional
+            The stations to find LOS windows for, defaults to all stations.
+        resolution : float, optional
+            The time between two samples, used to scale `duration`.
+            Defaults to the grid resolution, or 1 if it is unknown.
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per window with the columns `window`, `start`,
+            `stop` (exclusive), `duration`, `max_elev` and `min_dist`.
+            The statistics are NaN where the window has no such column.
+        """
+        if stations is None:
+            stations = list(STATIONS)
+        if resolution is None:
+            resolution = 1.0 if self.resolution is None else self.resolution
+        n_stations = len(stations)
+        names = list(stations) + ['GW', 'SUN_ON_SPACECRAFT', 'SUN_ON_MOON']
+        flags = [STATIONS[station] for station in stations]
+        flags += [SEEnum.LOS_GW, SEEnum.SUN_ON_SPACECRAFT, SEEnum.SUN_ON_MOON]
+
+        above = np.empty((self.get_length(), n_stations), dtype=np.bool_)
+        elevations = np.empty((self.get_length(), n_stations), dtype=np.float32)
+        distances = np.empty((self.get_length(), n_stations + 1), dtype=np.float32)
+        for index, station in enumerate(stations):
+            above[:, index] = self.above_horizon(station)
+            elevations[:, index] = self[station + '_elev']
+            distances[:, index] = self[station + '_dist']
+        distances[:, n_stations] = self['gw_dist']
+        elev_idx = list(range(n_stations)) + [-1, -1, -1]
+        dist_idx = list(range(n_stations)) + [n_stations, -1, -1]
+
+        channel, start, stop, max_elev, min_dist = extract_windows(
+            self['state'].to_numpy(np.uint8), above, elevations, distances,
+            np.array(flags, dtype=np.uint8),
+            np.array(elev_idx, dtype=np.int64),
+            np.array(dist_idx, dtype=np.int64))
+
+        return pd.DataFrame({
+            'window': pd.Categorical.from_codes(channel, names),
+            'start': start,
+            'stop': stop,
+            'duration': (stop - start) * resolution,
+            'max_elev': max_elev,
+            'min_dist': min_dist
+        })
+
+    def elevation_mask_curves(self, min_elevations, stations:list[str] = None) -> pd.DataFrame:
+        """
+        Evaluates the station coverage for a whole range of elevation masks.
+
+        The elevations of the LOS-clear samples are sorted once per station,
+        after which every mask is answered by binary search. A window starts
+        at a sample whose elevation is above the mask while the previous one
+        is not, so the window count of each mask is the number of rising
+        samples with previous elevation <= mask < elevation.
+
+        Parameters
+        ----------
+        min_elevations : np.ndarray
+            The elevation masks to evaluate, in degrees.
+        stations : list[str], optional
+            The stations to evaluate, defaults to all stations.
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per station and mask with the columns `station`,
+            `min_elevation`, `coverage`, `contact_time` and `windows`.
+            `contact_time` is in seconds, or samples if the resolution
+            is unknown.
+        """
+        if stations is None:
+            stations = list(STATIONS)
+        min_elevations = np.asarray(min_elevations, dtype=np.float64)
+        resolution = 1.0 if self.resolution is None else float(self.resolution)
+        n = self.get_length()
+
+        curves = []
+        for station in stations:
+            clear = self.has([STATIONS[station]]).to_numpy(bool)
+            elev = self[station + '_elev'].to_numpy(np.float64)
+            # Samples blocked by the moon are below every mask
+            elev = np.where(clear, elev, -np.inf)
+
+            above = np.sort(elev[clear])
+            count = above.size - np.searchsorted(above, min_elevations, side='right')
+
+            previous = np.concatenate([[-np.inf], elev[:-1]])
+            rising = elev > previous
+            lows = np.sort(previous[rising])
+            highs = np.sort(elev[rising])
+            windows = (np.searchsorted(lows, min_elevations, side='right')
+                       - np.searchsorted(highs, min_elevations, side='right'))
+
+            curves.append(pd.DataFrame({
+                'station': station,
+                'min_elevation': min_elevations,
+                'coverage': count / n if n else np.nan,
+                'contact_time': count * resolution,
+                'windows': windows
+            }))
+        return pd.concat(curves, ignore_index=True)
+
+    def best_station(self, stations:list[str] = None, score = 'elev', min_dwell:int = 0) -> pd.Series:
+        """
+        Picks the station to use in every sample.
+
+        Parameters
+        ----------
+        stations : list[str], optional
+            The stations to choose between, defaults to all stations.
+        score : str or callable
+            'elev' picks the highest elevation, 'dist' the shortest range.
+            A callable is called as score(self, station) and must return an
+            array where higher is better.
+        min_dwell : int
+            The minimum number of samples a station is kept while it is
+            visible, before handing over to a better one.
+
+        Returns
+        -------
+        pd.Series
+            A categorical series with the station of every sample,
+            NaN where no station is visible.
+        """
+        if stations is None:
+            stations = list(STATIONS)
+        visible = np.empty((self.get_length(), len(stations)), dtype=np.bool_)
+        scores = np.empty((self.get_length(), len(stations)), dtype=np.float64)
+        for index, station in enumerate(stations):
+            visible[:, index] = self.los(station)
+            if score == 'elev':
+                scores[:, index] = self[station + '_elev']
+            elif score == 'dist':
+                scores[:, index] = -self[station + '_dist'].to_numpy(np.float64)
+            elif callable(score):
+                scores[:, index] = score(self, station)
+            else:
+                raise ValueError("score must be 'elev', 'dist' or a callable")
+
+        assignment = assign_stations(visible, scores, int(min_dwell))
+        return pd.Series(pd.Categorical.from_codes(assignment, stations), index=self.df.index)
+
+    def handovers(self, assignment:pd.Series) -> pd.DataFrame:
+        """
+        Lists the samples where the used station changes.
+
+        Parameters
+        ----------
+        assignment : pd.Series
+            The station of every sample, as returned by `best_station`.
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per change with the columns `index` (the first sample
+            of the new station), `from`, `to` and `handover`, which is False
+            when the link is acquired or lost rather than handed over.
+        """
+        codes = assignment.cat.codes.to_numpy()
+        changes = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+        stations = assignment.cat.categories
+        source = pd.Categorical.from_codes(codes[changes - 1], stations)
+        target = pd.Categorical.from_codes(codes[changes], stations)
+        return pd.DataFrame({
+            'index': changes,
+            'from': source,
+            'to': target,
+            'handover': (codes[changes - 1] >= 0) & (codes[changes] >= 0)
+        })
+
     def has_not(self, flags: list[SEEnum]) -> pd.Series:
         """
         Checks if state does not have flag.
@@ -147,33 +647,44 @@ class StateEvaluator:
 
         combined_flag = reduce(operator.or_, flags)
         # Vectorized check: each row should have all bits set
-        return (self.df['state'] & combined_flag) != combined_flag
+        return (self['state'] & combined_flag) != combined_flag
     
     def __getitem__(self, key:int):
         """
         Fetch item from dataframe. Equivalent to df[key]
+
+        Columns that are only in the backing store are loaded into the
+        dataframe the first time they are fetched.
         
         Parameters
         ----------
-        key : int
-            The index to look for
+        key : str or list[str]
+            The column, or a list of columns
         
         Returns
         -------
             The contents of the index
         
         """
+        if self.store is not None:
+            columns = list(key) if isinstance(key, (list, np.ndarray, pd.Index)) else [key]
+            for column in columns:
+                if column not in self.df.keys() and column in self.store.keys():
+                    self.df[column] = self.store[column]
         return self.df[key]
     
     def keys(self):
         """
-        Get the keys of the pandas DataFrame
+        Get the keys of the pandas DataFrame, including the columns
+        that have not been loaded from the backing store yet.
 
         Returns:
         Index
         
         """
-        return self.df.keys()
+        if self.store is None:
+            return self.df.keys()
+        return self.df.keys().union(self.store.keys(), sort=False)
     
     def get_state(self, stations:list[str]):
         """
@@ -190,10 +701,10 @@ class StateEvaluator:
             If stations contains no stations
             If stations contains a station that is not either NN11, CB11 or MG11
         """
-        los_nn = self.above_elev('NN11_elev', self.min_elevaion) & self.has([SEEnum.CLEAR_MOON_NN])
-        los_cb = self.above_elev('CB11_elev', self.min_elevaion) & self.has([SEEnum.CLEAR_MOON_CB])
-        los_mg = self.above_elev('MG11_elev', self.min_elevaion) & self.has([SEEnum.CLEAR_MOON_MG])
-        los_aau = self.above_elev('AAU_elev', self.min_elevaion) & self.has([SEEnum.CLEAR_MOON_AAU])
+        los_nn = self.los('NN11')
+        los_cb = self.los('CB11')
+        los_mg = self.los('MG11')
+        los_aau = self.los('AAU')
         los = los_nn | los_cb | los_mg | los_aau
         som = self.has([SEEnum.SUN_ON_MOON])
         sos = self.has([SEEnum.SUN_ON_SPACECRAFT])
@@ -1,7 +1,111 @@
-from numba import njit
+from numba import njit, prange
 import numpy as np
 from .utils import is_closer, resize_vector_to_radius, compute_projection_matrix, project_point
 
+@njit
+def _dot(a, b):
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+@njit
+def _within(basis, d0, d1, d2, radius) -> bool:
+    # Whether the point at offset d from the sphere centre is within the
+    # sphere once both are projected onto the plane normal to the basis,
+    # see `VisibilityModel.calculate_within`
+    basis_len = np.sqrt(_dot(basis, basis))
+    n0 = basis[0] / basis_len
+    n1 = basis[1] / basis_len
+    n2 = basis[2] / basis_len
+    along = n0 * d0 + n1 * d1 + n2 * d2
+    q0 = d0 - n0 * along
+    q1 = d1 - n1 * along
+    q2 = d2 - n2 * along
+    return q0 * q0 + q1 * q1 + q2 * q2 < radius * radius
+
+@njit(parallel=True)
+def evaluate_geometry(sun, earth, sc, gw, stations, topocentric, flags, moon_radius, earth_radius,
+                      states, elevations, azimuths, st_dists, gw_dists):
+    """
+    Evaluates the states, elevations, azimuths and distances of a chunk of
+    samples in one pass, without allocating per sample.
+
+    It gives the same results as `VisibilityModel.los_from_gs_to_sc`,
+    `sun_light_on_spacecraft`, `sun_light_on_moon`, `get_elevation` and
+    `get_azimuth`, written out with scalars.
+
+    Parameters
+    ----------
+    sun, earth, sc, gw : (np.ndarray)
+        (n, 3) moon-centric vectors to the sun, earth, spacecraft and gateway.
+    stations : (np.ndarray)
+        (n, k, 3) moon-centric vectors to the ground stations.
+    topocentric : (np.ndarray)
+        (n, k, 3) vectors from each station to the spacecraft, in the local
+        East, North, Up frame of the station, see `utils.enu_axes`.
+    flags : (np.ndarray)
+        The bits of LOS_GW, SUN_ON_SPACECRAFT, SUN_ON_MOON and then the
+        clear moon bit of each station.
+    moon_radius, earth_radius : float
+        The radii of the moon and earth.
+    states : (np.ndarray)
+        (n,) output, the flags of every sample.
+    elevations, azimuths : (np.ndarray)
+        (n, k) output, the elevation and the azimuth, clockwise from North,
+        of the spacecraft in degrees.
+    st_dists : (np.ndarray)
+        (n, k) output, the distance from each station to the spacecraft.
+    gw_dists : (np.ndarray)
+        (n,) output, the distance from the gateway to the spacecraft.
+    """
+    for i in prange(sun.shape[0]):
+        s = sun[i]
+        e = earth[i]
+        c = sc[i]
+        g = gw[i]
+        state = 0
+
+        d0 = g[0] - c[0]
+        d1 = g[1] - c[1]
+        d2 = g[2] - c[2]
+        gw_dists[i] = np.sqrt(d0 * d0 + d1 * d1 + d2 * d2)
+        # From the spacecraft to the gateway, only the moon can block
+        if _dot(c, g) > 0 or not _within(c, g[0], g[1], g[2], moon_radius):
+            state |= flags[0]
+
+        # Sun on the spacecraft, unless the earth or moon is between them
+        sun_earth = np.sqrt((s[0] - e[0])**2 + (s[1] - e[1])**2 + (s[2] - e[2])**2)
+        sun_sc = np.sqrt((s[0] - c[0])**2 + (s[1] - c[1])**2 + (s[2] - c[2])**2)
+        lit = True
+        if sun_earth < sun_sc and _within(s, c[0] - e[0], c[1] - e[1], c[2] - e[2], earth_radius):
+            lit = False
+        if np.sqrt(_dot(s, s)) < sun_sc and _within(s, c[0], c[1], c[2], moon_radius):
+            lit = False
+        if lit:
+            state |= flags[1]
+
+        # Sun on the point of the moon below the spacecraft
+        scale = moon_radius / np.sqrt(_dot(c, c))
+        p0 = c[0] * scale
+        p1 = c[1] * scale
+        p2 = c[2] * scale
+        sun_point = np.sqrt((s[0] - p0)**2 + (s[1] - p1)**2 + (s[2] - p2)**2)
+        if not (sun_earth < sun_point and _within(s, p0 - e[0], p1 - e[1], p2 - e[2], earth_radius)):
+            if p0 * s[0] + p1 * s[1] + p2 * s[2] > 0:
+                state |= flags[2]
+
+        for j in range(stations.shape[1]):
+            station = stations[i, j]
+            if _dot(station, c) > 0 or not _within(station, c[0], c[1], c[2], moon_radius):
+                state |= flags[3 + j]
+            v = topocentric[i, j]
+            rxy = np.sqrt(v[0] * v[0] + v[1] * v[1])
+            st_dists[i, j] = np.sqrt(v[0] * v[0] + v[1] * v[1] + v[2] * v[2])
+            elevations[i, j] = np.degrees(np.arctan2(v[2], rxy))
+            azim = np.degrees(np.arctan2(v[0], v[1]))
+            if azim < 0:
+                azim += 360.0
+            azimuths[i, j] = azim
+        states[i] = state
+
 class VisibilityModel:
     def __init__(self, moon_radius:float=1737.4, earth_radius:float=6371):
         self.moon_radius:float = moon_radius
@@ -146,7 +250,8 @@ class VisibilityModel:
         Parameters
         ----------
         vec : (np.ndarray)
-            Tropocentric vector from groundstation to spacecraft.
+            Vector from groundstation to spacecraft in a topocentric frame
+            with the third axis up, e.g. East, North, Up.
         
         Returns
         -------
@@ -156,6 +261,30 @@ class VisibilityModel:
         rxy = np.sqrt(vec[0] * vec[0] + vec[1] * vec[1])
         elev = np.arctan2(vec[2], rxy)
         return np.degrees(elev)
+
+    @staticmethod
+    @njit
+    def get_azimuth(vec) -> np.float16:
+        """ Calculates the azimuth of the spacecraft, as seen from a GS
+
+        The azimuth is the compass azimuth, measured from North clockwise
+        towards East, which is the convention of the horizon masks.
+
+        Parameters
+        ----------
+        vec : (np.ndarray)
+            Vector from groundstation to spacecraft in the local East,
+            North, Up frame of the station.
+        
+        Returns
+        -------
+        np.float16
+            The azimuth in degrees, in the range [0, 360)
+        """
+        azim = np.degrees(np.arctan2(vec[0], vec[1]))
+        if azim < 0:
+            azim += 360.0
+        return azim
     
 if __name__ == "__main__":
     NN_moon_block = VisibilityModel()
\ No newline at end of file
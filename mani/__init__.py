@@ -1,14 +1,25 @@
 from .StateEvaluator import StateEvaluator, SEEnum, SatState
 from .VisibilityModel import VisibilityModel
+from .ResultStore import ResultStore
+from .HorizonMask import HorizonMask
+from .LinkBudget import LinkBudget, DVBS2, station_rates, budget_rates
+from .Pipeline import Pipeline, file_hash, source_hash
 from .GodotEvaluator import GodotHandler
 from .HaloOrbit import HaloOrbit
-from .utils import get_view_times_span, get_view_time_lengths, get_view_times_spans
+from .utils import get_view_times_span, get_view_time_lengths, get_view_times_spans, extract_windows
 from .UniversePlotter import Sphere, Plane, UniversePlotter
 
 __all__ = [
     "StateEvaluator",
     "SEEnum",
     "VisibilityModel",
+    "ResultStore",
+    "HorizonMask",
+    "LinkBudget",
+    "DVBS2",
+    "station_rates",
+    "budget_rates",
+    "Pipeline",
     "GodotHandler",
     "HaloOrbit",
     "UniversePlotter"
@@ -1,7 +1,9 @@
 import unittest
+import numpy as np
 from godot.core.tempo import Epoch
 from mani import GodotHandler
-from StateEvaluator import StateEvaluator, SEEnum
+from mani.StateEvaluator import StateEvaluator, SEEnum, STATIONS
+from mani.VisibilityModel import VisibilityModel
 
 class TestStateMachine(unittest.TestCase):
     def __init__(self, methodName = "runTest"):
@@ -101,5 +103,16 @@ class TestStateMachine(unittest.TestCase):
         for i in range(condition.size):
             self.assertEqual(condition[i], old_good[i])
 
+    def testElevationFrame(self):
+        # The elevation in the geodetic axes of the stations matches the one
+        # in the station frames of the universe, used before the azimuth
+        t = Epoch('2026-09-02T10:30:01 TDB')
+        godotHandler = GodotHandler(t, t, 30.0, './universe.yml')
+        gw_dists, elevations, azimuths, states, st_dists = godotHandler._evaluate_timestamps([t])
+        uni = godotHandler.fetch_universe()
+        for index, station in enumerate(STATIONS):
+            old = VisibilityModel.get_elevation(np.asarray(uni.frames.vector3(station, 'SC', station, t)))
+            self.assertAlmostEqual(float(elevations[0, index]), float(old), delta=0.1)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,71 @@
+import unittest
+import numpy as np
+import pandas as pd
+from mani.HorizonMask import HorizonMask
+from mani.StateEvaluator import StateEvaluator, SEEnum
+from mani.VisibilityModel import VisibilityModel
+from mani.utils import enu_axes
+
+class TestHorizonMask(unittest.TestCase):
+    def __init__(self, methodName = "runTest"):
+        super().__init__(methodName)
+        self.mask = HorizonMask({'AAU': {'azimuth': [0, 90, 180, 270],
+                                         'elevation': [5, 30, 5, 0]}})
+
+    # Test cases for "min_elevation" method
+    def test_min_elevation(self):
+        azimuth = np.array([0, 45, 90, 180, 315, 360, 405])
+        expected = np.array([5, 17.5, 30, 5, 2.5, 5, 17.5])
+        np.testing.assert_array_almost_equal(self.mask.min_elevation('AAU', azimuth), expected, decimal=4)
+
+    def test_invalid_mask(self):
+        with self.assertRaises(ValueError):
+            HorizonMask({'AAU': {'azimuth': [0, 90], 'elevation': [5]}})
+
+    # Test cases for LOS with a horizon mask
+    def test_above_horizon(self):
+        df = pd.DataFrame({
+            'AAU_elev': np.array([12, 12, 12, 25], dtype=np.float16),
+            'AAU_azim': np.array([0, 90, 270, 45], dtype=np.float16),
+            'state': np.full(4, SEEnum.CLEAR_MOON_AAU, dtype=np.uint8)
+        })
+        res = StateEvaluator(df)
+        np.testing.assert_array_equal(res.los('AAU').values, [True, True, True, True])
+        res.set_horizon_mask(self.mask)
+        np.testing.assert_array_equal(res.los('AAU').values, [True, False, True, True])
+        res.set_internal_min_elevation(15.0)
+        np.testing.assert_array_equal(res.los('AAU').values, [False, False, False, True])
+
+    # Test cases with a known station geometry
+    def test_asymmetric_mask(self):
+        # A station at 57 N, 10 E on the WGS84 ellipsoid
+        a, f = 6378.137, 1/298.257223563
+        e2 = f * (2 - f)
+        lat, lon = np.radians(57.0), np.radians(10.0)
+        n = a / np.sqrt(1 - e2 * np.sin(lat)**2)
+        position = np.array([n * np.cos(lat) * np.cos(lon), n * np.cos(lat) * np.sin(lon), n * (1 - e2) * np.sin(lat)])
+        axes = enu_axes(position)
+        # The celestial pole is due North at the geodetic latitude
+        pole = axes @ np.array([0.0, 0.0, 1.0])
+        self.assertAlmostEqual(VisibilityModel.get_azimuth(pole), 0.0, places=6)
+        self.assertAlmostEqual(VisibilityModel.get_elevation(pole), 57.0, places=6)
+        # Targets 20 degrees up, due East and due West
+        up, east = axes[2], axes[0]
+        targets = [np.cos(np.radians(20)) * d * east + np.sin(np.radians(20)) * up for d in (1, -1)]
+        enu = np.array([axes @ target for target in targets])
+        azimuth = np.array([VisibilityModel.get_azimuth(v) for v in enu])
+        np.testing.assert_array_almost_equal(azimuth, [90.0, 270.0])
+        # A mask that is high towards the East only
+        mask = HorizonMask({'AAU': {'azimuth': [0, 60, 90, 120, 180, 270],
+                                    'elevation': [5, 5, 40, 5, 5, 5]}})
+        df = pd.DataFrame({
+            'AAU_elev': np.array([VisibilityModel.get_elevation(v) for v in enu], dtype=np.float16),
+            'AAU_azim': azimuth.astype(np.float16),
+            'state': np.full(2, SEEnum.CLEAR_MOON_AAU, dtype=np.uint8)
+        })
+        res = StateEvaluator(df)
+        res.set_horizon_mask(mask)
+        np.testing.assert_array_equal(res.los('AAU').values, [False, True])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+import numpy as np
+import pandas as pd
+from mani.LinkBudget import LinkBudget, DVBS2, DVB_S2_MODCODS, station_rates, budget_rates
+
+class TestLinkBudget(unittest.TestCase):
+    def __init__(self, methodName = "runTest"):
+        super().__init__(methodName)
+        self.dvb = DVBS2(100e6)
+        self.link = LinkBudget(eirp=40.0, gt=30.0, frequency=26e9, bandwidth=100e6, zenith_loss=0.5)
+
+    # Test cases for "DVBS2" class
+    def test_modcod_at_rate(self):
+        self.assertEqual(self.dvb.modcod_at_rate(60e6)['name'], 'QPSK 1/3')
+        self.assertEqual(int(self.dvb.modcod_at_rate(404e6)['efficiency'] * self.dvb.symbol_rate), 404820636)
+
+    def test_rate(self):
+        esno = np.array([np.nan, -5.0, -2.35, 5.9, 100.0])
+        rates = self.dvb.rate(esno)
+        # The same as the fastest MODCOD each Es/N0 closes
+        expected = [0.0 if np.isnan(e) else
+                    max([m['efficiency'] for m in DVB_S2_MODCODS if m['esno'] <= e], default=0.0) * self.dvb.symbol_rate
+                    for e in esno]
+        np.testing.assert_allclose(rates, expected)
+        self.assertTrue(np.all(np.diff(self.dvb.steps) > 0))
+
+    def test_fixed_rate(self):
+        modcod = self.dvb.modcod_at_rate(60e6)
+        rates = self.dvb.fixed_rate([np.nan, modcod['esno'] - 0.01, modcod['esno'], 30.0], 60e6)
+        full = modcod['efficiency'] * self.dvb.symbol_rate
+        np.testing.assert_allclose(rates, [0, 0, full, full])
+
+    # Test cases for "LinkBudget" class
+    def test_snr(self):
+        distance = np.array([3.8e8, 3.8e8, 4.0e8, 3.8e8])
+        elevation = np.array([90.0, 30.0, 90.0, -1.0])
+        esno = self.link.snr(distance, elevation)
+        # Twice the zenith loss at 30 degrees, 20log10 of the distance ratio further away
+        self.assertAlmostEqual(esno[0] - esno[1], 0.5)
+        self.assertAlmostEqual(esno[0] - esno[2], 20*np.log10(4.0/3.8))
+        self.assertTrue(np.isnan(esno[3]))
+        np.testing.assert_allclose(self.link.snr(distance[:1], elevation[:1], np.array([2.0])), esno[0] - 2.0)
+
+    # Test cases for "station_rates" function
+    def test_station_rates(self):
+        res = pd.DataFrame({'NN11_dist': np.array([3.8e5, 3.9e5, 4.0e5]), 'NN11_elev': np.array([40.0, 5.0, 60.0]),
+                            'AAU_dist': np.array([3.8e5, 3.9e5, 4.0e5]), 'AAU_elev': np.array([10.0, 20.0, 30.0])})
+        condition = np.array([True, False, True])
+        rates, esno = station_rates(res, 'NN11', condition, self.link.snr, self.link.dvb)
+        self.assertTrue(np.isnan(esno[1]))
+        self.assertEqual(rates[1], 0)
+        np.testing.assert_allclose(esno[[0, 2]], self.link.snr(np.array([3.8e8, 4.0e8]), np.array([40.0, 60.0])))
+        np.testing.assert_allclose(rates, self.link.dvb.rate(esno))
+        # Any callable, evaluated on the usable samples only
+        calls = []
+        def snr(distance, elevation):
+            calls.append(len(distance))
+            return np.full(len(distance), 10.0)
+        rates, esno = station_rates(res, 'AAU', condition, snr, self.dvb, rate=60e6)
+        self.assertEqual(calls, [2])
+        np.testing.assert_allclose(rates, [self.dvb.fixed_rate(10.0, 60e6), 0, self.dvb.fixed_rate(10.0, 60e6)])
+
+    # Test cases for "budget_rates" function
+    def test_budget_rates(self):
+        class Link:
+            # A fade that grows with every call, like a rain model stepped per sample
+            def __init__(self, link):
+                self.link, self.steps = link, 0
+            def snr_at_t(self, distance, elevation):
+                self.steps += 1
+                return float(self.link.snr(np.array([distance]), np.array([elevation]))[0]) - self.steps
+            def dvb_s2_fixed_rate(self, esno, rate):
+                return float(self.link.dvb.fixed_rate(esno, rate))
+        res = pd.DataFrame({'AAU_dist': np.linspace(3.8e5, 4.0e5, 8), 'AAU_elev': np.linspace(5.0, 60.0, 8)})
+        condition = np.array([False, True, True, False, True, False, False, True])
+        rates, esno = budget_rates(res, 'AAU', condition, Link(self.link), 60e6)
+        # The same as stepping through the samples one by one
+        link = Link(self.link)
+        expected_esno = np.full(8, np.nan)
+        expected_rates = np.zeros(8)
+        for i in range(8):
+            if condition[i]:
+                expected_esno[i] = link.snr_at_t(res['AAU_dist'][i] * 1e3, res['AAU_elev'][i])
+                expected_rates[i] = link.dvb_s2_fixed_rate(expected_esno[i], 60e6)
+        np.testing.assert_allclose(esno, expected_esno)
+        np.testing.assert_allclose(rates, expected_rates)
+        rates, esno = budget_rates(res, 'AAU', np.zeros(8, dtype=bool), Link(self.link), 60e6)
+        self.assertTrue(np.all(np.isnan(esno)) and np.all(rates == 0))
+
+if __name__ == "__main__":
+    unittest.main()
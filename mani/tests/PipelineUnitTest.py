@@ -0,0 +1,86 @@
+import os
+import json
+import tempfile
+import unittest
+import numpy as np
+from mani.Pipeline import Pipeline, file_hash, source_hash
+
+class TestPipeline(unittest.TestCase):
+    def __init__(self, methodName = "runTest"):
+        super().__init__(methodName)
+        self.builds = []
+
+    def build(self, name, value):
+        def build(path):
+            self.builds.append(name)
+            np.save(os.path.join(path, 'value.npy'), np.array([value]))
+            return {'value': value}
+        return build
+
+    def chain(self, pipe, a, b):
+        first = pipe.run('first', {'a': a}, self.build('first', a))
+        second = pipe.run('second', {'b': b}, self.build('second', b), [first])
+        return first, second
+
+    # Test cases for "run" method
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as root:
+            pipe = Pipeline(root, verbose=False)
+            first, second = self.chain(pipe, 1, 2)
+            self.assertEqual(self.builds, ['first', 'second'])
+            self.assertEqual(np.load(os.path.join(second['path'], 'value.npy'))[0], 2)
+            # Nothing changed, nothing is built
+            cached = self.chain(pipe, 1, 2)
+            self.assertEqual(self.builds, ['first', 'second'])
+            self.assertEqual(cached[1]['results'], {'value': 2})
+            self.assertEqual(cached[1]['path'], second['path'])
+            # A later stage reruns alone
+            self.chain(pipe, 1, 3)
+            self.assertEqual(self.builds, ['first', 'second', 'second'])
+            # An earlier stage reruns the stages after it
+            self.chain(pipe, 4, 3)
+            self.assertEqual(self.builds, ['first', 'second', 'second', 'first', 'second'])
+            Pipeline(root, force=['first'], verbose=False).run('first', {'a': 1}, self.build('first', 1))
+            self.assertEqual(self.builds[-1], 'first')
+
+    def test_failed_build(self):
+        with tempfile.TemporaryDirectory() as root:
+            pipe = Pipeline(root, verbose=False)
+            def build(path):
+                raise ValueError("failed")
+            with self.assertRaises(ValueError):
+                pipe.run('stage', {}, build)
+            # Nothing is left that could be taken for a cached stage
+            self.assertEqual(os.listdir(os.path.join(root, 'stage')), [])
+            stage = pipe.run('stage', {}, self.build('stage', 0))
+            with open(os.path.join(stage['path'], 'stage.json')) as f:
+                self.assertEqual(json.load(f)['key'], stage['key'])
+
+    # Test cases for "file_hash" function
+    def test_file_hash(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, 'a.txt')
+            with open(path, 'w') as f:
+                f.write('a')
+            before = file_hash(path)
+            self.assertEqual(before, file_hash(path))
+            with open(path, 'w') as f:
+                f.write('b')
+            self.assertNotEqual(before, file_hash(path))
+
+    # Test cases for "source_hash" function
+    def test_source_hash(self):
+        with tempfile.TemporaryDirectory() as root:
+            namespace = {}
+            for i, body in enumerate(['return 1', 'return 2']):
+                path = os.path.join(root, f'stage_{i}.py')
+                with open(path, 'w') as f:
+                    f.write(f"def stage():\n    {body}\n")
+                exec(compile(open(path).read(), path, 'exec'), namespace)
+                namespace[body] = source_hash(namespace['stage'])
+            self.assertNotEqual(namespace['return 1'], namespace['return 2'])
+        self.assertEqual(source_hash(Pipeline.run), source_hash(Pipeline.run))
+        self.assertNotEqual(source_hash(Pipeline.run), source_hash(Pipeline.key))
+
+if __name__ == "__main__":
+    unittest.main()
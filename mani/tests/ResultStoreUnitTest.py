@@ -0,0 +1,58 @@
+import os
+import unittest
+import tempfile
+import numpy as np
+import pandas as pd
+from mani.StateEvaluator import StateEvaluator, SEEnum
+from mani.ResultStore import ResultStore
+
+class TestResultStore(unittest.TestCase):
+    def __init__(self, methodName = "runTest"):
+        super().__init__(methodName)
+        self.df = pd.DataFrame({
+            'gw_dist': np.arange(100, dtype=np.uint32),
+            'AAU_elev': np.linspace(-20, 60, 100).astype(np.float16),
+            'AAU_dist': np.linspace(1e3, 2e3, 100).astype(np.float32),
+            'state': np.resize(np.array([0, SEEnum.CLEAR_MOON_AAU], dtype=np.uint8), 100)
+        })
+
+    def save(self, folder):
+        path = os.path.join(folder, 'store')
+        ResultStore.save(StateEvaluator(self.df, None, 60.0), path)
+        return path
+
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as folder:
+            res = ResultStore.load(self.save(folder))
+            self.assertEqual(res.get_length(), 100)
+            self.assertEqual(res.resolution, 60.0)
+            for key in self.df.keys():
+                np.testing.assert_array_equal(res[key].values, self.df[key].values)
+                self.assertEqual(res[key].dtype, self.df[key].dtype)
+
+    def test_lazy_columns(self):
+        with tempfile.TemporaryDirectory() as folder:
+            res = ResultStore.load(self.save(folder), columns=['state'])
+            self.assertEqual(list(res.df.keys()), ['state'])
+            self.assertIn('AAU_elev', res.keys())
+            res.above_elev('AAU_elev', 10.0)
+            self.assertEqual(list(res.df.keys()), ['state', 'AAU_elev'])
+
+    def test_list_keys(self):
+        with tempfile.TemporaryDirectory() as folder:
+            res = ResultStore.load(self.save(folder), columns=['state'])
+            sub = res[['state', 'AAU_elev', 'AAU_dist']]
+            self.assertEqual(list(sub.columns), ['state', 'AAU_elev', 'AAU_dist'])
+            np.testing.assert_array_equal(sub['AAU_dist'].values, self.df['AAU_dist'].values)
+            self.assertEqual(list(res.df.keys()), ['state', 'AAU_elev', 'AAU_dist'])
+
+    def test_slice(self):
+        with tempfile.TemporaryDirectory() as folder:
+            res = ResultStore.load(self.save(folder))
+            sub = res.slice_rows(10, 20)
+            np.testing.assert_array_equal(sub['AAU_dist'].values, self.df['AAU_dist'].values[10:20])
+            np.testing.assert_array_equal(sub.has([SEEnum.CLEAR_MOON_AAU]).values,
+                                          (self.df['state'].values[10:20] & SEEnum.CLEAR_MOON_AAU) > 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import unittest
+import numpy as np
+import pandas as pd
+from mani.StateEvaluator import StateEvaluator, SEEnum
+
+class TestStateEvaluator(unittest.TestCase):
+    def __init__(self, methodName = "runTest"):
+        super().__init__(methodName)
+        clear = SEEnum.CLEAR_MOON_NN | SEEnum.CLEAR_MOON_CB | SEEnum.CLEAR_MOON_MG | SEEnum.CLEAR_MOON_AAU
+        state = np.full(10, clear, dtype=np.int64)
+        state[2:5] |= SEEnum.LOS_GW
+        state[0:3] |= SEEnum.SUN_ON_MOON
+        state[6] &= ~SEEnum.CLEAR_MOON_AAU
+        state = state.astype(np.uint8)
+        elev = np.array([5, 12, 20, 30, 25, 15, 40, 50, 9, 11], dtype=np.float16)
+        dist = np.arange(10, 0, -1, dtype=np.float32)
+        self.df = pd.DataFrame({
+            'gw_dist': np.arange(10, dtype=np.uint32),
+            'NN11_elev': elev, 'CB11_elev': elev, 'MG11_elev': elev, 'AAU_elev': elev,
+            'NN11_dist': dist, 'CB11_dist': dist, 'MG11_dist': dist, 'AAU_dist': dist,
+            'state': state
+        })
+
+    # Test cases for "get_windows" method
+    def test_get_windows_station(self):
+        res = StateEvaluator(self.df)
+        windows = res.get_windows(['AAU'], resolution=60.0)
+        aau = windows[windows['window'] == 'AAU']
+        np.testing.assert_array_equal(aau['start'], [1, 7, 9])
+        np.testing.assert_array_equal(aau['stop'], [6, 8, 10])
+        np.testing.assert_array_equal(aau['duration'], [300.0, 60.0, 60.0])
+        np.testing.assert_array_equal(aau['max_elev'], [30.0, 50.0, 11.0])
+        np.testing.assert_array_equal(aau['min_dist'], [5.0, 3.0, 1.0])
+
+    def test_get_windows_flags(self):
+        res = StateEvaluator(self.df)
+        windows = res.get_windows([])
+        gw = windows[windows['window'] == 'GW']
+        np.testing.assert_array_equal(gw[['start', 'stop']].values, [[2, 5]])
+        self.assertEqual(gw['min_dist'].item(), 2.0)
+        som = windows[windows['window'] == 'SUN_ON_MOON']
+        np.testing.assert_array_equal(som[['start', 'stop']].values, [[0, 3]])
+        self.assertTrue(np.isnan(som['max_elev'].item()))
+        self.assertEqual(np.sum(windows['window'] == 'SUN_ON_SPACECRAFT'), 0)
+
+    def test_get_windows_matches_los(self):
+        res = StateEvaluator(self.df)
+        windows = res.get_windows(['NN11'])
+        nn = windows[windows['window'] == 'NN11']
+        mask = np.zeros(res.get_length(), dtype=bool)
+        for start, stop in nn[['start', 'stop']].values:
+            mask[start:stop] = True
+        los = res.above_elev('NN11_elev', 10.0) & res.has([SEEnum.CLEAR_MOON_NN])
+        np.testing.assert_array_equal(mask, los.values)
+
+    # Test cases for the time index
+    def test_index_of_uniform(self):
+        res = StateEvaluator(self.df, 0.0, 60.0)
+        self.assertEqual(res.index_of(120.0), 2)
+        self.assertEqual(res.index_of(120.0, side='right'), 3)
+        self.assertEqual(res.index_of(130.0), 3)
+        self.assertEqual(res.index_of(-60.0), 0)
+        self.assertEqual(res.index_of(6000.0), 10)
+
+    def test_index_of_irregular(self):
+        df = self.df.copy()
+        df.insert(0, 'time', [0.0, 1.0, 5.0, 6.0, 10.0, 11.0, 12.0, 20.0, 21.0, 30.0])
+        res = StateEvaluator(df)
+        self.assertEqual(res.index_of(5.0), 2)
+        self.assertEqual(res.index_of(5.0, side='right'), 3)
+        self.assertEqual(res.index_of(15.0), 7)
+
+    def test_index_of_many(self):
+        res = StateEvaluator(self.df, 0.0, 60.0)
+        epochs = [-60.0, 0.0, 120.0, 130.0, 6000.0]
+        np.testing.assert_array_equal(res.index_of(epochs), [res.index_of(t) for t in epochs])
+        np.testing.assert_array_equal(res.index_of(epochs, side='right'),
+                                      [res.index_of(t, side='right') for t in epochs])
+        df = self.df.copy()
+        df.insert(0, 'time', [0.0, 1.0, 5.0, 6.0, 10.0, 11.0, 12.0, 20.0, 21.0, 30.0])
+        res = StateEvaluator(df)
+        np.testing.assert_array_equal(res.index_of([5.0, 15.0, 40.0]), [2, 7, 10])
+
+    def test_slice_time(self):
+        res = StateEvaluator(self.df, 0.0, 60.0)
+        sub = res.slice_time(120.0, 300.0)
+        self.assertEqual(sub.get_length(), 3)
+        self.assertEqual(sub.start_time, 120.0)
+        self.assertEqual(sub.index_of(180.0), 1)
+        self.assertTrue(np.shares_memory(sub['state'].values, res['state'].values))
+
+    # Test cases for the prefix indexes
+    def test_count_rows(self):
+        res = StateEvaluator(self.df, 0.0, 60.0)
+        self.assertEqual(res.count_rows(SEEnum.LOS_GW, 0, 10), 3)
+        self.assertEqual(res.count_rows(SEEnum.LOS_GW, 3, 10), 2)
+        np.testing.assert_array_equal(res.count_rows('los_aau', [0, 5, 7], [5, 10, 10]), [4, 3, 2])
+
+    def test_coverage_and_duration(self):
+        res = StateEvaluator(self.df, 0.0, 60.0)
+        self.assertAlmostEqual(res.coverage(SEEnum.SUN_ON_MOON), 0.3)
+        self.assertAlmostEqual(res.coverage(SEEnum.SUN_ON_MOON, 60.0, 240.0), 2 / 3)
+        np.testing.assert_array_equal(res.duration('los_nn', [0.0, 300.0], [300.0, 600.0]), [240.0, 240.0])
+        self.assertEqual(res.slice_rows(2, 6).count_rows(SEEnum.LOS_GW, 0, 4), 3)
+
+    # Test cases for "elevation_mask_curves" method
+    def test_elevation_mask_curves(self):
+        res = StateEvaluator(self.df, 0.0, 60.0)
+        masks = [0.0, 10.0, 20.0, 45.0, 60.0]
+        curves = res.elevation_mask_curves(masks, ['AAU'])
+        for mask, row in zip(masks, curves.itertuples()):
+            res.set_internal_min_elevation(mask)
+            windows = res.get_windows(['AAU'])
+            aau = windows[windows['window'] == 'AAU']
+            self.assertEqual(row.windows, len(aau))
+            self.assertEqual(row.contact_time, aau['duration'].sum())
+        np.testing.assert_array_almost_equal(curves['coverage'], [0.9, 0.7, 0.3, 0.1, 0.0])
+
+    # Test cases for "best_station" and "handovers" methods
+    def station_df(self):
+        df = self.df.copy()
+        df['NN11_elev'] = np.array([5, 12, 20, 30, 25, 15, 40, 50, 9, 11], dtype=np.float16)
+        df['AAU_elev'] = np.array([22, 22, 22, 22, 22, 22, 22, 22, 22, 5], dtype=np.float16)
+        df['AAU_dist'] = np.full(10, 5.5, dtype=np.float32)
+        return df
+
+    def test_best_station(self):
+        res = StateEvaluator(self.station_df())
+        best = res.best_station(['NN11', 'AAU'])
+        expected = ['AAU', 'AAU', 'AAU', 'NN11', 'NN11', 'AAU', 'NN11', 'NN11', 'AAU', 'NN11']
+        self.assertEqual(list(best), expected)
+
+    def test_best_station_min_dwell(self):
+        res = StateEvaluator(self.station_df())
+        best = res.best_station(['NN11', 'AAU'], min_dwell=3)
+        expected = ['AAU', 'AAU', 'AAU', 'NN11', 'NN11', 'NN11', 'NN11', 'NN11', 'AAU', 'NN11']
+        self.assertEqual(list(best), expected)
+
+    def test_handovers(self):
+        df = self.station_df()
+        df['state'] = np.where(np.arange(10) == 9, 0, df['state']).astype(np.uint8)
+        res = StateEvaluator(df)
+        events = res.handovers(res.best_station(['NN11', 'AAU'], score='dist'))
+        np.testing.assert_array_equal(events['index'], [5, 8, 9])
+        self.assertEqual(list(events['handover']), [True, True, False])
+        self.assertEqual(list(events['from']), ['AAU', 'NN11', 'AAU'])
+        self.assertTrue(pd.isna(events['to'].iloc[2]))
+
+if __name__ == "__main__":
+    unittest.main()
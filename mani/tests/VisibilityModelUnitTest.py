@@ -1,6 +1,6 @@
 import unittest
 import numpy as np
-from VisibilityModel import VisibilityModel
+from mani.VisibilityModel import VisibilityModel, evaluate_geometry
 
 class TestVisibilityModel(unittest.TestCase):
     def __init__(self, methodName = "runTest"):
@@ -123,5 +123,52 @@ class TestVisibilityModel(unittest.TestCase):
         moon_sc = np.array([0, -3, 0], dtype=np.float64)
         self.assertFalse(self.evaluator.sun_light_on_moon(moon_sun, moon_earth, moon_sc))
 
+    # Test cases for "get_azimuth" method
+    def test_get_azimuth(self):
+        # East, North, Up, clockwise from North
+        self.assertAlmostEqual(self.evaluator.get_azimuth(np.array([1, 0, 1], dtype=np.float64)), 90.0)
+        self.assertAlmostEqual(self.evaluator.get_azimuth(np.array([0, 1, 0], dtype=np.float64)), 0.0)
+        self.assertAlmostEqual(self.evaluator.get_azimuth(np.array([-1, 0, 0], dtype=np.float64)), 270.0)
+        self.assertAlmostEqual(self.evaluator.get_azimuth(np.array([-1, -1, 5], dtype=np.float64)), 225.0)
+
+    # Test cases for "evaluate_geometry" function
+    def test_evaluate_geometry(self):
+        rng = np.random.default_rng(0)
+        n, k = 2000, 4
+        sun = rng.normal(size=(n, 3)) * 100
+        earth = rng.normal(size=(n, 3)) * 5
+        sc = rng.normal(size=(n, 3)) * 3
+        gw = rng.normal(size=(n, 3)) * 3
+        stations = earth[:, None, :] + rng.normal(size=(n, k, 3))
+        topocentric = rng.normal(size=(n, k, 3))
+        flags = np.array([64, 1, 2, 4, 8, 16, 32], dtype=np.uint8)
+        states = np.empty(n, dtype=np.uint8)
+        elevations = np.empty((n, k))
+        azimuths = np.empty((n, k))
+        st_dists = np.empty((n, k), dtype=np.float32)
+        gw_dists = np.empty(n, dtype=np.uint32)
+        evaluate_geometry(sun, earth, sc, gw, stations, topocentric, flags, self.evaluator.moon_radius,
+                          self.evaluator.earth_radius, states, elevations, azimuths, st_dists, gw_dists)
+        # The same as the per sample methods
+        for i in range(n):
+            state = 0
+            if self.evaluator.los_from_gs_to_sc(gw[i], sc[i]):
+                state |= 64
+            if self.evaluator.sun_light_on_spacecraft(sun[i], earth[i], sc[i]):
+                state |= 1
+            if self.evaluator.sun_light_on_moon(sun[i], earth[i], sc[i]):
+                state |= 2
+            for j in range(k):
+                if self.evaluator.los_from_gs_to_sc(sc[i], stations[i, j]):
+                    state |= flags[3 + j]
+                self.assertAlmostEqual(elevations[i, j], self.evaluator.get_elevation(topocentric[i, j]))
+                self.assertAlmostEqual(azimuths[i, j], self.evaluator.get_azimuth(topocentric[i, j]))
+                self.assertAlmostEqual(st_dists[i, j], np.linalg.norm(topocentric[i, j]), places=5)
+            self.assertEqual(states[i], state)
+            self.assertEqual(gw_dists[i], int(np.linalg.norm(gw[i] - sc[i])))
+        # Both outcomes of every flag are covered
+        for flag in flags:
+            self.assertTrue(0 < np.sum(states & flag > 0) < n)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -82,6 +82,36 @@ def is_closer(vector1:float, vector2:float) -> bool:
 def get_eye():
     return np.array([[1,0,0],[0,1,0],[0,0,1]],dtype=np.float64)
 
+def enu_axes(position, a:float = 6378.137, f:float = 1/298.257223563) -> np.ndarray:
+    """
+    Computes the local East, North and Up axes of a station on the WGS84
+    ellipsoid.
+
+    Parameters
+    ----------
+    position : (np.ndarray)
+        The Earth-fixed (ITRF) position of the station in km.
+    a : float
+        The equatorial radius in km.
+    f : float
+        The flattening.
+
+    Returns
+    -------
+    (np.ndarray)
+        The 3 x 3 matrix with the East, North and Up unit vectors as rows,
+        so `enu_axes(position) @ vector` gives the vector in the local
+        East, North, Up frame.
+    """
+    x, y, z = np.asarray(position, dtype=np.float64)
+    # The ellipsoid normal, the geodetic vertical
+    up = np.array([x, y, z / (1 - f)**2])
+    up /= np.linalg.norm(up)
+    east = np.array([-y, x, 0.0])
+    east /= np.linalg.norm(east)
+    north = np.cross(up, east)
+    return np.array([east, north, up])
+
 @njit
 def get_len(basis):
     return np.sqrt(basis[0] * basis[0] + basis[1] * basis[1] + basis[2] * basis[2])
@@ -128,3 +158,133 @@ def get_view_time_lengths(view_time_span) -> np.ndarray:
     arr = view_time_span[:,1] - view_time_span[:,0]
     return np.array(arr)
 
+
+@njit
+def _window_active(state, above, i, flag, elev_idx):
+    if (state[i] & flag) != flag:
+        return False
+    if elev_idx >= 0 and not above[i, elev_idx]:
+        return False
+    return True
+
+@njit
+def extract_windows(state, above, elevations, distances, flags, elev_idx, dist_idx):
+    """
+    Finds the windows of every channel in one compiled sweep over the samples.
+
+    A channel is active in a sample when all bits of its flag are set in
+    `state` and, if it has an elevation column, the station is above its
+    elevation mask in `above`.
+
+    Parameters
+    ----------
+    state : (np.ndarray)
+        The packed uint8 flags of each sample.
+    above : (np.ndarray)
+        An n x s boolean array, True where a station is above its mask.
+    elevations : (np.ndarray)
+        An n x s array of station elevations in degrees.
+    distances : (np.ndarray)
+        An n x d array of ranges used for the per window minimum.
+    flags : (np.ndarray)
+        The SEEnum flag of each channel.
+    elev_idx : (np.ndarray)
+        The column in `elevations` of each channel, -1 if it has none.
+    dist_idx : (np.ndarray)
+        The column in `distances` of each channel, -1 if it has none.
+
+    Returns
+    -------
+    tuple[np.ndarray, ...]
+        The channel, start index, stop index (exclusive), maximum elevation
+        and minimum distance of every window, ordered by channel and start.
+        Statistics without a column are NaN.
+    """
+    n = state.shape[0]
+    n_channels = flags.shape[0]
+
+    # Count the rising edges first, so the outputs can be allocated once
+    counts = np.zeros(n_channels, dtype=np.int64)
+    active = np.zeros(n_channels, dtype=np.bool_)
+    for i in range(n):
+        for c in range(n_channels):
+            now = _window_active(state, above, i, flags[c], elev_idx[c])
+            if now and not active[c]:
+                counts[c] += 1
+            active[c] = now
+
+    total = counts.sum()
+    channel = np.empty(total, dtype=np.int64)
+    start = np.empty(total, dtype=np.int64)
+    stop = np.empty(total, dtype=np.int64)
+    max_elev = np.full(total, np.nan, dtype=np.float64)
+    min_dist = np.full(total, np.nan, dtype=np.float64)
+
+    # Each channel writes its windows into its own contiguous block
+    cursor = np.empty(n_channels, dtype=np.int64)
+    offset = 0
+    for c in range(n_channels):
+        cursor[c] = offset
+        offset += counts[c]
+
+    active[:] = False
+    for i in range(n + 1):
+        for c in range(n_channels):
+            now = i < n and _window_active(state, above, i, flags[c], elev_idx[c])
+            k = cursor[c]
+            if now and not active[c]:
+                channel[k] = c
+                start[k] = i
+                if elev_idx[c] >= 0:
+                    max_elev[k] = -np.inf
+                if dist_idx[c] >= 0:
+                    min_dist[k] = np.inf
+            if now:
+                if elev_idx[c] >= 0:
+                    max_elev[k] = max(max_elev[k], elevations[i, elev_idx[c]])
+                if dist_idx[c] >= 0:
+                    min_dist[k] = min(min_dist[k], distances[i, dist_idx[c]])
+            if active[c] and not now:
+                stop[k] = i
+                cursor[c] += 1
+            active[c] = now
+    return channel, start, stop, max_elev, min_dist
+
+@njit
+def assign_stations(visible, score, min_dwell):
+    """
+    Picks the station to use in every sample.
+
+    The best scoring visible station is used, but a station is kept for at
+    least `min_dwell` samples while it stays visible before handing over.
+
+    Parameters
+    ----------
+    visible : (np.ndarray)
+        An n x k boolean array, True where a station has LOS.
+    score : (np.ndarray)
+        An n x k array of scores, the highest visible score is the best.
+    min_dwell : int
+        The minimum number of samples between two handovers.
+
+    Returns
+    -------
+    (np.ndarray)
+        The column of the station used in every sample, -1 if none is visible.
+    """
+    n, k = visible.shape
+    assignment = np.full(n, -1, dtype=np.int64)
+    current = -1
+    dwell = 0
+    for i in range(n):
+        best = -1
+        for j in range(k):
+            if visible[i, j] and (best < 0 or score[i, j] > score[i, best]):
+                best = j
+        if current >= 0 and visible[i, current] and (dwell < min_dwell or best == current):
+            dwell += 1
+        else:
+            current = best
+            dwell = 1
+        assignment[i] = current
+    return assignment
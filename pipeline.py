@@ -0,0 +1,178 @@
+import os
+import sys
+import glob
+import shutil
+import argparse
+import numpy as np
+
+import mani_rain
+from mani import GodotHandler, ResultStore, HorizonMask, SEEnum
+from mani.LinkBudget import budget_rates
+from mani.Pipeline import Pipeline, file_hash, source_hash
+
+from godot.core import tempo, util
+util.suppressLogger()
+
+sys.path.append('./Optimization')
+from downlink.data import save_dataset
+from downlink.sweep import run_sweep
+from downlink.plots import render
+import optimization_gs
+import optimization_gw
+
+SCRIPTS = {'gs': optimization_gs, 'gw': optimization_gw}
+
+# The modules every stage runs, hashed into its key with the stage itself
+GEOMETRY_CODE = ['./mani/GodotEvaluator.py', './mani/VisibilityModel.py', './mani/utils.py', './mani/StateEvaluator.py',
+                 './mani/ResultStore.py', './mani/HorizonMask.py', './mani/HaloOrbit/HaloOrbit.py']
+LOS_CODE = ['./mani/StateEvaluator.py', './mani/ResultStore.py', './mani/HorizonMask.py', './mani/utils.py']
+
+def geometry(pipe:Pipeline, year:int, resolution:float = 60.0, universe:str = './universe.yml') -> dict:
+    """
+    The year simulation of the spacecraft, moon, gateway and stations.
+    """
+    params = {'year': year, 'resolution': resolution,
+              'universe': file_hash(universe, './aalborgStation.json', './mani/HaloOrbit/GateWayOrbit_prop.csv'),
+              'code': file_hash(*GEOMETRY_CODE), 'stage': source_hash(geometry)}
+
+    def build(path):
+        ep1 = tempo.Epoch(str(year)+'-01-01T00:00:00 TT')
+        ep2 = tempo.Epoch(str(year + 1)+'-01-01T00:00:00 TT')
+        res = GodotHandler(ep1, ep2, resolution, universe).calculate_visibility()
+        ResultStore.save(res, path)
+        return {'length': res.get_length()}
+
+    return pipe.run('geometry', params, build)
+
+def los_masks(pipe:Pipeline, geo:dict, station:str, min_elevation:float = 10.0, horizon:str = './horizonMasks.json') -> dict:
+    """
+    The LOS of a station, the sun on the moon and the gateway LOS.
+    """
+    masks = None
+    if horizon is not None and os.path.exists(horizon):
+        masks = HorizonMask.load(horizon).masks
+    params = {'station': station, 'min_elevation': min_elevation, 'horizon': masks,
+              'code': file_hash(*LOS_CODE), 'stage': source_hash(los_masks)}
+
+    def build(path):
+        res = ResultStore.load(geo['path'])
+        res.set_internal_min_elevation(min_elevation)
+        res.set_horizon_mask(None if masks is None else HorizonMask(masks))
+        los = np.asarray(res.los(station), dtype=bool)
+        som = np.asarray(res.has([SEEnum.SUN_ON_MOON]), dtype=bool)
+        np.save(os.path.join(path, 'los.npy'), los)
+        np.save(os.path.join(path, 'som.npy'), som)
+        np.save(os.path.join(path, 'gw_los.npy'), np.asarray(res.has([SEEnum.LOS_GW]), dtype=bool))
+        return {'sun_on_moon': float(np.mean(som)), 'los': float(np.mean(los))}
+
+    return pipe.run('los', params, build, [geo])
+
+def link_rates(pipe:Pipeline, geo:dict, los:dict, target_data_rate:float, bandwidth:float = 100e6) -> dict:
+    """
+    The Es/N0 and fixed MODCOD data rate of the station, with the rain
+    model of the station.
+    """
+    station = los['params']['station']
+    params = {'target_data_rate': target_data_rate, 'bandwidth': bandwidth,
+              'code': file_hash('./mani/LinkBudget.py', './mani/StateEvaluator.py', './mani/ResultStore.py'),
+              'stage': source_hash(link_rates)}
+
+    def build(path):
+        model_dict = {'AAU':mani_rain.rain.aau_ma_model, 'NN11':mani_rain.rain.nn_ma_model}
+        station_dict = {'AAU':mani_rain.aalborg, 'NN11':mani_rain.new_norcia}
+        mrm = mani_rain.markov_rain(station_dict[station], model_dict[station])
+        link = mani_rain.link_budget_markov(station_dict[station], mrm, bandwidth, link_margin = 0)
+        full_data_rate = float(link.dvb_s2_fixed_rate(100, target_data_rate))
+
+        res = ResultStore.load(geo['path'])
+        condition = np.load(os.path.join(los['path'], 'los.npy'))
+        # The rain model steps once per visible sample, see budget_rates
+        rates, snrs = budget_rates(res, station, condition, link, full_data_rate)
+        np.save(os.path.join(path, 'rates.npy'), rates)
+        np.save(os.path.join(path, 'snr.npy'), snrs)
+        return {'full_data_rate': full_data_rate, 'esno': float(link.dvb.modcod_at_rate(full_data_rate).esno)}
+
+    return pipe.run('link', params, build, [los])
+
+def optimizer_inputs(pipe:Pipeline, los:dict, link:dict, science_rate_byte:float, gateway_rate:float = 16e6) -> dict:
+    """
+    The dataset of the optimizer, in a `station_{station}_rate_{rate}`
+    folder inside the stage.
+    """
+    station = los['params']['station']
+    params = {'science_rate_byte': science_rate_byte, 'gateway_rate': gateway_rate,
+              'code': file_hash('./Optimization/downlink/data.py'), 'stage': source_hash(optimizer_inputs)}
+
+    def build(path):
+        los_mask = np.load(os.path.join(los['path'], 'los.npy'))
+        snr = np.load(os.path.join(link['path'], 'snr.npy'))
+        rates = np.load(os.path.join(link['path'], 'rates.npy'))
+        full_data_rate = link['results']['full_data_rate']
+        science_rate = science_rate_byte * 8 / (60 * 60 * 24) / los['results']['sun_on_moon']
+        outage_prob = np.sum(~np.isnan(snr) & los_mask & (snr < link['results']['esno']))/np.sum(los_mask)
+
+        folder = f"station_{station}_rate_{int(full_data_rate)}"
+        save_dataset(os.path.join(path, folder), {
+            'los': los_mask, 'outage_los': rates > 0, 'som': np.load(os.path.join(los['path'], 'som.npy')),
+            'gw_los': np.load(os.path.join(los['path'], 'gw_los.npy')), 'Rsc': science_rate * 60,
+            'Rdl': full_data_rate * (1 - outage_prob) * 60, 'Rgw': gateway_rate * 60,
+            'Rdl_raw': full_data_rate * 60})
+        return {'folder': folder, 'outage_prob': float(outage_prob)}
+
+    return pipe.run('inputs', params, build, [los, link])
+
+def solves(pipe:Pipeline, inputs:dict, kind:str, rhos:list, threads:int = 4, cores:int = None) -> dict:
+    """
+    The year solves of `optimization_gs` or `optimization_gw` for every
+    rho, with a copy of their results bundles inside the stage.
+    """
+    script = SCRIPTS[kind]
+    params = {'kind': kind, 'rhos': list(rhos),
+              'code': file_hash(script.__file__, *sorted(glob.glob('./Optimization/downlink/*.py'))),
+              'stage': source_hash(solves)}
+
+    def build(path):
+        # The scripts read the data folder relative to Optimization/
+        data_folder = os.path.relpath(os.path.join(inputs['path'], inputs['results']['folder']), 'Optimization')
+        results = run_sweep(script.run, [(data_folder, rho) for rho in rhos], threads, cores, script.write_summary)
+        failed = [job for job, meta, error in results if error is not None]
+        if failed:
+            raise RuntimeError(f"Solves failed: {failed}")
+        render([script.figure(meta) for job, meta, error in results], cores)
+        runs = []
+        for (data_folder, rho), meta, error in results:
+            bundle = f"{kind}_{rho:.2f}.npz"
+            shutil.copyfile(meta['path'], os.path.join(path, bundle))
+            runs.append({'rho': rho, 'bundle': bundle, 'source': meta['path'], 'total_cost': float(meta['total_cost']),
+                         'total_DL': float(meta['total_DL']), 'end_buffer': float(meta['end_buffer'])})
+        return {'runs': runs}
+
+    return pipe.run('solves', params, build, [inputs])
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Year simulation to optimizer results, with every stage cached")
+    parser.add_argument('year', type=int)
+    parser.add_argument('station', choices=['AAU', 'NN11'])
+    parser.add_argument('--target-rate', type=float, default=None, help="bit/s, 60e6 for AAU and 404e6 for NN11 by default")
+    parser.add_argument('--science', type=float, default=25e9, help="science data per day in byte")
+    parser.add_argument('--gateway-rate', type=float, default=16e6, help="bit/s")
+    parser.add_argument('--bandwidth', type=float, default=100e6, help="Hz")
+    parser.add_argument('--min-elevation', type=float, default=10.0, help="degrees")
+    parser.add_argument('--solve', choices=['gs', 'gw'], nargs='*', default=[], help="the optimizer scripts to run")
+    parser.add_argument('--rhos', type=float, nargs='+', default=[1/5, 1/3, 1/2, 2/3])
+    parser.add_argument('--threads', type=int, default=4, help="per solve")
+    parser.add_argument('--cache', default='./output/cache')
+    parser.add_argument('--force', nargs='*', default=[], help="stages to rebuild")
+    args = parser.parse_args()
+    target_rate = args.target_rate or {'AAU':60e6, 'NN11':404e6}[args.station]
+
+    pipe = Pipeline(args.cache, args.force)
+    geo = geometry(pipe, args.year)
+    los = los_masks(pipe, geo, args.station, args.min_elevation)
+    link = link_rates(pipe, geo, los, target_rate, args.bandwidth)
+    inputs = optimizer_inputs(pipe, los, link, args.science, args.gateway_rate)
+    print(f"Optimizer inputs: {os.path.join(inputs['path'], inputs['results']['folder'])}")
+    for kind in args.solve:
+        stage = solves(pipe, inputs, kind, args.rhos, args.threads)
+        for run in stage['results']['runs']:
+            print(f"{kind} rho {run['rho']:.2f}: {os.path.join(stage['path'], run['bundle'])}")